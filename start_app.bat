@@ -5,6 +5,13 @@ call venv\Scripts\activate
 REM Change directory to the folder containing manage.py
 cd webUi
 
+REM Create or update the database tables for stored jobs and results
+python manage.py migrate --noinput
+
+REM With SUBTITLE_INFERENCE_SERVER set in webUi\settings.py, start the inference
+REM server first so it loads the models while the web server starts:
+REM start "" python manage.py inference_server
+
 REM Start the Django development server in a new window
 start "" python manage.py runserver
 
@@ -6,6 +6,13 @@ source venv/bin/activate
 # Change directory to the folder containing manage.py
 cd webUi
 
+# Create or update the database tables for stored jobs and results
+python manage.py migrate --noinput
+
+# With SUBTITLE_INFERENCE_SERVER set in webUi/settings.py, start the inference
+# server first so it loads the models while the web server starts:
+# nohup python manage.py inference_server &
+
 # Start the Django development server
 nohup python manage.py runserver &
 
@@ -1,3 +1,34 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import TranscriptionJob, TranscriptionResult
+
+
+@admin.register(TranscriptionJob)
+class TranscriptionJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "safe_base_name",
+        "status",
+        "model_choice",
+        "audio_seconds",
+        "inference_seconds",
+        "created_at",
+        "expires_at",
+    )
+    list_filter = ("status", "model_choice")
+    search_fields = ("id", "safe_base_name", "audio_hash")
+
+
+@admin.register(TranscriptionResult)
+class TranscriptionResultAdmin(admin.ModelAdmin):
+    list_display = (
+        "audio_hash",
+        "model_choice",
+        "language",
+        "audio_seconds",
+        "inference_seconds",
+        "created_at",
+        "expires_at",
+    )
+    list_filter = ("model_choice", "device", "language")
+    search_fields = ("audio_hash", "cache_key")
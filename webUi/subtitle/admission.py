@@ -0,0 +1,217 @@
+import os
+import re
+import math
+import wave
+import shutil
+import logging
+import threading
+import subprocess
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Seconds of audio that may be queued or in progress for one model on one device
+# before new requests are turned away; None admits everything
+MAX_QUEUED_AUDIO_SECONDS = getattr(
+    settings, "SUBTITLE_MAX_QUEUED_AUDIO_SECONDS", 4 * 3600
+)
+# Real-time factor (processing time / audio duration) assumed for the base model until
+# its transcriptions have been timed, in this process or in the result store
+DEFAULT_REAL_TIME_FACTOR = getattr(settings, "SUBTITLE_DEFAULT_REAL_TIME_FACTOR", 0.5)
+# Decoding cost of each model family relative to base, for models not yet measured
+MODEL_COST_FACTORS = {
+    "tiny": 0.5,
+    "base": 1.0,
+    "small": 3.0,
+    "medium": 8.0,
+    "large": 16.0,
+    "turbo": 5.0,
+}
+# Transcriptions that run at the same time, which the queue is shared between
+WORKERS = max(1, getattr(settings, "SUBTITLE_JOB_WORKERS", 1))
+# Weight of the latest transcription in the moving average of the real-time factor
+RTF_SMOOTHING = 0.3
+# Duration estimate for files neither ffprobe nor the wave module can read (128 kbit/s)
+FALLBACK_BYTES_PER_SECOND = 16000
+
+_lock = threading.Lock()
+_tickets = {}  # (model, device) -> set of Tickets
+_real_time_factors = {}  # (model, device) -> moving average
+_profiles = {}  # (model, device) -> real-time factor of earlier runs (set_profiles())
+
+
+class Overloaded(Exception):
+    """Raised when admitting a request would queue too much audio for its model."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """Audio admitted for a model and device; held until its transcription ends."""
+
+    def __init__(self, key, audio_seconds):
+        self.key = key
+        self.audio_seconds = audio_seconds
+        self.progress = 0.0
+        # Seconds from admission until the transcription should be done, if estimated
+        self.expected_seconds = None
+
+    @property
+    def remaining_seconds(self):
+        return self.audio_seconds * (1.0 - self.progress)
+
+
+def probe_duration(file_path):
+    """
+    Returns the duration of an audio file in seconds without decoding it: from
+    ffprobe, the WAV header or, failing both, the file size.
+    """
+    if shutil.which("ffprobe"):
+        try:
+            output = subprocess.run(
+                [
+                    "ffprobe",
+                    "-v",
+                    "error",
+                    "-show_entries",
+                    "format=duration",
+                    "-of",
+                    "default=noprint_wrappers=1:nokey=1",
+                    file_path,
+                ],
+                capture_output=True,
+                text=True,
+                timeout=30,
+                check=True,
+            ).stdout
+            return float(output)
+        except (subprocess.SubprocessError, ValueError):
+            pass
+    try:
+        with wave.open(file_path, "rb") as wav_file:
+            return wav_file.getnframes() / wav_file.getframerate()
+    except (wave.Error, EOFError, OSError):
+        pass
+    return os.path.getsize(file_path) / FALLBACK_BYTES_PER_SECOND
+
+
+def _real_time_factor(key):
+    measured = _real_time_factors.get(key, _profiles.get(key))
+    if measured is not None:
+        return measured
+    family = re.match(r"[a-z]*", key[0]).group()
+    return DEFAULT_REAL_TIME_FACTOR * MODEL_COST_FACTORS.get(family, 1.0)
+
+
+def real_time_factor(key):
+    """
+    Returns the real-time factor of a (model, device) pair measured in this process
+    or by earlier runs, or one estimated from DEFAULT_REAL_TIME_FACTOR and
+    MODEL_COST_FACTORS.
+    """
+    with _lock:
+        return _real_time_factor(key)
+
+
+def observe(key, audio_seconds, seconds):
+    """Folds the timing of a finished transcription into the model's real-time factor."""
+    if not audio_seconds or seconds is None:
+        return
+    rtf = seconds / audio_seconds
+    with _lock:
+        previous = _real_time_factors.get(key)
+        _real_time_factors[key] = (
+            rtf if previous is None else previous + RTF_SMOOTHING * (rtf - previous)
+        )
+
+
+def set_profiles(profiles):
+    """
+    Replaces the real-time factors of earlier runs, a dict keyed by (model, device),
+    used for pairs that have not finished a transcription in this process.
+    """
+    with _lock:
+        _profiles.clear()
+        _profiles.update(profiles)
+
+
+def _pending_seconds(key):
+    return sum(ticket.remaining_seconds for ticket in _tickets.get(key, ()))
+
+
+def _wait_seconds():
+    # Everything queued shares the same workers, whichever model it is for
+    return (
+        sum(_pending_seconds(key) * _real_time_factor(key) for key in _tickets)
+        / WORKERS
+    )
+
+
+def admit(key, audio_seconds):
+    """
+    Reserves audio_seconds of work for a (model, device) pair and returns the
+    Ticket to release() when it is done. Raises Overloaded, with the seconds after
+    which a retry should fit, if the pair already has more than
+    MAX_QUEUED_AUDIO_SECONDS queued. A request is always admitted to an idle model.
+    """
+    with _lock:
+        tickets = _tickets.setdefault(key, set())
+        pending = _pending_seconds(key)
+        if (
+            MAX_QUEUED_AUDIO_SECONDS is not None
+            and tickets
+            and pending + audio_seconds > MAX_QUEUED_AUDIO_SECONDS
+        ):
+            excess = min(pending, pending + audio_seconds - MAX_QUEUED_AUDIO_SECONDS)
+            retry_after = max(1, math.ceil(excess * _real_time_factor(key) / WORKERS))
+            metrics.ADMISSION_REJECTIONS.inc(model=key[0], device=key[1])
+            logger.warning(
+                f"Rejected {audio_seconds:.0f}s of audio for {key}: "
+                f"{pending:.0f}s already queued."
+            )
+            raise Overloaded(
+                f"{pending / 60:.0f} minutes of audio are already queued for "
+                f"the '{key[0]}' model; try again in {retry_after} seconds.",
+                retry_after,
+            )
+        ticket = Ticket(key, audio_seconds)
+        tickets.add(ticket)
+    return ticket
+
+
+def release(ticket):
+    """Returns a ticket's audio to the pool of admissible work."""
+    with _lock:
+        _tickets.get(ticket.key, set()).discard(ticket)
+
+
+def queue_status():
+    """
+    Returns the queued jobs and seconds of audio, the estimated wait for a new
+    request and the same figures for each (model, device) pair.
+    """
+    with _lock:
+        models = [
+            {
+                "model": model,
+                "device": device,
+                "jobs": len(tickets),
+                "queued_audio_seconds": _pending_seconds((model, device)),
+                "real_time_factor": _real_time_factor((model, device)),
+            }
+            for (model, device), tickets in sorted(_tickets.items())
+            if tickets
+        ]
+        wait_seconds = _wait_seconds()
+    return {
+        "jobs": sum(model["jobs"] for model in models),
+        "queued_audio_seconds": sum(model["queued_audio_seconds"] for model in models),
+        "estimated_wait_seconds": wait_seconds,
+        "limit_seconds": MAX_QUEUED_AUDIO_SECONDS,
+        "models": models,
+    }
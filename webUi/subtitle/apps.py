@@ -1,32 +1,47 @@
-import os
-import time
 import threading
 from django.apps import AppConfig
 from django.conf import settings
 
+_startup_lock = threading.Lock()
+_startup_started = False
+
+
+def run_startup_checks():
+    """
+    Verifies the downloaded models and preloads SUBTITLE_PRELOAD_MODELS in a
+    background thread, once per process. Only the process that serves requests
+    calls this (webUi/wsgi.py and webUi/asgi.py, which runserver loads in the
+    process the autoreloader starts), so management commands, worker processes
+    and the autoreloader itself load no models.
+    """
+    global _startup_started
+    with _startup_lock:
+        if _startup_started:
+            return
+        _startup_started = True
+
+    def startup_check():
+        from .views import STARTUP_COMPLETE, verify_downloaded_models, warm_up_models
+        try:
+            # Only corrupt model files are downloaded again; valid files are kept.
+            verify_downloaded_models()
+        except Exception as e:
+            print(f"Error verifying models on startup: {e}")
+        # Load and warm up the configured models before reporting readiness.
+        # With an inference server the models live there (it preloads them itself).
+        preload = getattr(settings, 'SUBTITLE_PRELOAD_MODELS', [])
+        if getattr(settings, 'SUBTITLE_INFERENCE_SERVER', None):
+            preload = []
+        for model in preload:
+            try:
+                warm_up_models([model])
+            except Exception as e:
+                print(f"Error preloading model '{model}': {e}")
+        STARTUP_COMPLETE.set()
+
+    # Run the startup check in a separate thread to avoid blocking the main thread.
+    threading.Thread(target=startup_check, daemon=True).start()
+
+
 class SubtitleConfig(AppConfig):
     name = 'subtitle'
-
-    def ready(self):
-        # Define a startup check function to update downloaded models.
-        def startup_check():
-            # Wait a few seconds to allow the server to finish starting up.
-            time.sleep(5)
-            from .views import update_model
-            # Define the directory where models are stored.
-            model_dir = os.path.join(settings.BASE_DIR, 'openaiWhisperModels')
-            # List the models that you want to check for updates.
-            models_to_check = ["tiny", "base", "small", "medium", "large"]
-            for model in models_to_check:
-                model_path = os.path.join(model_dir, model)
-                # If the model folder exists, update the model.
-                if os.path.exists(model_path):
-                    try:
-                        print(f"Updating model '{model}' on startup...")
-                        update_model(model)
-                        print(f"Model '{model}' updated successfully.")
-                    except Exception as e:
-                        print(f"Error updating model '{model}': {e}")
-        
-        # Run the startup check in a separate thread to avoid blocking the main thread.
-        threading.Thread(target=startup_check).start()
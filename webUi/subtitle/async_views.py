@@ -0,0 +1,117 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_GET, require_POST
+
+from . import admission
+from .views import (
+    EVENT_POLL_SECONDS,
+    JobEvents,
+    _job_payload,
+    event_format,
+    event_stream_response,
+    finished_job_response,
+    get_job_or_404,
+    initial_upload_form,
+    model_management,
+    overloaded_response,
+    parse_upload,
+    render_upload_page,
+    start_job,
+)
+
+# Blocking work (multipart parsing, file I/O, sessions and users, the job store) runs in
+# the default thread pool instead of Django's single thread-sensitive executor, and
+# inference runs on the bounded job worker pool (SUBTITLE_JOB_WORKERS), so the event
+# loop stays free.
+run_blocking = sync_to_async(thread_sensitive=False)
+
+
+def _render_form(request, form=None, overloaded=None):
+    if form is None:
+        form = initial_upload_form(request)
+    return render_upload_page(
+        request,
+        form,
+        {
+            "jobs_url": reverse("create_job_async"),
+            "models_url": reverse("model_management_async"),
+        },
+        overloaded,
+    )
+
+
+def _async_job_payload(job):
+    payload = _job_payload(job)
+    payload["status_url"] = reverse("job_status_async", args=[job.id])
+    payload["events_url"] = reverse("job_events_async", args=[job.id])
+    return payload
+
+
+async def transcribe_audio_async(request):
+    """
+    Async version of transcribe_audio(). The transcription runs on the job worker
+    pool and the view awaits it, so a waiting request does not hold a thread.
+    """
+    if request.method != "POST":
+        return await run_blocking(_render_form)(request)
+
+    form, file_path, safe_base_name = await run_blocking(parse_upload)(request)
+    if file_path is None:
+        return await run_blocking(_render_form)(request, form)
+    try:
+        job = await run_blocking(start_job)(request, form, file_path, safe_base_name)
+    except admission.Overloaded as e:
+        form.add_error(None, str(e))
+        return await run_blocking(_render_form)(request, form, e)
+    await asyncio.wrap_future(job.future)
+    return await run_blocking(finished_job_response)(job)
+
+
+@require_POST
+async def create_job_async(request):
+    """Async version of create_job(): queues the upload and returns the job at once."""
+    form, file_path, safe_base_name = await run_blocking(parse_upload)(request)
+    if file_path is None:
+        return JsonResponse({"errors": form.errors}, status=400)
+    try:
+        job = await run_blocking(start_job)(request, form, file_path, safe_base_name)
+    except admission.Overloaded as e:
+        return overloaded_response(e)
+    return JsonResponse(_async_job_payload(job), status=202)
+
+
+@require_GET
+async def job_status_async(request, job_id):
+    """Returns the status and progress of a transcription job."""
+    # Jobs that are no longer in memory are read from the database
+    job = await run_blocking(get_job_or_404)(job_id)
+    return JsonResponse(_async_job_payload(job))
+
+
+@require_GET
+async def job_events_async(request, job_id):
+    """
+    Async version of job_events(). The event stream is an async generator, so an
+    open connection waiting for segments does not occupy a worker thread.
+    """
+    job = await run_blocking(get_job_or_404)(job_id)
+    events = JobEvents(job, event_format(request, job), _async_job_payload)
+    return event_stream_response(_job_event_stream(events))
+
+
+async def _job_event_stream(events):
+    while True:
+        await run_blocking(events.refresh)()
+        for event in events.poll():
+            yield event
+        if events.done:
+            return
+        await asyncio.sleep(EVENT_POLL_SECONDS)
+
+
+async def model_management_async(request):
+    """Runs model_management() off the event loop; downloads can take minutes."""
+    return await run_blocking(model_management)(request)
@@ -0,0 +1,127 @@
+import os
+import logging
+import weakref
+import threading
+from collections import Counter
+
+import numpy as np
+import torch
+import whisper
+
+from django.conf import settings
+
+from .result_cache import prune_directory
+
+logger = logging.getLogger(__name__)
+
+# Directory holding decoded 16 kHz float32 audio (and optionally log-mel) as .npy files
+CACHE_DIR = os.path.join(settings.BASE_DIR, "audioCache")
+os.makedirs(CACHE_DIR, exist_ok=True)
+
+# Maximum total size of the cache directory before old entries are evicted
+MAX_BYTES = getattr(settings, "SUBTITLE_AUDIO_CACHE_MAX_BYTES", 4 * 1024**3)
+
+# Whether log-mel spectrograms are cached as well as the waveform
+CACHE_MEL = getattr(settings, "SUBTITLE_CACHE_MEL", False)
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+# Cache files mapped by arrays that are still alive, which are not evicted: chunk
+# workers reopen them by path and Windows cannot delete a mapped file
+_pins = Counter()
+
+
+def _load_cached(path):
+    # Copy-on-write mapping: pages come from the page cache and are shared
+    # between processes; numpy and torch can still treat the array as writable
+    array = np.load(path, mmap_mode="c")
+    os.utime(path)
+    with _lock:
+        _pins[path] += 1
+    # Slices and tensors made from the array keep it alive until they are gone too
+    weakref.finalize(array, _unpin, path)
+    return array
+
+
+def _unpin(path):
+    with _lock:
+        _pins[path] -= 1
+        if not _pins[path]:
+            del _pins[path]
+
+
+def _save(path, array):
+    """
+    Writes an entry and evicts old ones beyond MAX_BYTES. Returns False, writing
+    nothing, if the array alone is larger than the cache.
+    """
+    if array.nbytes > MAX_BYTES:
+        logger.info(
+            f"Not caching {os.path.basename(path)}: {array.nbytes / 1024**2:.0f} MiB "
+            "is more than the audio cache holds."
+        )
+        return False
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(temp_path, path)
+    with _lock:
+        in_use = set(_pins)
+    prune_directory(CACHE_DIR, MAX_BYTES, keep=in_use | {path})
+    return True
+
+
+def load_audio(file_path, audio_hash):
+    """
+    Returns the decoded 16 kHz mono waveform of file_path as a memory-mapped array.
+    ffmpeg only runs the first time a given audio content is seen. Audio larger
+    than the whole cache is not cached and returned as an ordinary array.
+    """
+    path = os.path.join(CACHE_DIR, f"{audio_hash}.npy")
+    try:
+        audio = _load_cached(path)
+    except (FileNotFoundError, ValueError):
+        audio = None
+    with _lock:
+        _stats["hits" if audio is not None else "misses"] += 1
+    if audio is not None:
+        logger.info(f"Loaded decoded audio {audio_hash[:12]} from the audio cache.")
+        return audio
+
+    audio = whisper.load_audio(file_path)
+    return _load_cached(path) if _save(path, audio) else audio
+
+
+def is_cached(audio_hash):
+    """Returns whether the decoded waveform of an audio content is in the cache."""
+    return os.path.exists(os.path.join(CACHE_DIR, f"{audio_hash}.npy"))
+
+
+def load_mel(audio_hash, audio, n_mels):
+    """
+    Returns the log-mel spectrogram of the whole audio (as computed by
+    whisper.log_mel_spectrogram) as a tensor, cached when SUBTITLE_CACHE_MEL is on.
+    """
+    if not CACHE_MEL:
+        return whisper.log_mel_spectrogram(audio, n_mels)
+    path = os.path.join(CACHE_DIR, f"{audio_hash}.mel{n_mels}.npy")
+    try:
+        return torch.from_numpy(_load_cached(path))
+    except (FileNotFoundError, ValueError):
+        pass
+    mel = whisper.log_mel_spectrogram(audio, n_mels)
+    return torch.from_numpy(_load_cached(path)) if _save(path, mel.numpy()) else mel
+
+
+def stats():
+    """Returns hit/miss counters and the size of the audio cache."""
+    with _lock:
+        data = dict(_stats)
+    data["entries"] = 0
+    data["bytes"] = 0
+    with os.scandir(CACHE_DIR) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(".npy"):
+                data["entries"] += 1
+                data["bytes"] += entry.stat().st_size
+    return data
@@ -0,0 +1,225 @@
+import queue
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future
+
+import torch
+import whisper
+from whisper.audio import HOP_LENGTH, N_FRAMES, SAMPLE_RATE, pad_or_trim
+from whisper.decoding import DecodingOptions
+from whisper.tokenizer import get_tokenizer
+
+from .chunking import find_split_points
+
+logger = logging.getLogger(__name__)
+
+# Seconds of audio covered by one timestamp token
+TIME_PRECISION = 0.02
+
+# Windows are cut at quiet points so they never exceed Whisper's 30-second input
+WINDOW_SECONDS = 28.0
+WINDOW_SEARCH_SECONDS = 2.0
+
+# Seconds a scheduler's thread waits for new windows before it exits; it is started
+# again by the next submission
+IDLE_SECONDS = 60.0
+
+
+class BatchScheduler:
+    """
+    Collects 30-second mel windows submitted by concurrent jobs that use the
+    same model and decoding options, and decodes them together as one batch.
+    Its thread runs while there are windows and exits after IDLE_SECONDS without.
+    """
+
+    def __init__(self, options, max_batch_size, max_wait_seconds):
+        self.options = options
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._running = False
+        self._stats = {"batches": 0, "windows": 0}
+
+    def submit(self, model, model_lock, mel):
+        """
+        Queues one (n_mels, 3000) mel window and returns a Future of its
+        DecodingResult. The batch is decoded holding model_lock, the model's lease
+        in the model pool, as the model cannot decode in two threads at once.
+        """
+        future = Future()
+        with self._lock:
+            self._queue.put((model, model_lock, mel, future))
+            if not self._running:
+                self._running = True
+                threading.Thread(target=self._run, daemon=True).start()
+        return future
+
+    @property
+    def idle(self):
+        with self._lock:
+            return not self._running and self._queue.empty()
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=IDLE_SECONDS)]
+        except queue.Empty:
+            return None
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get(timeout=self.max_wait_seconds))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        pending = []
+        while True:
+            batch = pending or self._next_batch()
+            if batch is None:
+                with self._lock:
+                    if self._queue.empty():
+                        self._running = False
+                        return
+                continue
+            # A model can be reloaded between submissions; only batch identical models
+            model, model_lock = batch[0][:2]
+            pending = [item for item in batch if item[0] is not model]
+            batch = [item for item in batch if item[0] is model]
+            try:
+                mels = torch.stack([mel for _, _, mel, _ in batch])
+                with model_lock:
+                    results = whisper.decode(model, mels, self.options)
+            except Exception as e:
+                for _, _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            self._stats["batches"] += 1
+            self._stats["windows"] += len(batch)
+            for (_, _, _, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self):
+        return dict(self._stats)
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(model_choice, options, max_batch_size, max_wait_seconds):
+    """
+    Returns the shared scheduler for a model and set of decoding options.
+    Idle schedulers of other models and options are forgotten.
+    """
+    key = (model_choice, options)
+    with _schedulers_lock:
+        for other in [k for k, s in _schedulers.items() if k != key and s.idle]:
+            del _schedulers[other]
+        if key not in _schedulers:
+            _schedulers[key] = BatchScheduler(options, max_batch_size, max_wait_seconds)
+        return _schedulers[key]
+
+
+def result_to_segments(tokenizer, result, offset, duration):
+    """Converts the timestamped tokens of one decoded window into segments."""
+    segments = []
+    start = None
+    text_tokens = []
+    for token in result.tokens:
+        if token >= tokenizer.timestamp_begin:
+            time = (token - tokenizer.timestamp_begin) * TIME_PRECISION
+            if text_tokens and start is not None:
+                segments.append((start, time, text_tokens))
+                text_tokens = []
+            start = time
+        elif token < tokenizer.eot:
+            text_tokens.append(token)
+    if text_tokens:
+        # The window ended without a closing timestamp
+        segments.append((start or 0.0, duration, text_tokens))
+
+    return [
+        {
+            "start": offset + start,
+            "end": offset + min(end, duration),
+            "text": tokenizer.decode(tokens),
+            "tokens": tokens,
+            "temperature": result.temperature,
+            "avg_logprob": result.avg_logprob,
+            "compression_ratio": result.compression_ratio,
+            "no_speech_prob": result.no_speech_prob,
+        }
+        for start, end, tokens in segments
+    ]
+
+
+def transcribe_batched(
+    model,
+    model_lock,
+    model_choice,
+    audio,
+    mel,
+    decode_options,
+    max_batch_size,
+    max_wait_seconds,
+    progress_callback=None,
+    segment_callback=None,
+):
+    """
+    Transcribes audio as independent windows decoded through the shared batch
+    scheduler, so windows from concurrent jobs on the same model share a batch.
+    Windows are not conditioned on previous text. mel is the log-mel
+    spectrogram of the whole audio; each window is sliced from it.
+    model_lock is the model's lease lock (ModelPool.lock()); the caller must not
+    hold it, since the scheduler's thread takes it for each batch.
+    """
+    temperature = decode_options["temperature"]
+    options = DecodingOptions(
+        language=decode_options["language"],
+        temperature=temperature,
+        best_of=decode_options["best_of"] if temperature > 0 else None,
+        fp16=model.device.type == "cuda",
+    )
+    scheduler = get_scheduler(model_choice, options, max_batch_size, max_wait_seconds)
+
+    windows = find_split_points(audio, WINDOW_SECONDS, WINDOW_SEARCH_SECONDS)
+    dtype = torch.float16 if options.fp16 else torch.float32
+    futures = []
+    for start, end in windows:
+        window = mel[:, start // HOP_LENGTH : end // HOP_LENGTH]
+        window = pad_or_trim(window, N_FRAMES).to(model.device).to(dtype)
+        futures.append(scheduler.submit(model, model_lock, window))
+
+    tokenizer = get_tokenizer(
+        model.is_multilingual,
+        num_languages=model.num_languages,
+        language=options.language,
+        task=options.task,
+    )
+    segments = []
+    languages = Counter()
+    for index, ((start, end), future) in enumerate(zip(windows, futures)):
+        result = future.result()
+        if progress_callback:
+            progress_callback((index + 1) / len(windows))
+        # Skip windows Whisper considers silent, as transcribe() does
+        if result.no_speech_prob > 0.6 and result.avg_logprob < -1.0:
+            continue
+        languages[result.language] += end - start
+        window_segments = result_to_segments(
+            tokenizer, result, start / SAMPLE_RATE, (end - start) / SAMPLE_RATE
+        )
+        for segment in window_segments:
+            segment["id"] = len(segments)
+            segment["seek"] = start // HOP_LENGTH
+            segments.append(segment)
+        if segment_callback and window_segments:
+            segment_callback(window_segments)
+
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": (languages.most_common(1)[0][0] if languages else options.language),
+    }
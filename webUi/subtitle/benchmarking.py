@@ -0,0 +1,192 @@
+import os
+import re
+import time
+import wave
+import shutil
+import tempfile
+from contextlib import contextmanager, ExitStack
+from unittest import mock
+
+import numpy as np
+import torch
+import whisper
+from whisper.audio import SAMPLE_RATE
+
+from . import audio_cache, result_cache
+from .model_pool import ModelPool
+
+# Words the stub model draws its deterministic transcript from
+STUB_VOCABULARY = (
+    "the quick brown fox jumps over a lazy dog while seven wizards "
+    "quietly judge boxing matches in the old town hall"
+).split()
+
+# Length of each segment returned by the stub model
+STUB_SEGMENT_SECONDS = 2.5
+
+
+def write_synthetic_wav(path, seconds, seed=0):
+    """
+    Writes a 16 kHz mono 16-bit WAV file of speech-like audio: short tone bursts
+    at varying pitch separated by quiet gaps, with a little background noise.
+    """
+    rng = np.random.default_rng(seed)
+    n_samples = int(seconds * SAMPLE_RATE)
+    t = np.arange(n_samples) / SAMPLE_RATE
+    pitch = 120 + 80 * np.sin(2 * np.pi * 0.3 * t)
+    envelope = (np.sin(2 * np.pi * 1.7 * t) > -0.2).astype(np.float32)
+    audio = 0.3 * envelope * np.sin(2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE)
+    audio += 0.01 * rng.standard_normal(n_samples)
+    samples = (np.clip(audio, -1, 1) * 32767).astype("<i2")
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(samples.tobytes())
+
+
+def read_wav(path, sr=SAMPLE_RATE):
+    """
+    Reads a 16-bit PCM WAV file as float32 samples like whisper.load_audio().
+    Used instead of ffmpeg when it is not installed; the file must already be
+    mono at the requested sample rate.
+    """
+    with wave.open(path, "rb") as wav_file:
+        if (
+            wav_file.getnchannels() != 1
+            or wav_file.getsampwidth() != 2
+            or wav_file.getframerate() != sr
+        ):
+            raise ValueError(f"{path} is not a 16-bit mono WAV file at {sr} Hz.")
+        frames = wav_file.readframes(wav_file.getnframes())
+    return np.frombuffer(frames, "<i2").astype(np.float32) / 32768.0
+
+
+class StubModel(torch.nn.Module):
+    """
+    Deterministic stand-in for a Whisper model. transcribe() returns one segment
+    every STUB_SEGMENT_SECONDS of audio without running inference, optionally
+    taking seconds_per_audio_second for every second of audio to mimic a model's speed:
+    asleep, or with busy=True spinning on the CPU like real inference.
+    """
+
+    def __init__(self, seconds_per_audio_second=0.0, busy=False):
+        super().__init__()
+        self.seconds_per_audio_second = seconds_per_audio_second
+        self.busy = busy
+
+    def transcribe(self, audio, **decode_options):
+        duration = len(audio) / SAMPLE_RATE
+        if self.seconds_per_audio_second and self.busy:
+            deadline = time.perf_counter() + duration * self.seconds_per_audio_second
+            while time.perf_counter() < deadline:
+                pass
+        elif self.seconds_per_audio_second:
+            time.sleep(duration * self.seconds_per_audio_second)
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(start + STUB_SEGMENT_SECONDS, duration)
+            index = len(segments)
+            words = [
+                STUB_VOCABULARY[(index * 7 + i) % len(STUB_VOCABULARY)]
+                for i in range(4 + index % 9)
+            ]
+            segments.append(
+                {"id": index, "start": start, "end": end, "text": " " + " ".join(words)}
+            )
+            start = end
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": decode_options.get("language") or "en",
+        }
+
+
+@contextmanager
+def isolated_pipeline(stub_model=None):
+    """
+    Runs the transcription pipeline in this process against an empty model pool,
+    temporary result and audio caches and no result store, so benchmarks neither
+    read nor pollute the real ones.
+    If stub_model is given it is returned instead of loading Whisper models and
+    batched and chunked decoding and memory-mapped weights are turned off.
+    Without ffmpeg on PATH, WAV files are read with read_wav().
+    """
+    from . import store, views
+
+    cache_root = tempfile.mkdtemp(prefix="subtitle-benchmark-")
+    result_dir = os.path.join(cache_root, "transcriptionCache")
+    audio_dir = os.path.join(cache_root, "audioCache")
+    output_dir = os.path.join(cache_root, "outputs")
+    os.makedirs(result_dir)
+    os.makedirs(audio_dir)
+    os.makedirs(output_dir)
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(views, "MODEL_POOL", ModelPool()))
+        stack.enter_context(mock.patch.object(views, "INFERENCE_SERVER", None))
+        stack.enter_context(mock.patch.object(store, "OUTPUT_DIR", output_dir))
+        stack.enter_context(mock.patch.object(store, "load_result", lambda key: None))
+        stack.enter_context(mock.patch.object(store, "save_result", lambda *a: None))
+        stack.enter_context(mock.patch.object(store, "save_job", lambda job: None))
+        stack.enter_context(mock.patch.object(result_cache, "CACHE_DIR", result_dir))
+        stack.enter_context(mock.patch.object(audio_cache, "CACHE_DIR", audio_dir))
+        if stub_model is not None:
+            stack.enter_context(
+                mock.patch.object(whisper, "load_model", lambda *a, **k: stub_model)
+            )
+            # Batched and chunked decoding run real Whisper code the stub cannot serve,
+            # and the stub has no weights to convert for memory-mapping
+            stack.enter_context(mock.patch.object(views, "BATCHED_DECODING", False))
+            stack.enter_context(mock.patch.object(views, "CHUNK_WORKERS", 0))
+            stack.enter_context(mock.patch.object(views, "MMAP_WEIGHTS", False))
+        if shutil.which("ffmpeg") is None:
+            stack.enter_context(mock.patch.object(whisper, "load_audio", read_wav))
+        try:
+            yield cache_root
+        finally:
+            shutil.rmtree(cache_root, ignore_errors=True)
+
+
+def summarize(samples):
+    """Returns min/mean/p50/p90/p95/p99/max of a list of durations in seconds."""
+    values = np.asarray(samples, dtype=np.float64)
+    return {
+        "n": len(values),
+        "min": float(values.min()),
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+    }
+
+
+def normalize_words(text):
+    """Lower-cases text and splits it into words without punctuation."""
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """
+    Returns the word error rate of hypothesis against reference: the word-level
+    edit distance divided by the number of reference words.
+    """
+    reference_words = normalize_words(reference)
+    hypothesis_words = normalize_words(hypothesis)
+    if not reference_words:
+        return float(bool(hypothesis_words))
+    previous = list(range(len(hypothesis_words) + 1))
+    for i, reference_word in enumerate(reference_words, 1):
+        current = [i]
+        for j, hypothesis_word in enumerate(hypothesis_words, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (reference_word != hypothesis_word),
+                )
+            )
+        previous = current
+    return previous[-1] / len(reference_words)
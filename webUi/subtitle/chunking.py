@@ -0,0 +1,188 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import torch
+from whisper.audio import SAMPLE_RATE, FRAMES_PER_SECOND
+
+from .precision import load_model
+
+logger = logging.getLogger(__name__)
+
+# Length of the frames used to measure loudness when looking for split points
+ENERGY_FRAME_SECONDS = 0.02
+
+
+def frame_energy(audio, frame_seconds=ENERGY_FRAME_SECONDS):
+    """Returns the RMS energy of consecutive, non-overlapping frames of audio."""
+    frame_length = max(1, int(frame_seconds * SAMPLE_RATE))
+    n_frames = len(audio) // frame_length
+    frames = audio[: n_frames * frame_length].reshape(n_frames, frame_length)
+    return np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+
+
+def find_split_points(audio, chunk_seconds, search_seconds=5.0):
+    """
+    Splits audio into chunks of roughly chunk_seconds.
+    Each boundary is moved to the quietest frame within search_seconds of the
+    target position, so chunks are cut in pauses rather than mid-word.
+    Returns a list of (start_sample, end_sample) tuples covering the audio.
+    """
+    chunk_length = int(chunk_seconds * SAMPLE_RATE)
+    if len(audio) <= chunk_length:
+        return [(0, len(audio))]
+
+    frame_length = max(1, int(ENERGY_FRAME_SECONDS * SAMPLE_RATE))
+    energy = frame_energy(audio)
+    search_frames = int(search_seconds / ENERGY_FRAME_SECONDS)
+
+    boundaries = [0]
+    while len(audio) - boundaries[-1] > chunk_length:
+        target = (boundaries[-1] + chunk_length) // frame_length
+        low = max(boundaries[-1] // frame_length + 1, target - search_frames)
+        high = min(len(energy), target + search_frames + 1)
+        quietest = low + int(np.argmin(energy[low:high])) if high > low else target
+        boundaries.append(quietest * frame_length + frame_length // 2)
+    boundaries.append(len(audio))
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def merge_results(results, offsets):
+    """
+    Stitches per-chunk transcription results into a single result.
+    offsets are the chunk start times in seconds within the original audio.
+    """
+    segments = []
+    for result, offset in zip(results, offsets):
+        for segment in result["segments"]:
+            segment = dict(segment)
+            segment["id"] = len(segments)
+            segment["seek"] = segment.get("seek", 0) + round(offset * FRAMES_PER_SECOND)
+            segment["start"] = segment["start"] + offset
+            segment["end"] = segment["end"] + offset
+            if "words" in segment:
+                segment["words"] = [
+                    dict(word, start=word["start"] + offset, end=word["end"] + offset)
+                    for word in segment["words"]
+                ]
+            segments.append(segment)
+
+    languages = [result["language"] for result in results if result.get("language")]
+    return {
+        "text": "".join(result["text"] for result in results),
+        "segments": segments,
+        "language": max(set(languages), key=languages.count) if languages else None,
+    }
+
+
+# Model loaded in a chunk worker process, as ((model_choice, precision), model)
+_worker_model = (None, None)
+
+
+def _init_worker(num_threads):
+    torch.set_num_threads(num_threads)
+
+
+def _transcribe_chunk(
+    model_choice, precision, model_dir, converted_dir, mmap, audio, decode_options
+):
+    global _worker_model
+    if isinstance(audio, tuple):
+        # (path, start, end) of a cached .npy waveform; map it instead of copying
+        path, start, end = audio
+        audio = np.load(path, mmap_mode="c")[start:end]
+    if _worker_model[0] != (model_choice, precision):
+        # Each worker keeps a single model resident to bound memory use
+        _worker_model = (None, None)
+        model = load_model(model_choice, precision, model_dir, converted_dir, mmap)
+        _worker_model = ((model_choice, precision), model)
+    return _worker_model[1].transcribe(audio, **decode_options)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    """Returns the shared process pool used for chunk transcription."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            num_threads = max(1, (os.cpu_count() or 1) // workers)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(num_threads,),
+            )
+            logger.info(
+                f"Started {workers} chunk workers with {num_threads} threads each."
+            )
+        return _pool
+
+
+def transcribe_chunked(
+    audio,
+    model_choice,
+    model_dir,
+    decode_options,
+    chunk_seconds,
+    workers,
+    progress_callback=None,
+    segment_callback=None,
+    precision="fp32",
+    converted_dir=None,
+    mmap=False,
+):
+    """
+    Transcribes long audio by splitting it at quiet points and decoding the
+    chunks in parallel on a pool of CPU worker processes.
+    precision and mmap select the weights the workers load (see precision.load_model);
+    with mmap, the workers share one copy of the weights.
+    """
+    chunks = find_split_points(audio, chunk_seconds)
+    logger.info(f"Transcribing {len(chunks)} chunks on {workers} worker processes.")
+    pool = _get_pool(workers)
+
+    futures = {}
+    for index, (start, end) in enumerate(chunks):
+        if isinstance(audio, np.memmap):
+            chunk = (audio.filename, start, end)
+        else:
+            chunk = audio[start:end]
+        future = pool.submit(
+            _transcribe_chunk,
+            model_choice,
+            precision,
+            model_dir,
+            converted_dir,
+            mmap,
+            chunk,
+            decode_options,
+        )
+        futures[future] = index
+    results = [None] * len(chunks)
+    offsets = [start / SAMPLE_RATE for start, _ in chunks]
+    done_samples = 0
+    emitted_chunks = 0
+    emitted_segments = 0
+    for future in as_completed(futures):
+        index = futures[future]
+        results[index] = future.result()
+        start, end = chunks[index]
+        done_samples += end - start
+        if progress_callback:
+            progress_callback(done_samples / len(audio))
+        if segment_callback:
+            # Report segments in order, once every earlier chunk has finished
+            while emitted_chunks < len(chunks) and results[emitted_chunks] is not None:
+                emitted_chunks += 1
+            merged = merge_results(results[:emitted_chunks], offsets[:emitted_chunks])
+            if len(merged["segments"]) > emitted_segments:
+                segment_callback(merged["segments"][emitted_segments:])
+                emitted_segments = len(merged["segments"])
+
+    return merge_results(results, offsets)
@@ -11,11 +11,20 @@ class AudioUploadForm(forms.Form):
         ("medium", "Medium"),
         ("large", "Large"),
         ("turbo", "Turbo"),
+        ("auto", "Auto (Most Accurate Within Deadline)"),
     ]
     model_choice = forms.ChoiceField(
         choices=MODEL_CHOICES, initial="turbo", label="Whisper Model"
     )
 
+    deadline_minutes = forms.IntegerField(
+        min_value=1,
+        required=False,
+        label="Deadline (minutes)",
+        help_text="With the Auto model, the most accurate model expected to finish "
+        "within this many minutes is used. Leave empty for the server default.",
+    )
+
     LANGUAGE_CHOICES = [
         ("", "Auto-Detect (Multiple)"),
         ("af", "Afrikaans"),
@@ -130,6 +139,30 @@ class AudioUploadForm(forms.Form):
         help_text="Select the language or choose Auto-Detect",
     )
 
+    LANGUAGE_DETECTION_CHOICES = [
+        ("", "Server Default"),
+        ("model", "Selected Model"),
+        ("tiny", "Tiny (Fast)"),
+        ("base", "Base (Fast)"),
+    ]
+    language_detection = forms.ChoiceField(
+        choices=LANGUAGE_DETECTION_CHOICES,
+        required=False,
+        initial="",
+        label="Language Detection",
+        help_text="Model that detects the language from the first 30 seconds when "
+        "Auto-Detect is selected.",
+    )
+
+    VAD_CHOICES = [("", "Server Default"), ("true", "Yes"), ("false", "No")]
+    vad = forms.ChoiceField(
+        choices=VAD_CHOICES,
+        required=False,
+        initial="",
+        label="Skip Silence",
+        help_text="Detect speech first and only transcribe the speech regions.",
+    )
+
     temperature = forms.FloatField(
         min_value=0.0, max_value=1.0, initial=0.0, required=True, label="Temperature"
     )
@@ -148,11 +181,26 @@ class AudioUploadForm(forms.Form):
         ("txt", "TXT (Plain Text)"),
         ("vtt", "VTT (WebVTT)"),
         ("json", "JSON (Full Output)"),
+        ("zip", "ZIP (All Formats)"),
     ]
     output_format = forms.ChoiceField(
         choices=OUTPUT_CHOICES, initial="srt", label="Output Format"
     )
 
+    PRECISION_CHOICES = [
+        ("", "Server Default"),
+        ("fp32", "FP32 (Full Precision)"),
+        ("bf16", "BF16 (Half Memory)"),
+        ("int8", "INT8 (Quantized Linear Layers)"),
+    ]
+    precision = forms.ChoiceField(
+        choices=PRECISION_CHOICES,
+        required=False,
+        initial="",
+        label="CPU Precision",
+        help_text="Weight precision used when transcribing on CPU. Ignored on GPU.",
+    )
+
     max_subtitle_length = forms.IntegerField(
         min_value=1,
         initial=3,
@@ -172,3 +220,9 @@ class AudioUploadForm(forms.Form):
         label="Max Length Mode",
         help_text="Choose whether to apply max length per line or display the full subtitle segment.",
     )
+
+
+class TranscriptionOptionsForm(AudioUploadForm):
+    """The options of AudioUploadForm without the file, for chunked uploads."""
+
+    audio_file = None
@@ -0,0 +1,170 @@
+import os
+import logging
+import threading
+from multiprocessing.connection import Client, Listener
+from multiprocessing import AuthenticationError
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Shared secret of the web workers and the inference server. There is no default:
+# anyone who knows it can make the server unpickle their messages.
+AUTHKEY = getattr(settings, "SUBTITLE_INFERENCE_AUTHKEY", None)
+
+
+class InferenceServerError(RuntimeError):
+    """Raised when the inference server cannot be reached or a request fails on it."""
+
+
+def get_authkey():
+    """Returns SUBTITLE_INFERENCE_AUTHKEY as bytes, or raises InferenceServerError if unset."""
+    if not AUTHKEY:
+        raise InferenceServerError(
+            "Set SUBTITLE_INFERENCE_AUTHKEY to a random secret shared by the web "
+            "workers and the inference server."
+        )
+    return AUTHKEY.encode("utf-8")
+
+
+def parse_address(address):
+    """
+    Returns the multiprocessing.connection address for a setting value:
+    "host:port" for TCP, otherwise a Unix socket path or a Windows named pipe.
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and not address.startswith("\\\\"):
+        return (host or "127.0.0.1", int(port))
+    return address
+
+
+def _connect(address):
+    try:
+        return Client(parse_address(address), authkey=get_authkey())
+    except (OSError, EOFError, AuthenticationError) as e:
+        raise InferenceServerError(
+            f"Cannot reach the inference server at {address}: {e}"
+        )
+
+
+def _request(address, message, on_message=None):
+    """Sends one request and returns the final reply; other replies go to on_message."""
+    with _connect(address) as conn:
+        conn.send(message)
+        while True:
+            try:
+                reply = conn.recv()
+            except EOFError:
+                raise InferenceServerError(
+                    "The inference server closed the connection."
+                )
+            if reply[0] == "error":
+                raise InferenceServerError(reply[1])
+            if reply[0] == "done":
+                return reply[1]
+            if on_message:
+                on_message(reply)
+
+
+def transcribe(
+    address,
+    file_path,
+    options,
+    progress_callback=None,
+    segment_callback=None,
+    stats=None,
+):
+    """Runs views.transcribe_file() on the inference server and returns the result."""
+
+    def on_message(reply):
+        if reply[0] == "progress" and progress_callback:
+            progress_callback(reply[1])
+        elif reply[0] == "segments" and segment_callback:
+            segment_callback(reply[1])
+
+    # The server resolves relative paths against its own working directory
+    result, server_stats = _request(
+        address,
+        ("transcribe", os.path.abspath(file_path), options),
+        on_message,
+    )
+    if stats is not None:
+        stats.update(server_stats)
+    return result
+
+
+def ping(address):
+    """Returns the server's model pool statistics, or raises InferenceServerError."""
+    return _request(address, ("ping",))
+
+
+def discard_models(address, file_name):
+    """Unloads the models stored in a checkpoint file, e.g. after it was updated."""
+    return _request(address, ("discard", file_name))
+
+
+def _handle(conn, transcription_slots):
+    from . import views
+
+    def send(*reply):
+        try:
+            conn.send(reply)
+        except OSError:
+            # The web worker went away; a transcription still finishes and is stored
+            pass
+
+    try:
+        message = conn.recv()
+        if message[0] == "ping":
+            send("done", views.MODEL_POOL.stats())
+        elif message[0] == "discard":
+            views._discard_models_for_file(message[1])
+            send("done", None)
+        elif message[0] == "transcribe":
+            _, file_path, options = message
+            stats = {}
+            with transcription_slots:
+                result = views.transcribe_file(
+                    file_path,
+                    options,
+                    lambda fraction: send("progress", fraction),
+                    lambda segments: send("segments", segments),
+                    stats,
+                )
+            send("done", (result, stats))
+        else:
+            send("error", f"Unknown request '{message[0]}'.")
+    except EOFError:
+        logger.warning("Inference client disconnected before sending a request.")
+    except Exception as e:
+        logger.exception("Inference request failed.")
+        send("error", str(e))
+    finally:
+        conn.close()
+
+
+def serve(address, jobs=1):
+    """
+    Accepts requests from web workers until interrupted. Each connection is
+    handled on its own thread and at most jobs transcriptions run at once;
+    transcriptions with the same model take turns on its lease (see ModelPool).
+    """
+    authkey = get_authkey()
+    transcription_slots = threading.BoundedSemaphore(jobs)
+    listen_address = parse_address(address)
+    if isinstance(listen_address, str) and os.path.exists(listen_address):
+        # A stale socket file from a previous run
+        os.remove(listen_address)
+    with Listener(listen_address, authkey=authkey) as listener:
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, OSError, EOFError) as e:
+                logger.warning(f"Rejected inference connection: {e}")
+                continue
+            threading.Thread(
+                target=_handle,
+                args=(conn, transcription_slots),
+                name="inference",
+                daemon=True,
+            ).start()
@@ -0,0 +1,275 @@
+import os
+import time
+import uuid
+import socket
+import logging
+import threading
+from functools import partial
+from collections import OrderedDict
+
+from django.conf import settings
+
+from . import admission, metrics, model_selection, scheduling, store
+from .precision import model_key
+
+logger = logging.getLogger(__name__)
+
+# Number of transcriptions that may run at the same time
+JOB_WORKERS = getattr(settings, "SUBTITLE_JOB_WORKERS", 1)
+# Number of finished jobs kept in memory; older ones are read back from the database
+JOB_HISTORY = getattr(settings, "SUBTITLE_JOB_HISTORY", 100)
+
+# Queued jobs run in the order of SUBTITLE_SCHEDULING_POLICY, not necessarily as submitted
+_scheduler = scheduling.Scheduler(JOB_WORKERS, thread_name_prefix="transcription")
+_jobs = OrderedDict()
+_lock = threading.Lock()
+
+
+class Job:
+    """A transcription request that runs on the background worker pool."""
+
+    def __init__(self, file_path, safe_base_name, options):
+        self.id = uuid.uuid4().hex
+        self.file_path = file_path
+        self.safe_base_name = safe_base_name
+        self.options = options
+        self.status = "queued"
+        self.progress = 0.0
+        self.segments = []
+        self.output_file_path = None
+        self.error = None
+        self.audio_hash = None
+        self.result_key = None
+        self.audio_seconds = None
+        self.inference_seconds = None
+        self.skipped_seconds = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # When the transcription is expected to be done, estimated on admission
+        self.expected_finish_at = None
+        self.future = None
+        self.ticket = None
+        self.worker = current_worker()
+
+    @classmethod
+    def from_record(cls, record):
+        """Rebuilds a Job from its TranscriptionJob record, e.g. after a restart."""
+        job = cls(None, record.safe_base_name, record.options)
+        job.id = record.id
+        job.status = record.status
+        job.progress = 1.0 if record.status == "finished" else 0.0
+        job.output_file_path = record.output_file or None
+        job.error = record.error or None
+        job.audio_hash = record.audio_hash or None
+        job.result_key = record.result.cache_key if record.result else None
+        job.audio_seconds = record.audio_seconds
+        job.inference_seconds = record.inference_seconds
+        job.created_at = record.created_at.timestamp()
+        job.started_at = record.started_at and record.started_at.timestamp()
+        job.finished_at = record.finished_at and record.finished_at.timestamp()
+        job.worker = record.worker
+        return job
+
+    @property
+    def done(self):
+        return self.status in ("finished", "failed")
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "segments": len(self.segments),
+            "position_seconds": self.segments[-1]["end"] if self.segments else 0.0,
+            "error": self.error,
+            "audio_hash": self.audio_hash,
+            "audio_seconds": self.audio_seconds,
+            "inference_seconds": self.inference_seconds,
+            "skipped_seconds": self.skipped_seconds,
+            "model_choice": self.options["model_choice"],
+            "output_format": self.options["output_format"],
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "expected_finish_at": self.expected_finish_at,
+        }
+
+
+def current_worker():
+    """Identifies this process among those sharing the database, as "host:pid"."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _worker_exited(worker):
+    """
+    Returns whether the process that ran a job is known to have exited. Only
+    processes on this host can be checked; for others the answer is False.
+    """
+    host, _, pid = worker.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit() or int(pid) <= 0:
+        return False
+    if os.name == "nt":
+        # os.kill() would terminate the process instead of probing it
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        # Alive, but owned by another user
+        pass
+    return False
+
+
+def admit(file_path, options):
+    """
+    Reserves room for a saved upload in the queue of its model and device and
+    returns the admission ticket. Raises admission.Overloaded when it is full.
+    An "auto" model choice in options is replaced by the model chosen for the
+    request's deadline (see model_selection.choose_model()).
+    """
+    from .views import get_device, get_precision
+
+    audio_seconds = admission.probe_duration(file_path)
+    precision = get_precision(options)
+    device = get_device()
+    model_selection.load_profiles()
+    if options["model_choice"] == "auto":
+        options["model_choice"], _ = model_selection.choose_model(
+            audio_seconds, model_selection.deadline_seconds(options), precision, device
+        )
+    key = (model_key(options["model_choice"], precision), device)
+    expected_seconds = model_selection.expected_seconds(key, audio_seconds)
+    ticket = admission.admit(key, audio_seconds)
+    ticket.expected_seconds = expected_seconds
+    return ticket
+
+
+def submit_job(file_path, safe_base_name, options, ticket=None, owner=None):
+    """
+    Queues a saved upload for transcription and returns the new Job.
+    Raises admission.Overloaded, leaving the file in place, if its queue is full
+    and no ticket from admit() is given. owner identifies the user for fair
+    scheduling (SUBTITLE_SCHEDULING_FAIR).
+    """
+    ticket = ticket or admit(file_path, options)
+    job = _create_job(file_path, safe_base_name, options, ticket)
+    with _lock:
+        _jobs[job.id] = job
+    # Expected seconds of work, from the duration probed on admission
+    cost = ticket.audio_seconds * admission.real_time_factor(ticket.key)
+    job.future = _scheduler.submit(partial(_run_job, job), cost, owner)
+    logger.info(
+        f"Queued transcription job {job.id} ('{options['model_choice']}', "
+        f"{ticket.audio_seconds:.0f}s of audio, about {cost:.0f}s of work)."
+    )
+    _prune_history()
+    return job
+
+
+def run_job(file_path, safe_base_name, options, ticket=None):
+    """
+    Transcribes a saved upload in the calling thread and returns the finished Job.
+    Raises admission.Overloaded like submit_job().
+    """
+    ticket = ticket or admit(file_path, options)
+    job = _create_job(file_path, safe_base_name, options, ticket)
+    with _lock:
+        _jobs[job.id] = job
+    _run_job(job)
+    _prune_history()
+    return job
+
+
+def _create_job(file_path, safe_base_name, options, ticket):
+    job = Job(file_path, safe_base_name, options)
+    job.ticket = ticket
+    if ticket.expected_seconds is not None:
+        job.expected_finish_at = job.created_at + ticket.expected_seconds
+    store.save_job(job)
+    return job
+
+
+def is_local(job_id):
+    """Returns whether the job is held in the memory of this process."""
+    with _lock:
+        return job_id in _jobs
+
+
+def get_job(job_id):
+    """
+    Returns the Job with the given ID, or None if it is unknown or expired.
+    Jobs not held in memory are read back from the database: jobs of other web
+    workers, or finished jobs pruned from the history. Queued and running jobs
+    whose process has exited are marked as failed.
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is not None:
+        return job
+    record = store.load_job(job_id)
+    if record is None:
+        return None
+    job = Job.from_record(record)
+    if not job.done and _worker_exited(job.worker):
+        # Queued and running jobs only live in the process that took them
+        job.status = "failed"
+        job.error = "Interrupted by a server restart."
+        job.finished_at = time.time()
+        store.save_job(job)
+    return job
+
+
+def _run_job(job):
+    from .views import transcribe_file, write_output
+
+    job.status = "running"
+    job.started_at = time.time()
+    metrics.STAGE_SECONDS.observe(job.started_at - job.created_at, stage="queue_wait")
+    store.save_job(job)
+
+    def set_progress(fraction):
+        job.progress = fraction
+        job.ticket.progress = fraction
+
+    try:
+        stats = {}
+        result = transcribe_file(
+            job.file_path, job.options, set_progress, job.segments.extend, stats
+        )
+        job.audio_hash = stats["audio_hash"]
+        job.result_key = stats["cache_key"]
+        job.audio_seconds = stats["audio_seconds"]
+        job.inference_seconds = stats["inference_seconds"]
+        job.skipped_seconds = stats["skipped_seconds"]
+        admission.observe(job.ticket.key, job.audio_seconds, job.inference_seconds)
+        output_file_path = os.path.join(
+            store.OUTPUT_DIR,
+            f"{job.id}_{job.safe_base_name}.{job.options['output_format']}",
+        )
+        write_output(result, output_file_path, job.options, job.safe_base_name)
+        job.output_file_path = output_file_path
+        job.progress = 1.0
+        job.finished_at = time.time()
+        job.status = "finished"
+        logger.info(f"Transcription job {job.id} finished.")
+    except Exception as e:
+        job.error = str(e)
+        job.finished_at = time.time()
+        job.status = "failed"
+        logger.exception(f"Transcription job {job.id} failed.")
+    finally:
+        admission.release(job.ticket)
+        if os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        store.save_job(job)
+
+
+def _prune_history():
+    """Forgets the oldest finished jobs; their records and outputs stay in the store."""
+    with _lock:
+        finished = [job for job in _jobs.values() if job.done]
+        expired = finished[: max(0, len(finished) - JOB_HISTORY)]
+        for job in expired:
+            del _jobs[job.id]
@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import platform
+import subprocess
+
+import django
+import torch
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment
+
+from subtitle import metrics
+from subtitle.benchmarking import (
+    StubModel,
+    isolated_pipeline,
+    summarize,
+    write_synthetic_wav,
+)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def stage_totals():
+    return {key[0]: value for key, value in metrics.STAGE_SECONDS.totals().items()}
+
+
+def stage_means(before, after):
+    """Returns the mean seconds per call of each pipeline stage between two snapshots."""
+    means = {}
+    for stage, (total, count) in after.items():
+        previous_total, previous_count = before.get(stage, (0.0, 0))
+        if count > previous_count:
+            means[stage] = (total - previous_total) / (count - previous_count)
+    return means
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the transcribe_audio and model_management views end to end "
+        "through the Django test client with synthetic audio. A deterministic "
+        "stub replaces the Whisper model unless --real is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lengths",
+            default="10,60,600",
+            help="Comma-separated audio lengths in seconds.",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--formats", default="srt,zip", help="Comma-separated output formats."
+        )
+        parser.add_argument(
+            "--real",
+            action="store_true",
+            help="Run the real 'tiny' model (must already be downloaded).",
+        )
+        parser.add_argument(
+            "--stub-latency",
+            type=float,
+            default=0.0,
+            help="Seconds the stub model sleeps per second of audio.",
+        )
+        parser.add_argument(
+            "--output",
+            help="JSON results file (default: benchmark-<timestamp>.json).",
+        )
+        parser.add_argument(
+            "--compare", help="Previous JSON results to compare the run against."
+        )
+
+    def handle(self, *args, **options):
+        lengths = [float(length) for length in options["lengths"].split(",")]
+        formats = options["formats"].split(",")
+        stub_model = None if options["real"] else StubModel(options["stub_latency"])
+        if options["real"]:
+            from subtitle.views import model_file_path
+
+            if not os.path.exists(model_file_path("tiny")):
+                raise CommandError(
+                    "The 'tiny' model is not downloaded; download it on the models "
+                    "page or run without --real."
+                )
+
+        setup_test_environment()
+        self.uploads = 0
+        cases = []
+        # Signed-cookie sessions keep the benchmark from writing to the database
+        with override_settings(
+            SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies"
+        ), isolated_pipeline(stub_model) as work_dir:
+            # CSRF checks on, as in production: the middleware then parses the
+            # upload before the view runs, which the test client otherwise skips
+            client = Client(enforce_csrf_checks=True)
+            cases.append(self.run_model_management(client, options["repeat"]))
+            for seconds in lengths:
+                audio_path = os.path.join(work_dir, f"{seconds:g}s.wav")
+                write_synthetic_wav(audio_path, seconds)
+                with open(audio_path, "rb") as f:
+                    audio_bytes = f.read()
+                for fmt in formats:
+                    cases.extend(
+                        self.run_transcribe(
+                            client, audio_bytes, seconds, fmt, options["repeat"]
+                        )
+                    )
+
+        results = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": git_revision(),
+            "mode": "real" if options["real"] else "stub",
+            "stub_latency": options["stub_latency"],
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "torch": torch.__version__,
+                "device": "cuda" if torch.cuda.is_available() else "cpu",
+                "cpu_count": os.cpu_count(),
+                "platform": platform.platform(),
+            },
+            "cases": cases,
+        }
+        output = options["output"] or f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+        if options["compare"]:
+            self.compare(options["compare"], cases)
+
+    def run_model_management(self, client, repeat):
+        durations = []
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            response = client.get("/models/")
+            durations.append(time.perf_counter() - start_time)
+            if response.status_code != 200:
+                raise CommandError(f"/models/ returned {response.status_code}.")
+        case = {"name": "model_management", "seconds": summarize(durations)}
+        self.report(case)
+        return case
+
+    def csrf_token(self, client):
+        """Returns the CSRF token of the client's session, fetching the form once."""
+        if "csrftoken" not in client.cookies:
+            client.get("/")
+        return client.cookies["csrftoken"].value
+
+    def post_audio(self, client, audio_bytes, seconds, fmt):
+        """Posts audio to transcribe_audio and returns the request time in seconds."""
+        data = {
+            "model_choice": "tiny",
+            "language": "en",
+            "temperature": 0.0,
+            "best_of": 1,
+            "condition_on_previous_text": "false",
+            "output_format": fmt,
+            "max_subtitle_length": 7,
+            "max_length_mode": "line",
+            "csrfmiddlewaretoken": self.csrf_token(client),
+            "audio_file": SimpleUploadedFile(
+                f"benchmark {seconds:g}s.wav", audio_bytes, "audio/wav"
+            ),
+        }
+        start_time = time.perf_counter()
+        response = client.post("/", data)
+        elapsed = time.perf_counter() - start_time
+        if response.status_code != 200 or not response.has_header(
+            "Content-Disposition"
+        ):
+            raise CommandError(
+                f"transcribe_audio returned {response.status_code} "
+                f"for {seconds:g}s of audio."
+            )
+        return elapsed
+
+    def run_transcribe(self, client, audio_bytes, seconds, fmt, repeat):
+        """
+        Posts slightly different audio repeat times, so every request decodes
+        and transcribes ("cold"), then the same audio repeat times so the
+        result cache answers ("warm").
+        """
+        cases = []
+        # Untimed request that fills the caches for the warm runs
+        self.post_audio(client, audio_bytes, seconds, fmt)
+        for cache_state in ("cold", "warm"):
+            durations = []
+            before = stage_totals()
+            for _ in range(repeat):
+                upload_bytes = audio_bytes
+                if cache_state == "cold":
+                    # Overwriting the last two samples gives the upload a new hash,
+                    # so neither the audio cache nor the result cache can be used
+                    self.uploads += 1
+                    upload_bytes = audio_bytes[:-4] + self.uploads.to_bytes(4, "little")
+                durations.append(self.post_audio(client, upload_bytes, seconds, fmt))
+            case = {
+                "name": f"transcribe_{seconds:g}s_{fmt}_{cache_state}",
+                "audio_seconds": seconds,
+                "output_format": fmt,
+                "cache": cache_state,
+                "seconds": summarize(durations),
+                "stage_seconds": stage_means(before, stage_totals()),
+            }
+            self.report(case)
+            cases.append(case)
+        return cases
+
+    def report(self, case):
+        seconds = case["seconds"]
+        line = (
+            f"{case['name']:<32} p50 {seconds['p50'] * 1000:9.1f} ms  "
+            f"mean {seconds['mean'] * 1000:9.1f} ms  max {seconds['max'] * 1000:9.1f} ms"
+        )
+        if case.get("audio_seconds"):
+            line += f"  RTF {seconds['p50'] / case['audio_seconds']:.4f}"
+        self.stdout.write(line)
+
+    def compare(self, path, cases):
+        with open(path, "r", encoding="utf-8") as f:
+            previous = {case["name"]: case for case in json.load(f)["cases"]}
+        self.stdout.write(f"Compared with {path} (p50, previous / current):")
+        for case in cases:
+            if case["name"] in previous:
+                ratio = (
+                    previous[case["name"]]["seconds"]["p50"] / case["seconds"]["p50"]
+                )
+                self.stdout.write(f"{case['name']:<32} {ratio:6.2f}x")
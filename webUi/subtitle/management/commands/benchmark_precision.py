@@ -0,0 +1,144 @@
+import os
+import gc
+import json
+import time
+import shutil
+
+import torch
+import whisper
+from django.core.management.base import BaseCommand, CommandError
+
+from subtitle.benchmarking import read_wav, word_error_rate
+from subtitle.model_pool import model_size
+from subtitle.precision import PRECISIONS, converted_path, load_model
+from subtitle.views import CONVERTED_MODEL_DIR, MODEL_DIR
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".webm")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares CPU inference in fp32, bf16 and int8 on a fixed set of audio "
+        "samples: load time, model memory, real-time factor and word error rate. "
+        "A sample's reference is the .txt file with the same name; samples "
+        "without one are scored against the fp32 transcript."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("samples", help="Directory of audio samples.")
+        parser.add_argument("--model", default="tiny", choices=whisper._MODELS)
+        parser.add_argument("--precisions", default=",".join(PRECISIONS))
+        parser.add_argument("--language", default=None)
+        parser.add_argument(
+            "--threads", type=int, help="torch CPU threads (default: torch's own)."
+        )
+        parser.add_argument(
+            "--mmap",
+            action="store_true",
+            help="Memory-map the fp32 and bf16 weights (see SUBTITLE_MMAP_WEIGHTS).",
+        )
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        precisions = options["precisions"].split(",")
+        unknown = set(precisions) - set(PRECISIONS)
+        if unknown:
+            raise CommandError(f"Unknown precisions: {', '.join(sorted(unknown))}")
+        if options["threads"]:
+            torch.set_num_threads(options["threads"])
+
+        samples = self.load_samples(options["samples"])
+        if not samples:
+            raise CommandError(f"No audio samples found in {options['samples']}.")
+        # fp32 first: its transcripts are the reference for samples without one
+        precisions = sorted(set(precisions) | {"fp32"}, key=PRECISIONS.index)
+
+        results = []
+        fp32_texts = {}
+        for precision in precisions:
+            converted = os.path.exists(
+                converted_path(options["model"], precision, CONVERTED_MODEL_DIR)
+            )
+            start_time = time.perf_counter()
+            model = load_model(
+                options["model"],
+                precision,
+                MODEL_DIR,
+                CONVERTED_MODEL_DIR,
+                options["mmap"],
+            )
+            load_seconds = time.perf_counter() - start_time
+
+            audio_seconds = 0.0
+            inference_seconds = 0.0
+            errors = []
+            for name, audio, reference in samples:
+                start_time = time.perf_counter()
+                text = model.transcribe(
+                    audio, language=options["language"], temperature=0.0, fp16=False
+                )["text"]
+                inference_seconds += time.perf_counter() - start_time
+                audio_seconds += len(audio) / whisper.audio.SAMPLE_RATE
+                if precision == "fp32":
+                    fp32_texts[name] = text
+                errors.append(
+                    word_error_rate(
+                        reference if reference is not None else fp32_texts[name], text
+                    )
+                )
+
+            result = {
+                "precision": precision,
+                "load_seconds": load_seconds,
+                "loaded_from_converted_file": converted
+                and (precision != "fp32" or options["mmap"]),
+                "model_bytes": model_size(model),
+                "audio_seconds": audio_seconds,
+                "inference_seconds": inference_seconds,
+                "rtf": inference_seconds / audio_seconds,
+                "wer": sum(errors) / len(errors),
+            }
+            results.append(result)
+            self.stdout.write(
+                f"{precision:<5} load {load_seconds:6.2f}s  "
+                f"{result['model_bytes'] / 1024**2:8.1f} MiB  "
+                f"RTF {result['rtf']:.4f}  WER {result['wer']:.3f}"
+            )
+            del model
+            gc.collect()
+
+        fp32 = results[0]
+        for result in results[1:]:
+            self.stdout.write(
+                f"{result['precision']}: {fp32['rtf'] / result['rtf']:.2f}x the speed "
+                f"of fp32, WER {result['wer'] - fp32['wer']:+.3f}"
+            )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "model": options["model"],
+                        "samples": [name for name, _, _ in samples],
+                        "threads": torch.get_num_threads(),
+                        "mmap": options["mmap"],
+                        "results": results,
+                    },
+                    f,
+                    indent=4,
+                )
+
+    def load_samples(self, directory):
+        """Returns (name, audio, reference text or None) for each sample file."""
+        load_audio = whisper.load_audio if shutil.which("ffmpeg") else read_wav
+        samples = []
+        for name in sorted(os.listdir(directory)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in AUDIO_EXTENSIONS:
+                continue
+            reference_path = os.path.join(directory, f"{stem}.txt")
+            reference = None
+            if os.path.exists(reference_path):
+                with open(reference_path, "r", encoding="utf-8") as f:
+                    reference = f.read()
+            samples.append((name, load_audio(os.path.join(directory, name)), reference))
+        return samples
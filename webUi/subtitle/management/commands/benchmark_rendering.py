@@ -0,0 +1,118 @@
+import io
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from subtitle import rendering
+from subtitle.views import format_subtitle_text, format_time
+
+
+def legacy_write_subtitles(
+    file_handle, segments, max_subtitle_length, max_length_mode, fmt
+):
+    """The per-segment writer used before the rendering engine, kept as the baseline."""
+    for i, segment in enumerate(segments):
+        formatted_text = format_subtitle_text(
+            segment["text"], max_subtitle_length, max_length_mode
+        )
+        file_handle.write(f"{i + 1}\n")
+        file_handle.write(
+            f"{format_time(segment['start'], fmt)} --> {format_time(segment['end'], fmt)}\n"
+        )
+        file_handle.write(formatted_text + "\n\n")
+
+
+def synthetic_result(n_segments, seed=0):
+    """Builds a Whisper-like result with n_segments segments of 3 to 20 words."""
+    rng = random.Random(seed)
+    vocabulary = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing"]
+    segments = []
+    start = 0.0
+    for i in range(n_segments):
+        end = start + rng.uniform(0.5, 6.0)
+        words = rng.choices(vocabulary, k=rng.randint(3, 20))
+        segments.append(
+            {"id": i, "start": start, "end": end, "text": " " + " ".join(words)}
+        )
+        start = end + rng.uniform(0.0, 1.0)
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": "en",
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark of subtitle rendering: the per-segment format_time/"
+        "write_subtitles path against the vectorized rendering engine."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--segments", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--max-subtitle-length", type=int, default=3)
+        parser.add_argument(
+            "--max-length-mode", choices=["line", "full"], default="line"
+        )
+        parser.add_argument("--json", help="Write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        result = synthetic_result(options["segments"])
+        max_words = options["max_subtitle_length"]
+        mode = options["max_length_mode"]
+
+        def legacy(fmt):
+            buffer = io.StringIO()
+            legacy_write_subtitles(buffer, result["segments"], max_words, mode, fmt)
+            return buffer.getvalue()
+
+        def engine(fmt):
+            return rendering.render_cues(result["segments"], max_words, mode, fmt)
+
+        def legacy_all_formats():
+            for fmt in ("srt", "vtt"):
+                legacy(fmt)
+            json.dumps(result, indent=4)
+
+        def engine_all_formats():
+            # render() is what render_bundle() zips; the archive step is left out
+            # because the legacy path has no equivalent
+            rendering.render(result, ("srt", "vtt", "json"), max_words, mode)
+
+        # Both paths must produce identical cues before their speed is compared
+        for fmt in ("srt", "vtt"):
+            if legacy(fmt) != engine(fmt):
+                self.stderr.write(
+                    self.style.WARNING(f"Rendered {fmt} output differs from baseline.")
+                )
+
+        cases = {
+            "legacy_srt": lambda: legacy("srt"),
+            "engine_srt": lambda: engine("srt"),
+            "legacy_vtt": lambda: legacy("vtt"),
+            "engine_vtt": lambda: engine("vtt"),
+            "legacy_srt_vtt_json": legacy_all_formats,
+            "engine_srt_vtt_json": engine_all_formats,
+        }
+        timings = {}
+        for name, case in cases.items():
+            best = float("inf")
+            for _ in range(options["repeat"]):
+                start_time = time.perf_counter()
+                case()
+                best = min(best, time.perf_counter() - start_time)
+            timings[name] = best
+            self.stdout.write(f"{name:<22} {best * 1000:10.1f} ms")
+
+        for fmt in ("srt", "vtt", "srt_vtt_json"):
+            speedup = timings[f"legacy_{fmt}"] / timings[f"engine_{fmt}"]
+            self.stdout.write(f"{fmt} speedup: {speedup:.2f}x")
+
+        if options["json"]:
+            with open(options["json"], "w", encoding="utf-8") as f:
+                json.dump(
+                    {"segments": options["segments"], "seconds": timings}, f, indent=4
+                )
@@ -0,0 +1,336 @@
+import os
+import json
+import argparse
+import time
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import torch
+from django.core.management.base import BaseCommand, CommandError
+
+from subtitle.forms import AudioUploadForm
+
+# File extensions picked up when a directory is given
+AUDIO_EXTENSIONS = (
+    ".mp3",
+    ".wav",
+    ".m4a",
+    ".flac",
+    ".ogg",
+    ".opus",
+    ".aac",
+    ".wma",
+    ".mp4",
+    ".mkv",
+    ".mov",
+    ".webm",
+)
+
+MANIFEST_NAME = "bulk_transcribe_manifest.json"
+
+
+def _init_worker(num_threads):
+    import django
+
+    django.setup()
+    torch.set_num_threads(num_threads)
+
+    from subtitle import views
+
+    # Every bulk worker already has its own share of the cores
+    views.CHUNK_WORKERS = 0
+
+
+def transcribe_one(input_path, output_path, options):
+    """
+    Transcribes one file with the web UI's pipeline and writes its output.
+    Returns the audio duration, the processing time and the seconds of audio
+    skipped as non-speech.
+    """
+    from subtitle import admission
+    from subtitle.views import transcribe_file, write_output
+
+    start_time = time.perf_counter()
+    stats = {}
+    result = transcribe_file(input_path, options, stats=stats)
+    # Cached results are not decoded again, so their duration is probed instead
+    audio_seconds = stats.get("audio_seconds") or admission.probe_duration(input_path)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(output_path))[0]
+    write_output(result, output_path, options, base_name)
+    skipped_seconds = result.get("vad", {}).get("skipped_seconds", 0.0)
+    return audio_seconds, time.perf_counter() - start_time, skipped_seconds
+
+
+def options_digest(options):
+    """Identifies the options a manifest entry was produced with."""
+    return hashlib.sha256(
+        json.dumps(options, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"files": {}}
+    except json.JSONDecodeError as e:
+        raise CommandError(f"Manifest {path} is not valid JSON: {e}")
+
+
+def save_manifest(path, manifest):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(temp_path, path)
+
+
+class Command(BaseCommand):
+    help = (
+        "Transcribes a directory or a list of audio files with the web UI's models "
+        "and subtitle writers. Progress is kept in a manifest so an interrupted run "
+        "can be resumed."
+    )
+
+    def add_arguments(self, parser):
+        form = AudioUploadForm()
+        parser.add_argument("paths", nargs="+", help="Audio files or directories.")
+        parser.add_argument(
+            "--output-dir",
+            help="Directory for the outputs (default: next to each input).",
+        )
+        parser.add_argument(
+            "--recursive", action="store_true", help="Descend into subdirectories."
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes, each with its own model.",
+        )
+        parser.add_argument(
+            "--manifest",
+            help=f"Manifest file (default: {MANIFEST_NAME} in the output directory, "
+            "or the current directory).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Transcribe files again even if the manifest lists them as done.",
+        )
+        parser.add_argument(
+            "--model",
+            choices=[choice for choice, _ in form.fields["model_choice"].choices],
+            default=form.fields["model_choice"].initial,
+        )
+        parser.add_argument(
+            "--deadline-minutes",
+            type=int,
+            help="Minutes within which each file should be done with --model auto "
+            "(default: SUBTITLE_AUTO_DEADLINE_MINUTES).",
+        )
+        parser.add_argument("--language", default=None)
+        parser.add_argument(
+            "--language-detection",
+            choices=[
+                choice
+                for choice, _ in form.fields["language_detection"].choices
+                if choice
+            ],
+            help="Model that detects the language when --language is not given "
+            "(default: SUBTITLE_LANGUAGE_DETECTION_MODEL).",
+        )
+        parser.add_argument(
+            "--vad",
+            action=argparse.BooleanOptionalAction,
+            help="Skip non-speech audio before inference (default: SUBTITLE_VAD).",
+        )
+        parser.add_argument("--temperature", type=float, default=0.0)
+        parser.add_argument("--best-of", type=int, default=5)
+        parser.add_argument("--condition-on-previous-text", action="store_true")
+        parser.add_argument(
+            "--format",
+            choices=[choice for choice, _ in form.fields["output_format"].choices],
+            default=form.fields["output_format"].initial,
+        )
+        parser.add_argument(
+            "--precision",
+            choices=[
+                choice for choice, _ in form.fields["precision"].choices if choice
+            ],
+            help="CPU weight precision (default: SUBTITLE_CPU_PRECISION).",
+        )
+        parser.add_argument("--max-subtitle-length", type=int, default=3)
+        parser.add_argument(
+            "--max-length-mode", choices=["line", "full"], default="full"
+        )
+
+    def collect_inputs(self, paths, output_dir, recursive, output_format):
+        """Returns (input_path, output_path) pairs for all audio files under paths."""
+        pairs = []
+        for path in paths:
+            path = os.path.abspath(path)
+            if os.path.isfile(path):
+                root, files = os.path.dirname(path), [path]
+            elif os.path.isdir(path):
+                root, files = path, []
+                for dir_path, dir_names, file_names in os.walk(path):
+                    if not recursive:
+                        dir_names.clear()
+                    dir_names.sort()
+                    files.extend(
+                        os.path.join(dir_path, name)
+                        for name in sorted(file_names)
+                        if name.lower().endswith(AUDIO_EXTENSIONS)
+                    )
+            else:
+                raise CommandError(f"{path} does not exist.")
+
+            for input_path in files:
+                stem = os.path.splitext(input_path)[0]
+                if output_dir:
+                    # Keep the layout of directory inputs inside the output directory
+                    stem = os.path.join(output_dir, os.path.relpath(stem, root))
+                pairs.append((input_path, f"{stem}.{output_format}"))
+        return pairs
+
+    def handle(self, *args, **options):
+        transcription_options = {
+            "model_choice": options["model"],
+            "language": options["language"] or None,
+            "temperature": options["temperature"],
+            "best_of": options["best_of"],
+            "condition_on_previous_text": options["condition_on_previous_text"],
+            "output_format": options["format"],
+            "max_subtitle_length": options["max_subtitle_length"],
+            "max_length_mode": options["max_length_mode"],
+            "precision": options["precision"] or "",
+            "language_detection": options["language_detection"] or "",
+            "vad": {True: "true", False: "false"}.get(options["vad"], ""),
+            "deadline_minutes": options["deadline_minutes"],
+        }
+        digest = options_digest(transcription_options)
+        output_dir = options["output_dir"] and os.path.abspath(options["output_dir"])
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        manifest_path = options["manifest"] or os.path.join(
+            output_dir or os.getcwd(), MANIFEST_NAME
+        )
+        manifest = load_manifest(manifest_path)
+
+        pending = []
+        skipped = 0
+        for input_path, output_path in self.collect_inputs(
+            options["paths"], output_dir, options["recursive"], options["format"]
+        ):
+            entry = manifest["files"].get(input_path)
+            if (
+                not options["force"]
+                and entry
+                and entry["status"] == "finished"
+                and entry["options"] == digest
+                and entry["stamp"] == file_stamp(input_path)
+                and os.path.exists(entry["output"])
+            ):
+                skipped += 1
+                continue
+            pending.append((input_path, output_path))
+        self.stdout.write(
+            f"{len(pending)} files to transcribe, {skipped} already done "
+            f"(manifest: {manifest_path})."
+        )
+
+        workers = max(1, options["workers"])
+        start_time = time.perf_counter()
+        totals = {
+            "finished": 0,
+            "failed": 0,
+            "audio_seconds": 0.0,
+            "skipped_seconds": 0.0,
+        }
+
+        def record(index, input_path, output_path, outcome):
+            entry = {
+                "stamp": file_stamp(input_path),
+                "options": digest,
+                "output": output_path,
+            }
+            if isinstance(outcome, Exception):
+                entry.update(status="failed", error=str(outcome))
+                totals["failed"] += 1
+                self.stderr.write(
+                    f"[{index}/{len(pending)}] {input_path}: failed: {outcome}"
+                )
+            else:
+                audio_seconds, seconds, skipped_seconds = outcome
+                rtf = seconds / audio_seconds if audio_seconds else None
+                entry.update(
+                    status="finished",
+                    audio_seconds=audio_seconds,
+                    skipped_seconds=skipped_seconds,
+                    seconds=seconds,
+                    rtf=rtf,
+                    finished_at=time.time(),
+                )
+                totals["finished"] += 1
+                totals["audio_seconds"] += audio_seconds
+                totals["skipped_seconds"] += skipped_seconds
+                self.stdout.write(
+                    f"[{index}/{len(pending)}] {input_path}: {audio_seconds:.1f}s "
+                    f"of audio in {seconds:.1f}s (RTF {rtf or 0:.3f})"
+                )
+            manifest["files"][input_path] = entry
+            # Saved after every file so an interrupted run loses at most the files in flight
+            save_manifest(manifest_path, manifest)
+
+        if workers == 1:
+            for index, (input_path, output_path) in enumerate(pending, 1):
+                try:
+                    outcome = transcribe_one(
+                        input_path, output_path, transcription_options
+                    )
+                except Exception as e:
+                    outcome = e
+                record(index, input_path, output_path, outcome)
+        else:
+            num_threads = max(1, (os.cpu_count() or 1) // workers)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(num_threads,),
+            ) as pool:
+                futures = {
+                    pool.submit(
+                        transcribe_one, input_path, output_path, transcription_options
+                    ): (input_path, output_path)
+                    for input_path, output_path in pending
+                }
+                for index, future in enumerate(as_completed(futures), 1):
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        outcome = e
+                    record(index, *futures[future], outcome)
+
+        wall_seconds = time.perf_counter() - start_time
+        throughput = totals["audio_seconds"] / wall_seconds if wall_seconds else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Transcribed {totals['finished']} files ({totals['failed']} failed, "
+                f"{skipped} skipped): {totals['audio_seconds']:.1f}s of audio in "
+                f"{wall_seconds:.1f}s, {throughput:.2f}x real time."
+            )
+        )
+        if totals["skipped_seconds"]:
+            self.stdout.write(
+                f"Voice activity detection skipped {totals['skipped_seconds']:.1f}s "
+                f"of non-speech audio."
+            )
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from subtitle import store, uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes transcription jobs and results older than "
+        "SUBTITLE_RESULT_RETENTION_HOURS, together with their files, and chunked "
+        "uploads left unfinished for SUBTITLE_UPLOAD_EXPIRY_HOURS. "
+        "Run it periodically, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        jobs, results, files = store.cleanup(dry_run=options["dry_run"])
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {jobs} expired jobs, {results} results and {files} files."
+            )
+        )
+        if not options["dry_run"]:
+            removed = uploads.cleanup()
+            self.stdout.write(
+                self.style.SUCCESS(f"Deleted {removed} unfinished uploads.")
+            )
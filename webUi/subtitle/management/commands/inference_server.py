@@ -0,0 +1,97 @@
+import os
+
+import torch
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from subtitle import inference_server, views
+
+
+def parse_cpu_list(value):
+    """Parses a CPU list such as "0-3,8,10-11" into a set of CPU numbers."""
+    cpus = set()
+    for part in value.split(","):
+        start, _, end = part.strip().partition("-")
+        try:
+            cpus.update(range(int(start), int(end or start) + 1))
+        except ValueError:
+            raise CommandError(f"Invalid CPU list '{value}'.")
+    return cpus
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the inference server: a long-running process that owns the model pool "
+        "and the device. Web workers started with SUBTITLE_INFERENCE_SERVER set send "
+        "their transcriptions to it instead of loading models themselves."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--address",
+            default=views.INFERENCE_SERVER,
+            help='"host:port" or a Unix socket path (default: SUBTITLE_INFERENCE_SERVER).',
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=getattr(settings, "SUBTITLE_JOB_WORKERS", 1),
+            help="Transcriptions run at the same time (default: SUBTITLE_JOB_WORKERS).",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            help="torch intra-op threads (default: one per CPU the server may use).",
+        )
+        parser.add_argument(
+            "--interop-threads", type=int, help="torch inter-op threads."
+        )
+        parser.add_argument(
+            "--cpus",
+            help='Pin the server to these CPUs, e.g. "0-7" (Linux only). '
+            "Leave the other cores to the web workers.",
+        )
+        parser.add_argument(
+            "--preload",
+            nargs="*",
+            default=getattr(settings, "SUBTITLE_PRELOAD_MODELS", []),
+            help="Models to load and warm up before accepting requests "
+            "(default: SUBTITLE_PRELOAD_MODELS).",
+        )
+
+    def handle(self, *args, **options):
+        if not options["address"]:
+            raise CommandError("Set SUBTITLE_INFERENCE_SERVER or pass --address.")
+        try:
+            inference_server.get_authkey()
+        except inference_server.InferenceServerError as e:
+            raise CommandError(str(e))
+        # This process runs the transcriptions itself
+        views.INFERENCE_SERVER = None
+
+        if options["cpus"]:
+            if not hasattr(os, "sched_setaffinity"):
+                raise CommandError("--cpus is not supported on this platform.")
+            os.sched_setaffinity(0, parse_cpu_list(options["cpus"]))
+        if options["interop_threads"]:
+            torch.set_num_interop_threads(options["interop_threads"])
+        threads = options["threads"]
+        if not threads and hasattr(os, "sched_getaffinity"):
+            threads = len(os.sched_getaffinity(0))
+        if threads:
+            torch.set_num_threads(threads)
+        self.stdout.write(
+            f"Using {torch.get_num_threads()} torch threads on {views.get_device()}."
+        )
+
+        for model_name in options["preload"]:
+            self.stdout.write(f"Loading '{model_name}' model...")
+            views.warm_up_models([model_name])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Inference server listening on {options['address']}.")
+        )
+        try:
+            inference_server.serve(options["address"], max(1, options["jobs"]))
+        except KeyboardInterrupt:
+            pass
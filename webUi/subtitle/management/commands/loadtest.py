@@ -0,0 +1,487 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import threading
+import importlib
+import urllib.error
+import urllib.request
+from http.cookiejar import CookieJar
+from contextlib import ExitStack
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+
+from subtitle import admission, jobs, scheduling
+from subtitle.benchmarking import (
+    StubModel,
+    isolated_pipeline,
+    summarize,
+    write_synthetic_wav,
+)
+
+# Form fields posted with every upload
+FORM_FIELDS = {
+    "model_choice": "tiny",
+    "language": "en",
+    "temperature": "0.0",
+    "best_of": "1",
+    "condition_on_previous_text": "false",
+    "output_format": "srt",
+    "max_subtitle_length": "7",
+    "max_length_mode": "line",
+}
+# Seconds between job status polls with --jobs-api
+POLL_SECONDS = 0.1
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class LoadTestServer(ThreadedWSGIServer):
+    """The runserver WSGI server, optionally handling at most threads requests at once."""
+
+    def __init__(self, *args, threads=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.slots = threading.BoundedSemaphore(threads) if threads else None
+
+    def process_request(self, request, client_address):
+        if self.slots:
+            # Further connections wait in the listen backlog, as with a busy worker
+            self.slots.acquire()
+        super().process_request(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            if self.slots:
+                self.slots.release()
+
+
+def current_rss():
+    """Returns the resident set size of this process in bytes, or None if unknown."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss():
+    """
+    Returns the peak resident set size of this process in bytes, or None where
+    the resource module does not exist (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def encode_multipart(fields, file_name, file_bytes):
+    """Returns the body and content type of a multipart upload of the form."""
+    boundary = uuid.uuid4().hex
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+        f"{value}\r\n".encode("utf-8")
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f"--{boundary}\r\nContent-Disposition: form-data; "
+        f'name="audio_file"; filename="{file_name}"\r\n'
+        "Content-Type: audio/wav\r\n\r\n".encode("utf-8") + file_bytes + b"\r\n"
+    )
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def parse_patch(value):
+    """Parses "module.NAME=json value" into (module, name, value)."""
+    target, sep, raw_value = value.partition("=")
+    module, _, name = target.rpartition(".")
+    if not sep or not module:
+        raise CommandError(f"Invalid --patch '{value}'; expected module.NAME=value.")
+    try:
+        parsed = json.loads(raw_value)
+    except ValueError:
+        parsed = raw_value
+    try:
+        module = importlib.import_module(f"subtitle.{module}")
+    except ImportError:
+        raise CommandError(f"Unknown module 'subtitle.{module}' in --patch.")
+    if not hasattr(module, name):
+        raise CommandError(f"{module.__name__} has no attribute '{name}'.")
+    return module, name, parsed
+
+
+class LoadClient:
+    """One simulated user with its own cookies, sending requests in a loop."""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(CookieJar())
+        )
+        self.csrf_token = None
+
+    def request(self, path, data=None, headers=None):
+        """Returns the status code and body; HTTP errors are returned, not raised."""
+        request = urllib.request.Request(
+            path if path.startswith("http") else self.base_url + path,
+            data,
+            headers or {},
+        )
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def open_form(self):
+        status, body = self.request("/")
+        match = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', body)
+        self.csrf_token = match and match.group(1).decode("ascii")
+        return status
+
+    def upload(self, path, file_name, audio_bytes):
+        body, content_type = encode_multipart(
+            dict(FORM_FIELDS, csrfmiddlewaretoken=self.csrf_token or ""),
+            file_name,
+            audio_bytes,
+        )
+        return self.request(
+            path, body, {"Content-Type": content_type, "Referer": self.base_url + "/"}
+        )
+
+    def transcribe_job(self, file_name, audio_bytes):
+        """Queues a job and follows it to its download; returns the final status code."""
+        status, body = self.upload("/jobs/", file_name, audio_bytes)
+        if status != 202:
+            return status
+        job = json.loads(body)
+        while job["status"] not in ("finished", "failed"):
+            time.sleep(POLL_SECONDS)
+            status, body = self.request(job["status_url"])
+            if status != 200:
+                return status
+            job = json.loads(body)
+        if job["status"] == "failed":
+            return 500
+        return self.request(job["download_url"])[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the web app offline: starts it on a local port with a stub Whisper "
+        "model of configurable speed (or the real 'tiny' model with --real) and has "
+        "concurrent clients upload audio of mixed lengths to / and open /models/. "
+        "Reports throughput, latency percentiles, status codes and peak RSS "
+        "(where the platform reports it). "
+        "Compare worker counts, cache sizes and scheduling with --server-threads, "
+        "--job-workers, --scheduling-policy and --patch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--lengths",
+            default="10,60,600",
+            help="Comma-separated audio lengths in seconds.",
+        )
+        parser.add_argument(
+            "--weights",
+            default="6,3,1",
+            help="Comma-separated relative frequency of each length.",
+        )
+        parser.add_argument(
+            "--models-share",
+            type=float,
+            default=0.1,
+            help="Fraction of requests that open /models/ instead of uploading.",
+        )
+        parser.add_argument(
+            "--repeat-share",
+            type=float,
+            default=0.2,
+            help="Fraction of uploads that repeat earlier audio (result cache hits).",
+        )
+        parser.add_argument(
+            "--stub-latency",
+            type=float,
+            default=0.01,
+            help="Seconds the stub model takes per second of audio.",
+        )
+        parser.add_argument(
+            "--stub-busy",
+            action="store_true",
+            help="Spin the CPU for the stub latency instead of sleeping.",
+        )
+        parser.add_argument(
+            "--real",
+            action="store_true",
+            help="Run the real 'tiny' model (must already be downloaded).",
+        )
+        parser.add_argument(
+            "--jobs-api",
+            action="store_true",
+            help="Upload to /jobs/ and poll each job until it is downloaded, "
+            "instead of waiting on /.",
+        )
+        parser.add_argument(
+            "--server-threads",
+            type=int,
+            help="Requests handled at once (default: a thread per request).",
+        )
+        parser.add_argument(
+            "--job-workers",
+            type=int,
+            default=jobs.JOB_WORKERS,
+            help="Job workers with --jobs-api (default: SUBTITLE_JOB_WORKERS).",
+        )
+        parser.add_argument(
+            "--scheduling-policy",
+            choices=scheduling.POLICIES,
+            default=scheduling.POLICY,
+        )
+        parser.add_argument("--scheduling-aging", type=float, default=scheduling.AGING)
+        parser.add_argument(
+            "--patch",
+            action="append",
+            default=[],
+            metavar="MODULE.NAME=VALUE",
+            help="Override a module setting for the run, e.g. "
+            "admission.MAX_QUEUED_AUDIO_SECONDS=600 or result_cache.MAX_BYTES=0 "
+            "(JSON values). May be repeated.",
+        )
+        parser.add_argument("--timeout", type=float, default=600.0)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", help="Write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        lengths = [float(length) for length in options["lengths"].split(",")]
+        weights = [float(weight) for weight in options["weights"].split(",")]
+        if len(weights) != len(lengths):
+            raise CommandError("--weights needs one weight per length.")
+        patches = [parse_patch(value) for value in options["patch"]]
+        if options["real"]:
+            from subtitle.views import model_file_path
+
+            if not os.path.exists(model_file_path("tiny")):
+                raise CommandError(
+                    "The 'tiny' model is not downloaded; download it on the models "
+                    "page or run without --real."
+                )
+        stub_model = (
+            None
+            if options["real"]
+            else StubModel(options["stub_latency"], options["stub_busy"])
+        )
+
+        with ExitStack() as stack:
+            # Signed-cookie sessions keep the test from writing to the database
+            stack.enter_context(
+                override_settings(
+                    SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies",
+                    ALLOWED_HOSTS=list(settings.ALLOWED_HOSTS) + ["127.0.0.1"],
+                )
+            )
+            work_dir = stack.enter_context(isolated_pipeline(stub_model))
+            stack.enter_context(
+                mock.patch.object(
+                    jobs,
+                    "_scheduler",
+                    scheduling.Scheduler(
+                        options["job_workers"],
+                        scheduling.RunQueue(
+                            options["scheduling_policy"], options["scheduling_aging"]
+                        ),
+                        thread_name_prefix="transcription",
+                    ),
+                )
+            )
+            stack.enter_context(
+                mock.patch.object(admission, "WORKERS", max(1, options["job_workers"]))
+            )
+            for module, name, value in patches:
+                stack.enter_context(mock.patch.object(module, name, value))
+
+            audio = {}
+            for seconds in lengths:
+                path = os.path.join(work_dir, f"{seconds:g}s.wav")
+                write_synthetic_wav(path, seconds)
+                with open(path, "rb") as f:
+                    audio[seconds] = f.read()
+
+            server = LoadTestServer(
+                ("127.0.0.1", 0),
+                QuietRequestHandler,
+                threads=options["server_threads"],
+            )
+            # Not webUi.wsgi, which would verify and preload the configured models
+            server.set_app(get_wsgi_application())
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                results = self.run_load(
+                    f"http://127.0.0.1:{server.server_address[1]}",
+                    audio,
+                    weights,
+                    options,
+                )
+            finally:
+                server.shutdown()
+                server.server_close()
+
+        results["options"] = {
+            name: options[name]
+            for name in (
+                "clients",
+                "requests",
+                "lengths",
+                "weights",
+                "models_share",
+                "repeat_share",
+                "stub_latency",
+                "stub_busy",
+                "real",
+                "jobs_api",
+                "server_threads",
+                "job_workers",
+                "scheduling_policy",
+                "scheduling_aging",
+                "patch",
+            )
+        }
+        self.report(results)
+        if options["json"]:
+            with open(options["json"], "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=4)
+
+    def run_load(self, base_url, audio, weights, options):
+        rng = random.Random(options["seed"])
+        # The whole request plan is drawn up front so a seed always replays the same load
+        plan = []
+        uploads = 0
+        for _ in range(options["requests"]):
+            if rng.random() < options["models_share"]:
+                plan.append(("models", None, None))
+                continue
+            seconds = rng.choices(list(audio), weights)[0]
+            if uploads and rng.random() < options["repeat_share"]:
+                variant = rng.randrange(uploads)
+            else:
+                variant = uploads
+                uploads += 1
+            plan.append(("upload", seconds, variant))
+
+        lock = threading.Lock()
+        samples = []  # (kind, audio seconds, status, latency)
+        peak_rss = [current_rss() or 0]
+        done = threading.Event()
+
+        def sample_rss():
+            while not done.wait(0.05):
+                peak_rss[0] = max(peak_rss[0], current_rss() or 0)
+
+        def run_client():
+            client = LoadClient(base_url, options["timeout"])
+            client.open_form()
+            while True:
+                with lock:
+                    if not plan:
+                        return
+                    kind, seconds, variant = plan.pop(0)
+                start_time = time.perf_counter()
+                try:
+                    if kind == "models":
+                        status = client.request("/models/")[0]
+                    else:
+                        # The last four bytes make each variant a distinct upload
+                        audio_bytes = audio[seconds][:-4] + variant.to_bytes(
+                            4, "little"
+                        )
+                        file_name = f"load {seconds:g}s {variant}.wav"
+                        if options["jobs_api"]:
+                            status = client.transcribe_job(file_name, audio_bytes)
+                        else:
+                            status = client.upload("/", file_name, audio_bytes)[0]
+                except OSError as e:
+                    status = type(e).__name__
+                latency = time.perf_counter() - start_time
+                with lock:
+                    samples.append((kind, seconds, status, latency))
+
+        threading.Thread(target=sample_rss, daemon=True).start()
+        start_time = time.perf_counter()
+        clients = [
+            threading.Thread(target=run_client, name=f"load-client-{i}")
+            for i in range(max(1, options["clients"]))
+        ]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - start_time
+        done.set()
+
+        endpoints = {}
+        for kind in ("upload", "models"):
+            kind_samples = [sample for sample in samples if sample[0] == kind]
+            if not kind_samples:
+                continue
+            statuses = {}
+            for _, _, status, _ in kind_samples:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+            ok = [sample for sample in kind_samples if sample[2] == 200]
+            endpoints[kind] = {
+                "requests": len(kind_samples),
+                "statuses": statuses,
+                "error_rate": 1 - len(ok) / len(kind_samples),
+                "seconds": summarize([sample[3] for sample in kind_samples]),
+                "audio_seconds": sum(sample[1] for sample in ok if sample[1]),
+            }
+        return {
+            "elapsed_seconds": elapsed,
+            "throughput": len(samples) / elapsed,
+            "audio_seconds_per_second": sum(
+                endpoint["audio_seconds"] for endpoint in endpoints.values()
+            )
+            / elapsed,
+            # Sampled while the clients ran; without /proc, the peak since start,
+            # and None where neither is available
+            "peak_rss_bytes": peak_rss[0] or max_rss(),
+            "endpoints": endpoints,
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f"{sum(e['requests'] for e in results['endpoints'].values())} requests "
+            f"in {results['elapsed_seconds']:.1f}s: {results['throughput']:.2f} req/s, "
+            f"{results['audio_seconds_per_second']:.1f} audio s/s"
+        )
+        for kind, endpoint in results["endpoints"].items():
+            seconds = endpoint["seconds"]
+            self.stdout.write(
+                f"{kind:<8} p50 {seconds['p50'] * 1000:9.1f} ms  "
+                f"p95 {seconds['p95'] * 1000:9.1f} ms  "
+                f"p99 {seconds['p99'] * 1000:9.1f} ms  "
+                f"errors {endpoint['error_rate']:6.1%}  {endpoint['statuses']}"
+            )
+        if results["peak_rss_bytes"]:
+            self.stdout.write(
+                f"Peak RSS: {results['peak_rss_bytes'] / 1024**2:.0f} MiB"
+            )
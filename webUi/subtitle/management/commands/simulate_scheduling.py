@@ -0,0 +1,225 @@
+import json
+import heapq
+import math
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from subtitle import admission, scheduling
+from subtitle.benchmarking import summarize
+
+# Audio durations of the synthetic workload: (share of jobs, shortest, longest seconds)
+DURATION_MIX = (
+    (0.80, 10, 120),  # voice notes
+    (0.15, 300, 1200),  # meetings and episodes
+    (0.05, 3600, 7200),  # recordings of a few hours
+)
+# Files shorter than this count as short and at least this long as long in the report
+SHORT_SECONDS = 300
+LONG_SECONDS = 3600
+
+
+def generate_workload(
+    jobs, workers, load=0.9, models=("base",), owners=1, noise=0.2, seed=0
+):
+    """
+    Builds a synthetic workload: Poisson arrivals at the rate that keeps workers
+    busy for the load fraction of the time, audio durations from DURATION_MIX and
+    owners chosen with Zipf weights (the first owner sends the most). Each job's
+    actual service time differs from its expected cost by lognormal noise.
+    """
+    rng = random.Random(seed)
+    entries = []
+    for _ in range(jobs):
+        _, shortest, longest = rng.choices(
+            DURATION_MIX, weights=[share for share, _, _ in DURATION_MIX]
+        )[0]
+        model = rng.choice(models)
+        audio_seconds = math.exp(rng.uniform(math.log(shortest), math.log(longest)))
+        cost = audio_seconds * admission.real_time_factor((model, "cpu"))
+        entries.append(
+            {
+                "audio_seconds": round(audio_seconds, 3),
+                "model": model,
+                "owner": f"user-{rng.choices(range(owners), [1 / (i + 1) for i in range(owners)])[0]}",
+                "service_seconds": round(cost * math.exp(rng.gauss(0, noise)), 3),
+            }
+        )
+    mean_service = sum(entry["service_seconds"] for entry in entries) / jobs
+    arrival = 0.0
+    for entry in entries:
+        entry["arrival"] = round(arrival, 3)
+        arrival += rng.expovariate(load * workers / mean_service)
+    return entries
+
+
+def simulate(workload, workers, run_queue):
+    """
+    Replays a workload through a RunQueue on simulated workers and returns each
+    job's wait (from arrival until a worker picks it up), in workload order.
+    """
+    order = sorted(range(len(workload)), key=lambda i: workload[i]["arrival"])
+    waits = [None] * len(workload)
+    running = []  # finish times
+    now = 0.0
+    position = 0
+    while position < len(order) or len(run_queue) or running:
+        next_arrival = (
+            workload[order[position]]["arrival"] if position < len(order) else math.inf
+        )
+        if running and running[0] < next_arrival:
+            now = heapq.heappop(running)
+        else:
+            index = order[position]
+            entry = workload[index]
+            now = entry["arrival"]
+            cost = entry["audio_seconds"] * admission.real_time_factor(
+                (entry["model"], "cpu")
+            )
+            run_queue.push(index, cost, now, entry.get("owner"))
+            position += 1
+        while len(running) < workers and len(run_queue):
+            index = run_queue.pop()
+            entry = workload[index]
+            waits[index] = now - entry["arrival"]
+            service = entry.get("service_seconds")
+            if service is None:
+                service = entry["audio_seconds"] * admission.real_time_factor(
+                    (entry["model"], "cpu")
+                )
+            heapq.heappush(running, now + service)
+    return waits
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays a transcription workload against the scheduling policies in "
+        "simulated time and reports the wait before each job starts (p50, p99...), "
+        "overall and for short and long files. The workload is synthetic unless "
+        "--workload is given, and can be saved with --save to replay it later."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workload",
+            help="JSON list of jobs to replay: arrival, audio_seconds, model and "
+            "optionally owner and service_seconds.",
+        )
+        parser.add_argument("--save", help="Write the workload to this JSON file.")
+        parser.add_argument("--jobs", type=int, default=2000)
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument(
+            "--load",
+            type=float,
+            default=0.9,
+            help="Fraction of the time the workers are busy (synthetic workload).",
+        )
+        parser.add_argument("--models", nargs="+", default=["base"])
+        parser.add_argument("--owners", type=int, default=1)
+        parser.add_argument(
+            "--noise",
+            type=float,
+            default=0.2,
+            help="Spread of the service time around its expected cost (log scale).",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--aging",
+            type=float,
+            nargs="+",
+            default=[scheduling.AGING],
+            help="Aging rates to compare for the sjf policy (0 never ages).",
+        )
+        parser.add_argument(
+            "--fair",
+            action="store_true",
+            help="Also run each policy with per-owner fairness.",
+        )
+        parser.add_argument("--json", help="Write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        if options["workload"]:
+            try:
+                with open(options["workload"], "r", encoding="utf-8") as f:
+                    workload = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read the workload: {e}")
+        else:
+            workload = generate_workload(
+                options["jobs"],
+                options["workers"],
+                options["load"],
+                options["models"],
+                options["owners"],
+                options["noise"],
+                options["seed"],
+            )
+        if not workload:
+            raise CommandError("The workload is empty.")
+        if options["save"]:
+            with open(options["save"], "w", encoding="utf-8") as f:
+                json.dump(workload, f, indent=1)
+
+        configurations = [("fifo", 0.0)] + [
+            ("sjf", aging) for aging in options["aging"]
+        ]
+        results = []
+        for fair in (False, True) if options["fair"] else (False,):
+            for policy, aging in configurations:
+                waits = simulate(
+                    workload,
+                    max(1, options["workers"]),
+                    scheduling.RunQueue(policy, aging, fair),
+                )
+                name = policy if policy == "fifo" else f"sjf aging={aging:g}"
+                if fair:
+                    name += " fair"
+                results.append({"policy": name, **self.report(workload, waits)})
+
+        self.stdout.write(
+            f"{len(workload)} jobs, {sum(e['audio_seconds'] for e in workload) / 3600:.1f} "
+            f"hours of audio, {options['workers']} worker(s)"
+        )
+        self.stdout.write(
+            f"{'policy':<22} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} "
+            f"{'short p50':>10} {'long p50':>9} {'long max':>9}"
+        )
+        for result in results:
+            wait = result["wait"]
+            self.stdout.write(
+                f"{result['policy']:<22} {wait['p50']:9.0f} {wait['p90']:9.0f} "
+                f"{wait['p99']:9.0f} {wait['max']:9.0f} "
+                f"{result['short']['p50'] if result['short'] else math.nan:10.0f} "
+                f"{result['long']['p50'] if result['long'] else math.nan:9.0f} "
+                f"{result['long']['max'] if result['long'] else math.nan:9.0f}"
+            )
+        self.stdout.write("Waits in seconds.")
+
+        if options["json"]:
+            with open(options["json"], "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "jobs": len(workload),
+                        "workers": options["workers"],
+                        "results": results,
+                    },
+                    f,
+                    indent=4,
+                )
+
+    def report(self, workload, waits):
+        short = [
+            wait
+            for entry, wait in zip(workload, waits)
+            if entry["audio_seconds"] < SHORT_SECONDS
+        ]
+        long = [
+            wait
+            for entry, wait in zip(workload, waits)
+            if entry["audio_seconds"] >= LONG_SECONDS
+        ]
+        return {
+            "wait": summarize(waits),
+            "short": summarize(short) if short else None,
+            "long": summarize(long) if long else None,
+        }
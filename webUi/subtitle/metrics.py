@@ -0,0 +1,206 @@
+import math
+import time
+import threading
+from contextlib import contextmanager
+
+# Bucket upper bounds (seconds) for pipeline stage timings
+STAGE_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    120,
+    300,
+    600,
+    1800,
+    3600,
+)
+# Bucket upper bounds (seconds) for the duration of transcribed audio
+AUDIO_DURATION_BUCKETS = (10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 14400)
+# Bucket upper bounds for the real-time factor (processing time / audio duration)
+RTF_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_metric(name, kind, documentation, samples):
+    """
+    Formats one metric family in the Prometheus text exposition format.
+    samples is a list of (labels dict, value) pairs.
+    """
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        label_text = _label_text(labels.keys(), labels.values())
+        lines.append(f"{name}{label_text} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class Counter:
+    """A monotonically increasing value per label combination."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        samples = [(dict(zip(self.labelnames, key)), value) for key, value in values]
+        return format_metric(self.name, "counter", self.documentation, samples)
+
+
+class Histogram:
+    """Counts observations into cumulative buckets per label combination."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=STAGE_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._values = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            values = self._values.get(key)
+            if values is None:
+                values = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    values[i] += 1
+                    break
+            values[-2] += value
+            values[-1] += 1
+
+    def totals(self):
+        """Returns {label values: (sum, count)} for every label combination."""
+        with self._lock:
+            return {
+                key: (values[-2], values[-1]) for key, values in self._values.items()
+            }
+
+    def render(self):
+        with self._lock:
+            snapshot = {key: list(values) for key, values in self._values.items()}
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        names = self.labelnames + ("le",)
+        for key, values in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                labels = _label_text(names, key + (_number(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _label_text(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_number(values[-2])}")
+            lines.append(f"{self.name}_count{labels} {values[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "subtitle_stage_seconds",
+    "Time spent in each stage of the transcription pipeline.",
+    ["stage"],
+)
+AUDIO_DURATION_SECONDS = Histogram(
+    "subtitle_audio_duration_seconds",
+    "Duration of transcribed audio.",
+    ["model", "device"],
+    buckets=AUDIO_DURATION_BUCKETS,
+)
+REAL_TIME_FACTOR = Histogram(
+    "subtitle_real_time_factor",
+    "Transcription time divided by audio duration.",
+    ["model", "device"],
+    buckets=RTF_BUCKETS,
+)
+TRANSCRIPTIONS = Counter(
+    "subtitle_transcriptions_total",
+    "Transcriptions by model, device and whether the result cache was hit.",
+    ["model", "device", "cache"],
+)
+AUDIO_SECONDS = Counter(
+    "subtitle_audio_seconds_total",
+    "Seconds of audio transcribed (excluding result cache hits).",
+    ["model", "device"],
+)
+VAD_SKIPPED_SECONDS = Counter(
+    "subtitle_vad_skipped_seconds_total",
+    "Seconds of non-speech audio skipped by voice activity detection.",
+)
+ADMISSION_REJECTIONS = Counter(
+    "subtitle_admission_rejections_total",
+    "Requests turned away because too much audio was queued for their model.",
+    ["model", "device"],
+)
+STAGE_ERRORS = Counter(
+    "subtitle_stage_errors_total",
+    "Pipeline stages that raised an exception.",
+    ["stage"],
+)
+
+
+@contextmanager
+def stage(name):
+    """Records the time spent in the with-block as one observation of a pipeline stage."""
+    start_time = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start_time, stage=name)
+
+
+def observe_transcription(model, device, audio_seconds, seconds):
+    """Records the audio duration and real-time factor of one transcription."""
+    TRANSCRIPTIONS.inc(model=model, device=device, cache="miss")
+    AUDIO_SECONDS.inc(audio_seconds, model=model, device=device)
+    AUDIO_DURATION_SECONDS.observe(audio_seconds, model=model, device=device)
+    if audio_seconds > 0:
+        REAL_TIME_FACTOR.observe(seconds / audio_seconds, model=model, device=device)
+
+
+def render():
+    """Returns all registered metrics in the Prometheus text exposition format."""
+    return "".join(metric.render() for metric in _registry)
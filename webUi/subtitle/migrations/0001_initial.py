@@ -0,0 +1,106 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="TranscriptionResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cache_key", models.CharField(max_length=64, unique=True)),
+                ("audio_hash", models.CharField(max_length=64)),
+                ("model_choice", models.CharField(max_length=32)),
+                ("options", models.JSONField(default=dict)),
+                ("language", models.CharField(blank=True, max_length=16)),
+                ("audio_seconds", models.FloatField(null=True)),
+                ("inference_seconds", models.FloatField(null=True)),
+                ("result_file", models.CharField(max_length=500)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("expires_at", models.DateTimeField(null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["audio_hash"], name="subtitle_tr_audio_h_0c47c2_idx"
+                    ),
+                    models.Index(
+                        fields=["expires_at"], name="subtitle_tr_expires_855b1b_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="TranscriptionJob",
+            fields=[
+                (
+                    "id",
+                    models.CharField(max_length=32, primary_key=True, serialize=False),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("finished", "Finished"),
+                            ("failed", "Failed"),
+                        ],
+                        default="queued",
+                        max_length=16,
+                    ),
+                ),
+                ("safe_base_name", models.CharField(max_length=255)),
+                ("audio_hash", models.CharField(blank=True, max_length=64)),
+                ("model_choice", models.CharField(max_length=32)),
+                ("options", models.JSONField(default=dict)),
+                ("output_file", models.CharField(blank=True, max_length=500)),
+                ("error", models.TextField(blank=True)),
+                ("audio_seconds", models.FloatField(null=True)),
+                ("inference_seconds", models.FloatField(null=True)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("started_at", models.DateTimeField(null=True)),
+                ("finished_at", models.DateTimeField(null=True)),
+                ("expires_at", models.DateTimeField(null=True)),
+                (
+                    "result",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="subtitle.transcriptionresult",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["audio_hash"], name="subtitle_tr_audio_h_6e1341_idx"
+                    ),
+                    models.Index(
+                        fields=["status", "created_at"],
+                        name="subtitle_tr_status_db05f4_idx",
+                    ),
+                    models.Index(
+                        fields=["expires_at"], name="subtitle_tr_expires_eddae1_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
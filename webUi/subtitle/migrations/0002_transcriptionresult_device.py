@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("subtitle", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transcriptionresult",
+            name="device",
+            field=models.CharField(blank=True, max_length=16),
+        ),
+    ]
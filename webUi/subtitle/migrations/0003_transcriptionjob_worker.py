@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("subtitle", "0002_transcriptionresult_device"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transcriptionjob",
+            name="worker",
+            field=models.CharField(blank=True, max_length=128),
+        ),
+    ]
@@ -0,0 +1,134 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+def model_size(model):
+    """Returns the number of bytes held by a model's parameters and buffers."""
+    tensors = list(model.parameters()) + list(model.buffers())
+    # Dynamically quantized linear layers keep their int8 weights in packed params
+    tensors += [
+        module.weight()
+        for module in model.modules()
+        if isinstance(module, torch.ao.nn.quantized.Linear)
+    ]
+    return sum(t.numel() * t.element_size() for t in tensors if not t.is_sparse)
+
+
+class ModelPool:
+    """
+    Thread-safe LRU cache of loaded Whisper models.
+
+    Models are evicted, least recently used first, once their combined size
+    exceeds budget_bytes (None means no limit). Only one thread loads a given
+    model; other threads asking for it wait for that load to finish.
+
+    Inference must go through lease(): whisper.decode() installs hooks on the
+    decoder modules of the model it runs on, so a model instance cannot decode in
+    two threads at once.
+    """
+
+    def __init__(self, budget_bytes=None):
+        self.budget_bytes = budget_bytes
+        self._models = OrderedDict()  # key -> (model, size in bytes)
+        self._loading = {}  # key -> Event set when the load finishes
+        self._leases = {}  # key -> RLock held by the thread using the model
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "loads": 0, "evictions": 0, "load_seconds": 0.0}
+
+    def get(self, key, loader):
+        """Returns the model for key, calling loader() to load it if needed."""
+        while True:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return self._models[key][0]
+                event = self._loading.get(key)
+                if event is None:
+                    event = self._loading[key] = threading.Event()
+                    break
+            # Another thread is loading this model; wait and look again
+            event.wait()
+
+        try:
+            start_time = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - start_time
+            size = model_size(model)
+            with self._lock:
+                self._models[key] = (model, size)
+                self._stats["loads"] += 1
+                self._stats["load_seconds"] += load_seconds
+                evicted = self._evict(keep=key)
+        finally:
+            with self._lock:
+                del self._loading[key]
+            event.set()
+
+        logger.info(
+            f"Loaded '{key}' model ({size / 1024**2:.0f} MiB) in {load_seconds:.1f}s."
+        )
+        if evicted:
+            self._release_memory()
+        return model
+
+    @contextmanager
+    def lease(self, key, loader):
+        """
+        Gives the calling thread exclusive use of the model for key (loaded like
+        get()) until the with block ends; other threads leasing it wait. A thread
+        may lease a model it already holds.
+        """
+        with self.lock(key):
+            yield self.get(key, loader)
+
+    def lock(self, key):
+        """Returns the lock lease() holds for key, for work handed to other threads."""
+        with self._lock:
+            return self._leases.setdefault(key, threading.RLock())
+
+    def discard(self, key):
+        """Drops a model from the pool, e.g. after it was deleted or updated."""
+        with self._lock:
+            removed = self._models.pop(key, None)
+        if removed is not None:
+            self._release_memory()
+
+    def _evict(self, keep):
+        """Evicts least recently used models until the pool fits the budget."""
+        evicted = []
+        if self.budget_bytes is None:
+            return evicted
+        while self._resident_bytes() > self.budget_bytes:
+            key = next((k for k in self._models if k != keep), None)
+            if key is None:
+                break
+            del self._models[key]
+            self._stats["evictions"] += 1
+            evicted.append(key)
+            logger.info(f"Evicted '{key}' model from the model pool.")
+        return evicted
+
+    def _resident_bytes(self):
+        return sum(size for _, size in self._models.values())
+
+    def _release_memory(self):
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def stats(self):
+        """Returns load/hit/eviction counters and the resident models and bytes."""
+        with self._lock:
+            data = dict(self._stats)
+            data["resident_bytes"] = self._resident_bytes()
+            data["resident_models"] = list(self._models)
+            data["loading_models"] = list(self._loading)
+        data["budget_bytes"] = self.budget_bytes
+        return data
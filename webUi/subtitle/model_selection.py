@@ -0,0 +1,79 @@
+import time
+import logging
+import threading
+
+from django.conf import settings
+
+from . import admission, store
+from .precision import model_key
+
+logger = logging.getLogger(__name__)
+
+# Models the "auto" choice picks from, from the least to the most accurate
+AUTO_MODELS = getattr(
+    settings,
+    "SUBTITLE_AUTO_MODELS",
+    ("tiny", "base", "small", "medium", "turbo", "large"),
+)
+# Minutes within which an "auto" request should be done when it gives no deadline
+AUTO_DEADLINE_MINUTES = getattr(settings, "SUBTITLE_AUTO_DEADLINE_MINUTES", 30)
+# Seconds between reads of the real-time factors measured by earlier runs
+PROFILE_REFRESH_SECONDS = 300
+
+_lock = threading.Lock()
+_profiles_read_at = None
+
+
+def load_profiles():
+    """
+    Gives admission the real-time factor of each model and device measured by
+    earlier runs (store.real_time_factors()), read again after
+    PROFILE_REFRESH_SECONDS so results of other processes are taken into account.
+    """
+    global _profiles_read_at
+    with _lock:
+        now = time.monotonic()
+        if (
+            _profiles_read_at is not None
+            and now - _profiles_read_at < PROFILE_REFRESH_SECONDS
+        ):
+            return
+        _profiles_read_at = now
+    admission.set_profiles(store.real_time_factors())
+
+
+def deadline_seconds(options):
+    """Returns the seconds within which a request should be done."""
+    return (options.get("deadline_minutes") or AUTO_DEADLINE_MINUTES) * 60
+
+
+def expected_seconds(key, audio_seconds):
+    """
+    Returns the seconds until audio_seconds of audio newly queued for a
+    (model, device) pair should be transcribed: the estimated wait behind the
+    queued work plus its own duration times the pair's real-time factor.
+    """
+    wait = admission.queue_status()["estimated_wait_seconds"]
+    return wait + audio_seconds * admission.real_time_factor(key)
+
+
+def choose_model(audio_seconds, deadline, precision, device):
+    """
+    Returns the most accurate of AUTO_MODELS expected to transcribe audio_seconds
+    of audio within deadline seconds on device, and the seconds it is expected to
+    take. If none is fast enough, returns the fastest.
+    """
+    load_profiles()
+    estimates = [
+        (model, expected_seconds((model_key(model, precision), device), audio_seconds))
+        for model in AUTO_MODELS
+    ]
+    in_time = [estimate for estimate in estimates if estimate[1] <= deadline]
+    model, seconds = (
+        in_time[-1] if in_time else min(estimates, key=lambda estimate: estimate[1])
+    )
+    logger.info(
+        f"Chose the '{model}' model for {audio_seconds:.0f}s of audio: expected "
+        f"to take {seconds:.0f}s with a deadline of {deadline:.0f}s."
+    )
+    return model, seconds
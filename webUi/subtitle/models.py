@@ -1,3 +1,71 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class TranscriptionResult(models.Model):
+    """A stored Whisper result, keyed like the result cache (audio hash + decoding options)."""
+
+    cache_key = models.CharField(max_length=64, unique=True)
+    audio_hash = models.CharField(max_length=64)
+    model_choice = models.CharField(max_length=32)
+    options = models.JSONField(default=dict)
+    language = models.CharField(max_length=16, blank=True)
+    audio_seconds = models.FloatField(null=True)
+    inference_seconds = models.FloatField(null=True)
+    # Device the result was decoded on, for the real-time factor profiles
+    device = models.CharField(max_length=16, blank=True)
+    # Path of the JSON file holding the result
+    result_file = models.CharField(max_length=500)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["audio_hash"]),
+            models.Index(fields=["expires_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.model_choice} result for {self.audio_hash[:12]}"
+
+
+class TranscriptionJob(models.Model):
+    """A transcription request and the output file it produced."""
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("finished", "Finished"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.CharField(max_length=32, primary_key=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="queued")
+    safe_base_name = models.CharField(max_length=255)
+    audio_hash = models.CharField(max_length=64, blank=True)
+    model_choice = models.CharField(max_length=32)
+    options = models.JSONField(default=dict)
+    result = models.ForeignKey(
+        TranscriptionResult, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    # Path of the rendered output file in the requested format
+    output_file = models.CharField(max_length=500, blank=True)
+    error = models.TextField(blank=True)
+    audio_seconds = models.FloatField(null=True)
+    inference_seconds = models.FloatField(null=True)
+    # "host:pid" of the process that queued and runs the job
+    worker = models.CharField(max_length=128, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+    expires_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["audio_hash"]),
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["expires_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.safe_base_name} ({self.status})"
@@ -0,0 +1,160 @@
+import os
+import logging
+import functools
+import threading
+
+import torch
+import whisper
+from whisper.model import AudioEncoder, ModelDimensions, TextDecoder, Whisper
+
+logger = logging.getLogger(__name__)
+
+# Weight formats available for CPU inference
+PRECISIONS = ("fp32", "bf16", "int8")
+
+# Precisions whose converted files can be memory-mapped; int8 weights are repacked
+# by the quantized kernels when loaded, so they are always read into private memory
+MAPPABLE_PRECISIONS = ("fp32", "bf16")
+
+
+def model_key(model_choice, precision):
+    """Returns the model pool key of a model in a given precision."""
+    return model_choice if precision == "fp32" else f"{model_choice}:{precision}"
+
+
+def _bf16_forward(forward):
+    @functools.wraps(forward)
+    def wrapper(*args, **kwargs):
+        with torch.autocast("cpu", dtype=torch.bfloat16):
+            # Whisper's decoding code expects float32 audio features and logits
+            return forward(*args, **kwargs).float()
+
+    return wrapper
+
+
+def _convert(model, precision):
+    """Converts an fp32 Whisper model in place (for int8, returns a new model)."""
+    if precision == "bf16":
+        model.to(torch.bfloat16)
+        # Whisper's LayerNorm runs in float32 and needs float32 parameters
+        for module in model.modules():
+            if isinstance(module, torch.nn.LayerNorm):
+                module.float()
+        for module in (model.encoder, model.decoder):
+            module.forward = _bf16_forward(module.forward)
+    elif precision == "int8":
+        # quantize_dynamic only swaps exact nn.Linear instances; Whisper's Linear
+        # subclass only adds a dtype cast that does not apply to float32 inputs
+        for module in model.modules():
+            if type(module) is whisper.model.Linear:
+                module.__class__ = torch.nn.Linear
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return model
+
+
+def converted_path(model_choice, precision, converted_dir):
+    # The published checkpoint's SHA256 is part of the name, so an updated
+    # checkpoint is converted again
+    sha256 = whisper._MODELS[model_choice].split("/")[-2]
+    return os.path.join(converted_dir, f"{model_choice}-{precision}-{sha256[:16]}.pt")
+
+
+def _empty_model(dims):
+    """
+    Returns a Whisper model whose parameters are on the meta device, i.e. not
+    allocated, to be filled in with load_state_dict(assign=True).
+    """
+    # Whisper(dims) cannot be built on the meta device (its alignment heads are
+    # a sparse tensor), so the encoder and decoder are built separately
+    model = Whisper.__new__(Whisper)
+    torch.nn.Module.__init__(model)
+    model.dims = dims
+    with torch.device("meta"):
+        model.encoder = AudioEncoder(
+            dims.n_mels,
+            dims.n_audio_ctx,
+            dims.n_audio_state,
+            dims.n_audio_head,
+            dims.n_audio_layer,
+        )
+        model.decoder = TextDecoder(
+            dims.n_vocab,
+            dims.n_text_ctx,
+            dims.n_text_state,
+            dims.n_text_head,
+            dims.n_text_layer,
+        )
+    # Buffers that are not part of the state dict are created as in Whisper
+    mask = torch.empty(dims.n_text_ctx, dims.n_text_ctx).fill_(-float("inf")).triu_(1)
+    model.decoder.register_buffer("mask", mask, persistent=False)
+    all_heads = torch.zeros(dims.n_text_layer, dims.n_text_head, dtype=torch.bool)
+    all_heads[dims.n_text_layer // 2 :] = True
+    model.register_buffer("alignment_heads", all_heads.to_sparse(), persistent=False)
+    return model
+
+
+def _load_mapped(path, precision):
+    # The tensors stay backed by the file, so processes loading the same file
+    # share its pages through the page cache instead of each holding a copy
+    checkpoint = torch.load(path, map_location="cpu", weights_only=True, mmap=True)
+    model = _convert(_empty_model(ModelDimensions(**checkpoint["dims"])), precision)
+    model.load_state_dict(checkpoint["model_state_dict"], assign=True)
+    return model
+
+
+def load_model(model_choice, precision, model_dir, converted_dir, mmap=False):
+    """
+    Loads a Whisper model for CPU inference in the given precision.
+    bf16 and int8 models are converted from the fp32 checkpoint once and the
+    converted weights are stored in converted_dir for later loads.
+    With mmap, fp32 and bf16 weights are memory-mapped from the converted file
+    (fp32 gets one too, as the published checkpoints hold fp16 weights).
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unsupported precision '{precision}'.")
+    mapped = mmap and precision in MAPPABLE_PRECISIONS
+    if precision == "fp32" and not mapped:
+        return whisper.load_model(model_choice, device="cpu", download_root=model_dir)
+
+    path = converted_path(model_choice, precision, converted_dir)
+    if not os.path.exists(path):
+        model = _convert(
+            whisper.load_model(model_choice, device="cpu", download_root=model_dir),
+            precision,
+        )
+        os.makedirs(converted_dir, exist_ok=True)
+        # Chunk and bulk worker processes may convert the same model at once
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        torch.save(
+            {"dims": model.dims.__dict__, "model_state_dict": model.state_dict()},
+            temp_path,
+        )
+        os.replace(temp_path, path)
+        logger.info(f"Converted '{model_choice}' model to {precision} at {path}.")
+        if mapped:
+            # Swap the private copy for the shared mapping
+            del model
+            model = _load_mapped(path, precision)
+    elif mapped:
+        model = _load_mapped(path, precision)
+    else:
+        checkpoint = torch.load(path, map_location="cpu", weights_only=True)
+        model = _convert(Whisper(ModelDimensions(**checkpoint["dims"])), precision)
+        model.load_state_dict(checkpoint["model_state_dict"])
+    # Alignment heads are not part of the state dict
+    model.set_alignment_heads(whisper._ALIGNMENT_HEADS[model_choice])
+    return model
+
+
+def remove_converted(model_choice, converted_dir):
+    """Deletes the converted copies of a model, e.g. after its checkpoint changed."""
+    prefix = f"{model_choice}-"
+    try:
+        names = os.listdir(converted_dir)
+    except FileNotFoundError:
+        return
+    for name in names:
+        if name.startswith(prefix) and name[len(prefix) :].split("-")[0] in PRECISIONS:
+            os.remove(os.path.join(converted_dir, name))
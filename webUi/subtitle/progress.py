@@ -0,0 +1,115 @@
+import sys
+import logging
+import threading
+import types
+from contextlib import contextmanager, nullcontext
+
+import tqdm
+import whisper  # noqa: F401  (makes sure whisper.transcribe is imported)
+
+logger = logging.getLogger(__name__)
+
+# Per-thread progress callbacks; whisper.transcribe() runs in the calling thread.
+_local = threading.local()
+
+# transcribe() appends each window's segments to this local list just before
+# advancing its progress bar, which is how they are reported while it decodes
+SEGMENTS_LOCAL = "all_segments"
+if SEGMENTS_LOCAL not in whisper.transcribe.__code__.co_varnames:
+    logger.warning(
+        f"whisper.transcribe() has no '{SEGMENTS_LOCAL}' list in this Whisper "
+        "version; segments will only be reported once each transcription ends."
+    )
+
+
+class _ProgressBar:
+    """Minimal stand-in for the tqdm bar used inside whisper.transcribe()."""
+
+    def __init__(self, total, callback, segment_callback):
+        self.total = total or 0
+        self.n = 0
+        self.callback = callback
+        self.segment_callback = segment_callback
+        self.emitted_segments = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def update(self, n=1):
+        if self.segment_callback:
+            segments = sys._getframe(1).f_locals.get(SEGMENTS_LOCAL)
+            if segments is None:
+                logger.warning(
+                    f"Cannot report segments while decoding: the caller of the "
+                    f"progress bar has no '{SEGMENTS_LOCAL}' list. They are "
+                    "reported when the transcription ends instead."
+                )
+                self.segment_callback = None
+            elif len(segments) > self.emitted_segments:
+                self.segment_callback(segments[self.emitted_segments :])
+                self.emitted_segments = len(segments)
+        self.n += n
+        if self.total and self.callback:
+            self.callback(min(self.n / self.total, 1.0))
+
+
+def _progress_bar(*args, **kwargs):
+    """Returns our progress bar when callbacks are registered, else a real tqdm bar."""
+    callbacks = getattr(_local, "callbacks", None)
+    if callbacks is None:
+        return tqdm.tqdm(*args, **kwargs)
+    return _ProgressBar(kwargs.get("total"), *callbacks)
+
+
+# whisper.transcribe() creates its bar with `tqdm.tqdm(total=content_frames, ...)`
+# and advances it after every decoded 30-second window.
+if not hasattr(sys.modules["whisper.transcribe"], "tqdm"):
+    logger.warning(
+        "whisper.transcribe no longer uses tqdm; transcription progress and "
+        "segments will only be reported once each transcription ends."
+    )
+sys.modules["whisper.transcribe"].tqdm = types.SimpleNamespace(tqdm=_progress_bar)
+
+
+@contextmanager
+def report_progress(callback, segment_callback=None):
+    """
+    Calls callback(fraction) with a value between 0 and 1 while Whisper
+    transcribes audio in the current thread, and segment_callback(segments)
+    with each batch of newly decoded segments.
+    """
+    previous = getattr(_local, "callbacks", None)
+    _local.callbacks = (callback, segment_callback)
+    try:
+        yield
+    finally:
+        _local.callbacks = previous
+
+
+def transcribe(
+    model, audio, progress_callback=None, segment_callback=None, **decode_options
+):
+    """
+    Runs model.transcribe() with report_progress(). Segments that could not be
+    reported while decoding are passed to segment_callback at the end, so a
+    change inside Whisper delays them instead of losing them.
+    """
+    emitted = 0
+
+    def count_segments(segments):
+        nonlocal emitted
+        emitted += len(segments)
+        segment_callback(segments)
+
+    with (
+        report_progress(progress_callback, segment_callback and count_segments)
+        if progress_callback or segment_callback
+        else nullcontext()
+    ):
+        result = model.transcribe(audio, **decode_options)
+    if segment_callback and len(result["segments"]) > emitted:
+        segment_callback(result["segments"][emitted:])
+    return result
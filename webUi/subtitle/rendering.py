@@ -0,0 +1,143 @@
+import io
+import json
+import zipfile
+
+import numpy as np
+
+# Output formats produced by render()
+FORMATS = ("srt", "vtt", "txt", "json")
+
+# ASCII code of "0"
+_ZERO = ord("0")
+
+
+def format_timestamps(seconds, fmt="srt"):
+    """
+    Formats an array of times in seconds as HH:MM:SS,mmm (SRT) or HH:MM:SS.mmm (VTT).
+    The MM:SS,mmm digits of all timestamps are computed at once into a byte array
+    and the hours are taken from a lookup table, instead of formatting each
+    timestamp separately.
+    """
+    millis = np.rint(np.asarray(seconds, dtype=np.float64) * 1000).astype(np.int64)
+    if not len(millis):
+        return []
+    hours, millis = np.divmod(millis, 3_600_000)
+    minutes, millis = np.divmod(millis, 60_000)
+    secs, millis = np.divmod(millis, 1000)
+
+    chars = np.empty((len(millis), 9), dtype=np.uint8)
+    chars[:, 0] = minutes // 10 + _ZERO
+    chars[:, 1] = minutes % 10 + _ZERO
+    chars[:, 2] = ord(":")
+    chars[:, 3] = secs // 10 + _ZERO
+    chars[:, 4] = secs % 10 + _ZERO
+    chars[:, 5] = ord("." if fmt == "vtt" else ",")
+    chars[:, 6] = millis // 100 + _ZERO
+    chars[:, 7] = millis // 10 % 10 + _ZERO
+    chars[:, 8] = millis % 10 + _ZERO
+    tails = chars.view("S9").ravel().astype("U9").astype(object)
+
+    # Hours have at least two digits but may have more for very long audio
+    hour_prefixes = np.array(
+        [f"{hour:02}:" for hour in range(int(hours.max()) + 1)], dtype=object
+    )
+    return (hour_prefixes[hours] + tails).tolist()
+
+
+def format_texts(texts, max_words, mode):
+    """
+    Applies format_subtitle_text() rules to a list of segment texts.
+    Segments that already fit on one line skip the line-splitting step.
+    """
+    if mode != "line":
+        return list(texts)
+    formatted = []
+    append = formatted.append
+    for text in texts:
+        words = text.split()
+        if len(words) <= max_words:
+            append(" ".join(words))
+        else:
+            append(
+                "\n".join(
+                    [
+                        " ".join(words[i : i + max_words])
+                        for i in range(0, len(words), max_words)
+                    ]
+                )
+            )
+    return formatted
+
+
+def render_cues(
+    segments, max_subtitle_length, max_length_mode, fmt="srt", start_index=0, texts=None
+):
+    """
+    Returns numbered SRT/VTT cues for segments as one string (without the WEBVTT header).
+    texts may hold already formatted segment texts to avoid formatting them twice.
+    """
+    if not segments:
+        return ""
+    if texts is None:
+        texts = format_texts(
+            [segment["text"] for segment in segments],
+            max_subtitle_length,
+            max_length_mode,
+        )
+    times = np.array(
+        [(segment["start"], segment["end"]) for segment in segments], dtype=np.float64
+    )
+    stamps = format_timestamps(times.ravel(), fmt)
+    starts = stamps[0::2]
+    ends = stamps[1::2]
+    numbers = range(start_index + 1, start_index + len(segments) + 1)
+    return "".join(
+        [
+            f"{number}\n{start} --> {end}\n{text}\n\n"
+            for number, start, end, text in zip(numbers, starts, ends, texts)
+        ]
+    )
+
+
+def render(result, formats, max_subtitle_length, max_length_mode):
+    """
+    Renders a transcription result into each requested format in one pass.
+    Segment texts are formatted once and shared by SRT and VTT.
+    Returns a dict mapping format to the rendered text.
+    """
+    segments = result["segments"]
+    rendered = {}
+    texts = None
+    if "srt" in formats or "vtt" in formats:
+        texts = format_texts(
+            [segment["text"] for segment in segments],
+            max_subtitle_length,
+            max_length_mode,
+        )
+    for fmt in formats:
+        if fmt == "srt":
+            rendered[fmt] = render_cues(
+                segments, max_subtitle_length, max_length_mode, "srt", texts=texts
+            )
+        elif fmt == "vtt":
+            rendered[fmt] = "WEBVTT\n\n" + render_cues(
+                segments, max_subtitle_length, max_length_mode, "vtt", texts=texts
+            )
+        elif fmt == "txt":
+            rendered[fmt] = result["text"]
+        elif fmt == "json":
+            rendered[fmt] = json.dumps(result, indent=4)
+        else:
+            raise ValueError("Unsupported output format.")
+    return rendered
+
+
+def render_bundle(result, base_name, max_subtitle_length, max_length_mode):
+    """Returns a zip archive (as bytes) containing the result in every format."""
+    rendered = render(result, FORMATS, max_subtitle_length, max_length_mode)
+    buffer = io.BytesIO()
+    # Fast compression level; subtitle text still compresses well
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as bundle:
+        for fmt, text in rendered.items():
+            bundle.writestr(f"{base_name}.{fmt}", text)
+    return buffer.getvalue()
@@ -0,0 +1,131 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Directory holding cached transcription results, one JSON file per entry
+CACHE_DIR = os.path.join(settings.BASE_DIR, "transcriptionCache")
+os.makedirs(CACHE_DIR, exist_ok=True)
+
+# Maximum total size of the cache directory before old entries are evicted
+MAX_BYTES = getattr(settings, "SUBTITLE_RESULT_CACHE_MAX_BYTES", 512 * 1024 * 1024)
+
+# Options that change what Whisper decodes; output formatting options are not part of the key
+DECODE_OPTIONS = (
+    "model_choice",
+    "language",
+    "temperature",
+    "best_of",
+    "condition_on_previous_text",
+    "precision",
+    "language_detection",
+    "vad",
+)
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "saved_seconds": 0.0}
+
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    """Returns the SHA256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(audio_hash, options):
+    """Builds the cache key from the audio hash and the decoding options."""
+    key_data = {name: options[name] for name in DECODE_OPTIONS}
+    key_data["audio_hash"] = audio_hash
+    return hashlib.sha256(
+        json.dumps(key_data, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def get(key):
+    """Returns the cached result for key, or None on a miss."""
+    path = _entry_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        with _lock:
+            _stats["misses"] += 1
+        return None
+
+    # The modification time records the last use for LRU eviction
+    os.utime(path)
+    with _lock:
+        _stats["hits"] += 1
+        _stats["saved_seconds"] += entry["inference_seconds"]
+    logger.info(
+        f"Result cache hit, skipped {entry['inference_seconds']:.1f}s of inference."
+    )
+    return entry["result"]
+
+
+def put(key, result, inference_seconds):
+    """Stores a transcription result and evicts old entries beyond MAX_BYTES."""
+    path = _entry_path(key)
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"result": result, "inference_seconds": inference_seconds}, f)
+    os.replace(temp_path, path)
+    prune_directory(CACHE_DIR, MAX_BYTES, keep=(path,))
+
+
+def prune_directory(directory, max_bytes, keep=()):
+    """
+    Removes the least recently used files until the directory fits in max_bytes.
+    Paths in keep (e.g. the entry just written) and temporary files still being
+    written are never removed.
+    """
+    keep = set(keep)
+    entries = []
+    total_bytes = 0
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_bytes += stat.st_size
+    if total_bytes <= max_bytes:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        if total_bytes <= max_bytes:
+            break
+        if path in keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            # Already removed, or still open elsewhere on Windows
+            continue
+        total_bytes -= size
+        logger.info(f"Evicted '{os.path.basename(path)}' from {directory}.")
+
+
+def stats():
+    """Returns hit/miss counters, the inference time saved and the cache size."""
+    with _lock:
+        data = dict(_stats)
+    data["entries"] = 0
+    data["bytes"] = 0
+    with os.scandir(CACHE_DIR) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(".json"):
+                data["entries"] += 1
+                data["bytes"] += entry.stat().st_size
+    return data
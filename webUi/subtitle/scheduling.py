@@ -0,0 +1,142 @@
+import time
+import heapq
+import logging
+import itertools
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# "sjf" runs the queued job with the least expected work first (audio duration times
+# the model's real-time factor); "fifo" runs jobs in arrival order
+POLICIES = ("sjf", "fifo")
+POLICY = getattr(settings, "SUBTITLE_SCHEDULING_POLICY", "sjf")
+# Under "sjf", every second a job waits counts as this many seconds less work, so
+# long jobs are not starved by a steady stream of short ones
+AGING = getattr(settings, "SUBTITLE_SCHEDULING_AGING", 0.1)
+# Whether the workers are shared between users (by the work each was served)
+# before each user's own jobs are ordered by the policy
+FAIR = getattr(settings, "SUBTITLE_SCHEDULING_FAIR", False)
+
+
+class RunQueue:
+    """
+    Queued work in scheduling order. It keeps no clock and no lock of its own:
+    Scheduler drives it with wall-clock time, simulate_scheduling with simulated time.
+    """
+
+    def __init__(self, policy=POLICY, aging=AGING, fair=FAIR):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown scheduling policy '{policy}'.")
+        self.policy = policy
+        self.aging = aging
+        self.fair = fair
+        self._queues = {}  # owner -> heap of (priority, sequence, cost, item)
+        self._served = {}  # owner with queued work -> seconds dispatched, when fair
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    def priority(self, cost, now):
+        """Returns the sort key of work costing cost seconds that arrives at now."""
+        if self.policy == "fifo":
+            return now
+        # cost - AGING * (later - now) orders jobs the same way at any later time
+        # as this does, so queued priorities never need updating
+        return cost + self.aging * now
+
+    def push(self, item, cost, now, owner=None):
+        owner = owner if self.fair else None
+        queue = self._queues.setdefault(owner, [])
+        if self.fair and not queue:
+            # An owner that was idle starts level with the least-served waiting owner
+            # instead of claiming every worker until it catches up
+            waiting = [
+                self._served.get(other, 0.0)
+                for other, other_queue in self._queues.items()
+                if other_queue
+            ]
+            self._served[owner] = min(waiting, default=0.0)
+        heapq.heappush(
+            queue, (self.priority(cost, now), next(self._sequence), cost, item)
+        )
+
+    def pop(self):
+        """Removes and returns the next item; raises IndexError when empty."""
+        if not self._queues:
+            raise IndexError("pop from an empty run queue")
+        owner = min(
+            self._queues,
+            key=lambda owner: (
+                self._served.get(owner, 0.0),
+                self._queues[owner][0][:2],
+            ),
+        )
+        queue = self._queues[owner]
+        _, _, cost, item = heapq.heappop(queue)
+        if not queue:
+            del self._queues[owner]
+            # An owner without queued work starts level with the waiting owners when
+            # it returns (see push()), so its account is dropped instead of kept for
+            # every session that ever submitted a job
+            self._served.pop(owner, None)
+        elif self.fair:
+            self._served[owner] += cost
+        return item
+
+
+class Scheduler:
+    """
+    A pool of worker threads like ThreadPoolExecutor, but submitted calls run in
+    RunQueue order instead of arrival order. Threads start with the first call.
+    """
+
+    def __init__(self, workers, run_queue=None, thread_name_prefix="scheduler"):
+        self.workers = max(1, workers)
+        self.thread_name_prefix = thread_name_prefix
+        self._queue = run_queue or RunQueue()
+        self._condition = threading.Condition()
+        self._threads = []
+
+    def submit(self, fn, cost, owner=None):
+        """
+        Queues fn() as work expected to take cost seconds on behalf of owner and
+        returns a concurrent.futures.Future for its result.
+        """
+        future = Future()
+        with self._condition:
+            self._queue.push((future, fn), cost, time.monotonic(), owner)
+            self._condition.notify()
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f"{self.thread_name_prefix}_{len(self._threads)}",
+                    daemon=True,
+                )
+                self._threads.append(thread)
+                thread.start()
+        return future
+
+    def queued(self):
+        """Returns the number of calls waiting for a worker."""
+        with self._condition:
+            return len(self._queue)
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not len(self._queue):
+                    self._condition.wait()
+                future, fn = self._queue.pop()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn()
+            except BaseException as e:
+                logger.exception("Scheduled call failed.")
+                future.set_exception(e)
+            else:
+                future.set_result(result)
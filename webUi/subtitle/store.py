@@ -0,0 +1,211 @@
+import os
+import json
+import logging
+import threading
+import statistics
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import TranscriptionJob, TranscriptionResult
+from .precision import model_key
+
+logger = logging.getLogger(__name__)
+
+# Persistent job outputs and results; kept until they expire, unlike temp/
+RESULTS_DIR = os.path.join(settings.BASE_DIR, "results")
+OUTPUT_DIR = os.path.join(RESULTS_DIR, "outputs")
+RESULT_DIR = os.path.join(RESULTS_DIR, "json")
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+os.makedirs(RESULT_DIR, exist_ok=True)
+
+# Hours finished jobs and results are kept; None keeps them forever
+RETENTION_HOURS = getattr(settings, "SUBTITLE_RESULT_RETENTION_HOURS", 7 * 24)
+
+
+def expiry_time(start=None):
+    """Returns when something created at start (default: now) expires, or None."""
+    if RETENTION_HOURS is None:
+        return None
+    return (start or timezone.now()) + timedelta(hours=RETENTION_HOURS)
+
+
+def _datetime(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+
+def _unexpired(queryset):
+    return queryset.filter(
+        Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())
+    )
+
+
+def save_result(
+    key, audio_hash, options, result, audio_seconds, inference_seconds, device=""
+):
+    """Stores a transcription result so it outlives the result cache until it expires."""
+    path = os.path.join(RESULT_DIR, f"{key}.json")
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    os.replace(temp_path, path)
+    try:
+        return TranscriptionResult.objects.update_or_create(
+            cache_key=key,
+            defaults={
+                "audio_hash": audio_hash,
+                "model_choice": options["model_choice"],
+                "options": options,
+                "language": result.get("language") or "",
+                "audio_seconds": audio_seconds,
+                "inference_seconds": inference_seconds,
+                "device": device,
+                "result_file": path,
+                "created_at": timezone.now(),
+                "expires_at": expiry_time(),
+            },
+        )[0]
+    except DatabaseError:
+        logger.exception("Could not record the transcription result.")
+        return None
+
+
+def real_time_factors(limit=1000):
+    """
+    Returns the median real-time factor (inference seconds per second of audio) of
+    each (model, device) pair over the latest limit timed results, expired or not.
+    """
+    timings = {}
+    try:
+        records = (
+            TranscriptionResult.objects.filter(
+                audio_seconds__gt=0, inference_seconds__gt=0
+            )
+            .exclude(device="")
+            .order_by("-created_at")
+            .values_list(
+                "model_choice",
+                "options",
+                "device",
+                "audio_seconds",
+                "inference_seconds",
+            )[:limit]
+        )
+        for model_choice, options, device, audio_seconds, inference_seconds in records:
+            key = (model_key(model_choice, options.get("precision", "fp32")), device)
+            timings.setdefault(key, []).append(inference_seconds / audio_seconds)
+    except DatabaseError:
+        logger.exception("Could not read the stored transcription timings.")
+        return {}
+    return {key: statistics.median(rtfs) for key, rtfs in timings.items()}
+
+
+def load_result(key):
+    """
+    Returns (result, inference seconds) stored under a result cache key,
+    or None if there is no unexpired result.
+    """
+    try:
+        record = _unexpired(TranscriptionResult.objects.filter(cache_key=key)).first()
+    except DatabaseError:
+        logger.exception("Could not look up stored transcription results.")
+        return None
+    if record is None:
+        return None
+    try:
+        with open(record.result_file, "r", encoding="utf-8") as f:
+            return json.load(f), record.inference_seconds
+    except (FileNotFoundError, json.JSONDecodeError):
+        record.delete()
+        return None
+
+
+def save_job(job):
+    """Creates or updates the database record of an in-memory jobs.Job."""
+    finished_at = _datetime(job.finished_at)
+    try:
+        TranscriptionJob.objects.update_or_create(
+            id=job.id,
+            defaults={
+                "status": job.status,
+                "safe_base_name": job.safe_base_name,
+                "audio_hash": job.audio_hash or "",
+                "model_choice": job.options["model_choice"],
+                "options": job.options,
+                "result_id": _result_id(job.result_key),
+                "output_file": job.output_file_path or "",
+                "error": job.error or "",
+                "audio_seconds": job.audio_seconds,
+                "inference_seconds": job.inference_seconds,
+                "worker": job.worker,
+                "created_at": _datetime(job.created_at),
+                "started_at": _datetime(job.started_at),
+                "finished_at": finished_at,
+                "expires_at": expiry_time(finished_at) if finished_at else None,
+            },
+        )
+    except DatabaseError:
+        logger.exception(f"Could not record transcription job {job.id}.")
+
+
+def _result_id(key):
+    if not key:
+        return None
+    return (
+        TranscriptionResult.objects.filter(cache_key=key)
+        .values_list("id", flat=True)
+        .first()
+    )
+
+
+def load_job(job_id):
+    """Returns the unexpired TranscriptionJob record with the given ID, or None."""
+    try:
+        return _unexpired(TranscriptionJob.objects.filter(id=job_id)).first()
+    except DatabaseError:
+        logger.exception("Could not look up stored transcription jobs.")
+        return None
+
+
+def find_jobs(audio_hash, status="finished"):
+    """Returns unexpired jobs for an audio hash, newest first."""
+    return _unexpired(
+        TranscriptionJob.objects.filter(audio_hash=audio_hash, status=status)
+    ).order_by("-created_at")
+
+
+def cleanup(now=None, dry_run=False):
+    """
+    Deletes expired jobs and results and their files. Results still used by an
+    unexpired job are kept. Returns the number of (jobs, results, files) removed.
+    """
+    now = now or timezone.now()
+    expired_jobs = TranscriptionJob.objects.filter(expires_at__lte=now)
+    expired_results = TranscriptionResult.objects.filter(expires_at__lte=now).exclude(
+        transcriptionjob__in=TranscriptionJob.objects.filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=now)
+        )
+    )
+    paths = list(
+        expired_jobs.exclude(output_file="").values_list("output_file", flat=True)
+    )
+    paths += expired_results.values_list("result_file", flat=True)
+    if dry_run:
+        return expired_jobs.count(), expired_results.count(), len(paths)
+
+    removed_files = 0
+    for path in paths:
+        try:
+            os.remove(path)
+            removed_files += 1
+        except FileNotFoundError:
+            pass
+    # Results first: deleting the jobs changes which results are still in use
+    results_deleted = expired_results.delete()[0]
+    jobs_deleted = expired_jobs.delete()[0]
+    return jobs_deleted, results_deleted, removed_files
@@ -0,0 +1,208 @@
+import queue
+import tempfile
+import logging
+import threading
+import subprocess
+from contextlib import nullcontext
+
+import numpy as np
+from whisper.audio import SAMPLE_RATE
+
+from .chunking import ENERGY_FRAME_SECONDS, frame_energy, merge_results
+from .progress import report_progress
+
+logger = logging.getLogger(__name__)
+
+# Decoded windows that may wait for the model. With the window ffmpeg is filling and
+# the one being transcribed, at most QUEUE_WINDOWS + 2 windows are held in memory
+QUEUE_WINDOWS = 2
+# Window ends are moved to the quietest frame within this many seconds before them
+SEARCH_SECONDS = 5.0
+# Characters of a window's text given as the prompt of the next window
+PROMPT_CHARACTERS = 200
+# Trailing bytes of ffmpeg's error output quoted when it fails
+ERROR_BYTES = 4096
+
+
+def decode_windows(file_path, window_seconds, first_window_seconds=30):
+    """
+    Decodes file_path with ffmpeg to 16 kHz mono float32 audio and yields it in
+    consecutive windows: first_window_seconds long, so inference can start as soon as
+    they are decoded, then window_seconds long. A background thread reads ffmpeg's
+    output at most QUEUE_WINDOWS windows ahead of the consumer, so memory stays
+    bounded however long the file is. Raises RuntimeError if ffmpeg fails.
+    """
+    # ffmpeg's messages go to a file: a pipe nobody reads while stdout is being read
+    # would block ffmpeg once it fills up
+    errors = tempfile.TemporaryFile()
+    # Same conversion as whisper.load_audio()
+    process = subprocess.Popen(
+        [
+            "ffmpeg",
+            "-nostdin",
+            "-loglevel",
+            "error",
+            "-threads",
+            "0",
+            "-i",
+            file_path,
+            "-f",
+            "s16le",
+            "-ac",
+            "1",
+            "-acodec",
+            "pcm_s16le",
+            "-ar",
+            str(SAMPLE_RATE),
+            "-",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=errors,
+    )
+    windows = queue.Queue(maxsize=QUEUE_WINDOWS)
+    stop = threading.Event()
+
+    def put(item):
+        # Gives up once the consumer has gone away instead of blocking forever
+        while not stop.is_set():
+            try:
+                windows.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def read():
+        try:
+            window_bytes = int(first_window_seconds * SAMPLE_RATE) * 2
+            while not stop.is_set():
+                data = process.stdout.read(window_bytes)
+                if not data:
+                    break
+                samples = np.frombuffer(data[: len(data) // 2 * 2], "<i2")
+                put(samples.astype(np.float32) / 32768.0)
+                window_bytes = int(window_seconds * SAMPLE_RATE) * 2
+            if process.wait() and not stop.is_set():
+                errors.seek(0, 2)
+                errors.seek(max(0, errors.tell() - ERROR_BYTES))
+                error = errors.read().decode("utf-8", errors="replace")
+                put(RuntimeError(f"Failed to load audio: {error}"))
+            else:
+                put(None)
+        except Exception as e:
+            put(e)
+
+    reader = threading.Thread(target=read, name="ffmpeg-reader", daemon=True)
+    reader.start()
+    try:
+        while True:
+            item = windows.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        if process.poll() is None:
+            process.kill()
+        reader.join()
+        process.wait()
+        process.stdout.close()
+        errors.close()
+
+
+def _quiet_cut(audio):
+    """Returns the sample index of the quietest frame near the end of audio."""
+    frame_length = max(1, int(ENERGY_FRAME_SECONDS * SAMPLE_RATE))
+    search_start = max(0, len(audio) - int(SEARCH_SECONDS * SAMPLE_RATE))
+    energy = frame_energy(audio[search_start:])
+    if not len(energy):
+        return len(audio)
+    return search_start + int(np.argmin(energy)) * frame_length + frame_length // 2
+
+
+def transcribe_stream(
+    model,
+    windows,
+    decode_options,
+    total_seconds=None,
+    progress_callback=None,
+    segment_callback=None,
+):
+    """
+    Transcribes audio that arrives as consecutive windows (see decode_windows()),
+    each as soon as it is available. Each window is cut at a quiet point near its
+    end and the rest is carried into the next one, so words are not split; with
+    condition_on_previous_text the end of the previous window's text is the prompt
+    of the next. Without a language in decode_options, the language the first
+    window is decoded in is used for every window. progress is reported against
+    total_seconds when it is known.
+    Returns the merged result and the duration of the audio in seconds.
+    """
+    decode_options = dict(decode_options)
+    results = []
+    offsets = []
+    position = 0  # samples transcribed so far
+    carry = np.zeros(0, dtype=np.float32)
+    total_samples = (total_seconds or 0) * SAMPLE_RATE
+
+    def transcribe(audio):
+        nonlocal position
+        offset = position / SAMPLE_RATE
+        if decode_options.get("condition_on_previous_text") and results:
+            decode_options["initial_prompt"] = results[-1]["text"][-PROMPT_CHARACTERS:]
+
+        emitted = 0
+
+        def window_progress(fraction):
+            done = position + fraction * len(audio)
+            progress_callback(min(done / total_samples, 1.0))
+
+        def window_segments(segments):
+            nonlocal emitted
+            emitted += len(segments)
+            segment_callback(
+                merge_results([{"text": "", "segments": segments}], [offset])[
+                    "segments"
+                ]
+            )
+
+        with (
+            report_progress(
+                window_progress if progress_callback and total_samples else None,
+                window_segments if segment_callback else None,
+            )
+            if progress_callback or segment_callback
+            else nullcontext()
+        ):
+            result = model.transcribe(audio, **decode_options)
+        # Later windows keep the language of the first instead of detecting their own
+        decode_options["language"] = decode_options.get("language") or result.get(
+            "language"
+        )
+        if segment_callback and len(result["segments"]) > emitted:
+            # Models that do not report progress give their segments at the end
+            window_segments(result["segments"][emitted:])
+        results.append(result)
+        offsets.append(offset)
+        position += len(audio)
+        if progress_callback and total_samples:
+            progress_callback(min(position / total_samples, 1.0))
+
+    full_window = 0
+    for window in windows:
+        audio = np.concatenate((carry, window)) if len(carry) else window
+        full_window = max(full_window, len(window))
+        # A window shorter than those before it is the last one and is kept whole
+        cut = _quiet_cut(audio) if len(window) == full_window else len(audio)
+        audio, carry = audio[:cut], audio[cut:]
+        transcribe(audio)
+    if len(carry):
+        transcribe(carry)
+    if progress_callback:
+        progress_callback(1.0)
+    logger.info(
+        f"Transcribed {position / SAMPLE_RATE:.1f}s of audio in {len(results)} "
+        "windows while it was decoded."
+    )
+    return merge_results(results, offsets), position / SAMPLE_RATE
@@ -1,3 +1,714 @@
+import io
+import os
+import sys
+import json
+import shutil
+import socket
+import unittest
+import subprocess
+import zipfile
+import tempfile
+import time
+import threading
+from datetime import timedelta
+from unittest import mock
+
+import numpy as np
+import torch
 from django.test import TestCase
+from django.utils import timezone
+from whisper.audio import SAMPLE_RATE
+
+from . import (
+    admission,
+    audio_cache,
+    chunking,
+    jobs,
+    metrics,
+    rendering,
+    result_cache,
+    scheduling,
+    store,
+    streaming,
+    uploads,
+    vad,
+    views,
+)
+from .model_pool import ModelPool
+from .models import TranscriptionJob, TranscriptionResult
+from .views import overloaded_response
+
+
+def linear_model(features):
+    """A small module whose size in the pool is features * features float32 weights."""
+    return torch.nn.Linear(features, features, bias=False)
+
+
+class ModelPoolTests(TestCase):
+    def test_model_is_loaded_once(self):
+        pool = ModelPool()
+        loader = mock.Mock(return_value=linear_model(4))
+        self.assertIs(pool.get("tiny", loader), pool.get("tiny", loader))
+        loader.assert_called_once_with()
+        self.assertEqual(pool.stats()["hits"], 1)
+        self.assertEqual(pool.stats()["resident_bytes"], 4 * 4 * 4)
+
+    def test_concurrent_loads_are_deduplicated(self):
+        pool = ModelPool()
+        loading = threading.Event()
+
+        def loader():
+            loading.set()
+            time.sleep(0.1)
+            return linear_model(4)
+
+        models = []
+        threads = [
+            threading.Thread(target=lambda: models.append(pool.get("tiny", loader)))
+            for _ in range(2)
+        ]
+        threads[0].start()
+        loading.wait(5)
+        threads[1].start()
+        for thread in threads:
+            thread.join(5)
+        self.assertIs(models[0], models[1])
+        self.assertEqual(pool.stats()["loads"], 1)
+
+    def test_least_recently_used_model_is_evicted(self):
+        # Room for two of the 64-byte models
+        pool = ModelPool(budget_bytes=150)
+        for key in ("tiny", "base"):
+            pool.get(key, lambda: linear_model(4))
+        pool.get("tiny", None)
+        pool.get("small", lambda: linear_model(4))
+        stats = pool.stats()
+        self.assertEqual(stats["resident_models"], ["tiny", "small"])
+        self.assertEqual(stats["evictions"], 1)
+
+    def test_model_larger_than_the_budget_is_kept(self):
+        pool = ModelPool(budget_bytes=100)
+        pool.get("tiny", lambda: linear_model(4))
+        pool.get("large", lambda: linear_model(8))
+        self.assertEqual(pool.stats()["resident_models"], ["large"])
+
+    def test_lease_is_exclusive(self):
+        pool = ModelPool()
+        order = []
+
+        def lease(name, seconds):
+            with pool.lease("tiny", lambda: linear_model(4)):
+                order.append(f"{name} start")
+                time.sleep(seconds)
+                order.append(f"{name} end")
+
+        first = threading.Thread(target=lease, args=("first", 0.1))
+        first.start()
+        while not order:
+            time.sleep(0.01)
+        lease("second", 0)
+        first.join(5)
+        self.assertEqual(
+            order, ["first start", "first end", "second start", "second end"]
+        )
+
+    def test_lease_is_reentrant(self):
+        pool = ModelPool()
+        with pool.lease("tiny", lambda: linear_model(4)) as model:
+            with pool.lease("tiny", None) as again:
+                self.assertIs(again, model)
+
+
+class ResultCacheTests(TestCase):
+    options = {
+        "model_choice": "tiny",
+        "language": "",
+        "temperature": 0.0,
+        "best_of": 5,
+        "condition_on_previous_text": True,
+        "precision": "fp32",
+        "language_detection": "",
+        "vad": False,
+        "output_format": "srt",
+        "max_words_per_line": 7,
+    }
+
+    def test_key_covers_only_decode_options(self):
+        key = result_cache.cache_key("abc", self.options)
+        self.assertEqual(
+            result_cache.cache_key(
+                "abc", dict(self.options, output_format="vtt", max_words_per_line=3)
+            ),
+            key,
+        )
+        self.assertNotEqual(
+            result_cache.cache_key("abc", dict(self.options, language="de")), key
+        )
+        self.assertNotEqual(result_cache.cache_key("abd", self.options), key)
+
+    def test_put_and_get(self):
+        temporary_directory(self, result_cache, "CACHE_DIR")
+        result = {"text": " hi", "segments": [], "language": "en"}
+        self.assertIsNone(result_cache.get("key"))
+        result_cache.put("key", result, 2.0)
+        self.assertEqual(result_cache.get("key"), result)
+
+    def test_prune_least_recently_used(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for age, name in enumerate(("new", "old", "oldest", "kept", "write.tmp")):
+            path = os.path.join(directory, name)
+            with open(path, "wb") as f:
+                f.write(b"x" * 10)
+            os.utime(path, (1000 - age, 1000 - age))
+        result_cache.prune_directory(
+            directory, 25, keep=(os.path.join(directory, "kept"),)
+        )
+        self.assertEqual(sorted(os.listdir(directory)), ["kept", "new", "write.tmp"])
+
+
+class AudioCacheTests(TestCase):
+    def setUp(self):
+        self.directory = temporary_directory(self, audio_cache, "CACHE_DIR")
+        # Room for two cached waveforms of 1000 samples
+        patcher = mock.patch.object(audio_cache, "MAX_BYTES", 10000)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(
+            audio_cache.whisper,
+            "load_audio",
+            side_effect=lambda path: np.full(1000, 0.5, np.float32),
+        )
+        self.decode = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_audio_is_decoded_once(self):
+        audio = audio_cache.load_audio("talk.mp3", "abc")
+        again = audio_cache.load_audio("talk.mp3", "abc")
+        self.decode.assert_called_once_with("talk.mp3")
+        self.assertIsInstance(again, np.memmap)
+        np.testing.assert_array_equal(again, audio)
+        self.assertTrue(audio_cache.is_cached("abc"))
+
+    def test_audio_in_use_is_not_evicted(self):
+        in_use = audio_cache.load_audio("a.mp3", "a")
+        audio_cache.load_audio("b.mp3", "b")
+        audio_cache.load_audio("c.mp3", "c")
+        self.assertEqual(sorted(os.listdir(self.directory)), ["a.npy", "c.npy"])
+        self.assertEqual(len(in_use), 1000)
+
+    def test_audio_larger_than_the_cache(self):
+        with mock.patch.object(audio_cache, "MAX_BYTES", 100):
+            audio = audio_cache.load_audio("talk.mp3", "abc")
+        self.assertNotIsInstance(audio, np.memmap)
+        self.assertFalse(audio_cache.is_cached("abc"))
+
+
+class ChunkingTests(TestCase):
+    def test_short_audio_is_one_chunk(self):
+        audio = np.ones(5 * SAMPLE_RATE, dtype=np.float32)
+        self.assertEqual(chunking.find_split_points(audio, 10), [(0, 5 * SAMPLE_RATE)])
+
+    def test_split_in_the_pause(self):
+        audio = np.random.RandomState(0).uniform(-0.5, 0.5, 25 * SAMPLE_RATE)
+        audio = audio.astype(np.float32)
+        audio[int(9.2 * SAMPLE_RATE) : int(9.6 * SAMPLE_RATE)] = 0
+        chunks = chunking.find_split_points(audio, 10, search_seconds=2)
+        self.assertEqual(chunks[0][0], 0)
+        self.assertEqual(chunks[-1][1], len(audio))
+        for (_, end), (start, _) in zip(chunks, chunks[1:]):
+            self.assertEqual(end, start)
+        self.assertTrue(9.2 * SAMPLE_RATE <= chunks[0][1] <= 9.6 * SAMPLE_RATE)
+
+    def test_merge_results(self):
+        results = [
+            {
+                "text": " one",
+                "language": "en",
+                "segments": [{"id": 0, "seek": 0, "start": 0.0, "end": 1.0}],
+            },
+            {
+                "text": " two",
+                "language": "en",
+                "segments": [
+                    {
+                        "id": 0,
+                        "seek": 0,
+                        "start": 0.5,
+                        "end": 2.0,
+                        "words": [{"word": " two", "start": 0.5, "end": 2.0}],
+                    }
+                ],
+            },
+        ]
+        merged = chunking.merge_results(results, [0.0, 30.0])
+        self.assertEqual(merged["text"], " one two")
+        self.assertEqual(merged["language"], "en")
+        second = merged["segments"][1]
+        self.assertEqual([segment["id"] for segment in merged["segments"]], [0, 1])
+        self.assertEqual(
+            (second["start"], second["end"], second["seek"]), (30.5, 32.0, 3000)
+        )
+        self.assertEqual(second["words"][0]["start"], 30.5)
+        # The chunk results are left alone
+        self.assertEqual(results[1]["segments"][0]["start"], 0.5)
+
+
+class RenderingTests(TestCase):
+    def test_format_timestamps(self):
+        seconds = [0, 1.5, 3661.007, 360000.25]
+        self.assertEqual(
+            rendering.format_timestamps(seconds, "srt"),
+            ["00:00:00,000", "00:00:01,500", "01:01:01,007", "100:00:00,250"],
+        )
+        self.assertEqual(
+            rendering.format_timestamps(seconds, "vtt"),
+            ["00:00:00.000", "00:00:01.500", "01:01:01.007", "100:00:00.250"],
+        )
+        self.assertEqual(rendering.format_timestamps([]), [])
+
+    def test_render_cues(self):
+        segments = [
+            {"start": 0.0, "end": 1.5, "text": " hello world"},
+            {"start": 1.5, "end": 4.0, "text": " one two three four"},
+        ]
+        self.assertEqual(
+            rendering.render_cues(segments, 3, "line", "srt", start_index=2),
+            "3\n00:00:00,000 --> 00:00:01,500\nhello world\n\n"
+            "4\n00:00:01,500 --> 00:00:04,000\none two three\nfour\n\n",
+        )
+        self.assertEqual(
+            rendering.render_cues(segments[:1], 3, "line", "vtt"),
+            "1\n00:00:00.000 --> 00:00:01.500\nhello world\n\n",
+        )
+        self.assertEqual(rendering.render_cues([], 3, "line"), "")
+
+    def test_bundle_holds_every_format(self):
+        result = {
+            "text": " hello",
+            "language": "en",
+            "segments": [{"start": 0.0, "end": 1.0, "text": " hello"}],
+        }
+        with zipfile.ZipFile(
+            io.BytesIO(rendering.render_bundle(result, "talk", 3, "line"))
+        ) as bundle:
+            self.assertEqual(
+                sorted(bundle.namelist()),
+                ["talk.json", "talk.srt", "talk.txt", "talk.vtt"],
+            )
+            self.assertTrue(bundle.read("talk.vtt").startswith(b"WEBVTT\n\n1\n"))
+            self.assertEqual(json.loads(bundle.read("talk.json")), result)
+
+
+class VoiceActivityTests(TestCase):
+    # Speech from 1 to 2 seconds and from 3 to 5 seconds
+    regions = [(1 * SAMPLE_RATE, 2 * SAMPLE_RATE), (3 * SAMPLE_RATE, 5 * SAMPLE_RATE)]
+
+    def test_speech_regions(self):
+        rng = np.random.RandomState(0)
+        audio = rng.uniform(-1e-4, 1e-4, 6 * SAMPLE_RATE).astype(np.float32)
+        for start, end in self.regions:
+            audio[start:end] = rng.uniform(-0.5, 0.5, end - start)
+        regions = vad.speech_regions(audio, padding_seconds=0)
+        self.assertEqual(len(regions), 2)
+        for (start, end), (expected_start, expected_end) in zip(regions, self.regions):
+            self.assertLessEqual(abs(start - expected_start), 0.02 * SAMPLE_RATE)
+            self.assertLessEqual(abs(end - expected_end), 0.02 * SAMPLE_RATE)
+        self.assertEqual(
+            len(vad.remove_non_speech(audio, regions)),
+            sum(end - start for start, end in regions),
+        )
+
+    def test_restore_timeline(self):
+        result = {
+            "text": "",
+            "segments": [
+                {"seek": 0, "start": 0.5, "end": 1.0, "text": ""},
+                {
+                    "seek": 100,
+                    "start": 1.0,
+                    "end": 2.5,
+                    "text": "",
+                    "words": [{"word": "", "start": 1.25, "end": 2.5}],
+                },
+            ],
+        }
+        restored = vad.restore_timeline(result, self.regions)
+        first, second = restored["segments"]
+        # An end on a region boundary stays in the region before it...
+        self.assertEqual((first["start"], first["end"], first["seek"]), (1.5, 2.0, 100))
+        # ...and a start on it begins the next region
+        self.assertEqual(
+            (second["start"], second["end"], second["seek"]), (3.0, 4.5, 300)
+        )
+        self.assertEqual(second["words"][0], {"word": "", "start": 3.25, "end": 4.5})
+        # The original result is left alone
+        self.assertEqual(result["segments"][0]["start"], 0.5)
+
+
+@mock.patch.object(admission, "WORKERS", 1)
+@mock.patch.object(admission, "MAX_QUEUED_AUDIO_SECONDS", 100)
+class AdmissionTests(TestCase):
+    key = ("admission-test", "cpu")
+
+    def admit(self, audio_seconds):
+        ticket = admission.admit(self.key, audio_seconds)
+        self.addCleanup(admission.release, ticket)
+        return ticket
+
+    def test_idle_model_is_always_admitted(self):
+        self.admit(500)
+
+    def test_overloaded_with_retry_after(self):
+        admission.observe(self.key, 100, 50)  # real-time factor 0.5
+        ticket = self.admit(80)
+        with self.assertRaises(admission.Overloaded) as raised:
+            self.admit(50)
+        # 30 seconds of audio too many, transcribed at half real time
+        self.assertEqual(raised.exception.retry_after, 15)
+
+        response = overloaded_response(raised.exception)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "15")
+
+        admission.release(ticket)
+        self.admit(50)
+
+    def test_progress_frees_room(self):
+        ticket = self.admit(80)
+        ticket.progress = 0.5
+        self.admit(50)
+        self.assertEqual(admission.queue_status()["queued_audio_seconds"], 90)
+
+
+class RunQueueTests(TestCase):
+    def pop_all(self, run_queue):
+        return [run_queue.pop() for _ in range(len(run_queue))]
+
+    def test_shortest_job_first(self):
+        run_queue = scheduling.RunQueue("sjf", aging=0.1)
+        run_queue.push("long", 100, now=0)
+        run_queue.push("short", 10, now=0)
+        self.assertEqual(self.pop_all(run_queue), ["short", "long"])
+
+    def test_aging_lets_waiting_jobs_overtake(self):
+        run_queue = scheduling.RunQueue("sjf", aging=0.1)
+        run_queue.push("long", 100, now=0)
+        # 950 seconds of waiting count as 95 seconds less work: 100 - 95 < 10
+        run_queue.push("short", 10, now=950)
+        self.assertEqual(self.pop_all(run_queue), ["long", "short"])
+
+    def test_without_aging_short_jobs_starve_long_ones(self):
+        run_queue = scheduling.RunQueue("sjf", aging=0.0)
+        run_queue.push("long", 100, now=0)
+        run_queue.push("short", 10, now=950)
+        self.assertEqual(self.pop_all(run_queue), ["short", "long"])
+
+    def test_fifo(self):
+        run_queue = scheduling.RunQueue("fifo")
+        run_queue.push("long", 100, now=0)
+        run_queue.push("short", 10, now=1)
+        self.assertEqual(self.pop_all(run_queue), ["long", "short"])
+        with self.assertRaises(IndexError):
+            run_queue.pop()
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            scheduling.RunQueue("lifo")
+
+    def test_fair_shares_between_owners(self):
+        run_queue = scheduling.RunQueue("fifo", fair=True)
+        for i in range(3):
+            run_queue.push(f"a{i}", 10, now=i, owner="a")
+        run_queue.push("b0", 10, now=3, owner="b")
+        self.assertEqual(self.pop_all(run_queue), ["a0", "b0", "a1", "a2"])
+
+    def test_fair_forgets_owners_without_queued_work(self):
+        run_queue = scheduling.RunQueue("sjf", fair=True)
+        for i in range(100):
+            run_queue.push(i, 10, now=i, owner=f"session-{i}")
+            run_queue.pop()
+        self.assertEqual(run_queue._served, {})
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        upload_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, upload_dir)
+        patcher = mock.patch.object(uploads, "UPLOAD_DIR", upload_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.upload_id = uploads.create("a b.wav", 10)
+
+    def test_chunks_in_any_order(self):
+        self.assertEqual(
+            uploads.write_chunk(self.upload_id, 5, io.BytesIO(b"56789"), 5), 5
+        )
+        status = uploads.status(self.upload_id)
+        self.assertEqual(status["received"], 5)
+        self.assertEqual(status["offset"], 0)
+        self.assertEqual(status["missing"], [[0, 5]])
+        self.assertFalse(status["complete"])
+
+        uploads.write_chunk(self.upload_id, 0, io.BytesIO(b"01234"), 5)
+        status = uploads.status(self.upload_id)
+        self.assertEqual(status["offset"], 10)
+        self.assertEqual(status["missing"], [])
+        self.assertTrue(status["complete"])
+
+        file_path, safe_base_name = uploads.finish(self.upload_id)
+        self.assertEqual(safe_base_name, "a_b")
+        with open(file_path, "rb") as f:
+            self.assertEqual(f.read(), b"0123456789")
+
+    def test_interrupted_chunk_is_kept(self):
+        # The connection dropped after 3 of 5 bytes
+        self.assertEqual(
+            uploads.write_chunk(self.upload_id, 0, io.BytesIO(b"012"), 5), 3
+        )
+        status = uploads.status(self.upload_id)
+        self.assertEqual(status["offset"], 3)
+        self.assertEqual(status["missing"], [[3, 10]])
+
+    def test_chunk_past_the_end(self):
+        with self.assertRaises(uploads.UploadError):
+            uploads.write_chunk(self.upload_id, 8, io.BytesIO(b"890"), 3)
+        with self.assertRaises(uploads.UploadError):
+            uploads.write_chunk("0" * 32, 0, io.BytesIO(b"0"), 1)
+
+    def test_unknown_upload(self):
+        self.assertIsNone(uploads.status("0" * 32))
+        self.assertIsNone(uploads.status("../secret"))
+
+    def test_limits(self):
+        with mock.patch.object(uploads, "MAX_BYTES", 100):
+            with self.assertRaises(uploads.UploadError):
+                uploads.create("big.wav", 101)
+            uploads.create("fits.wav", 100)
+        with mock.patch.object(uploads, "MAX_OPEN", 2):
+            with self.assertRaises(uploads.TooManyUploads):
+                uploads.create("third.wav", 1)
+            uploads.discard(self.upload_id)
+            uploads.create("third.wav", 1)
+
+    def test_concurrent_finish(self):
+        uploads.write_chunk(self.upload_id, 0, io.BytesIO(b"0123456789"), 10)
+        status = uploads.status(self.upload_id)
+        uploads.finish(self.upload_id)
+        # The second request read the status before the first one finished
+        with mock.patch.object(uploads, "status", return_value=status):
+            with self.assertRaises(uploads.UploadError):
+                uploads.finish(self.upload_id)
+
+
+def temporary_directory(test, module, name):
+    """Points module.name at a new temporary directory for the duration of test."""
+    directory = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, directory)
+    patcher = mock.patch.object(module, name, directory)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return directory
+
+
+OPTIONS = {"model_choice": "tiny", "output_format": "srt"}
+
+
+class JobStoreTests(TestCase):
+    def stored_job(self, status, worker=None):
+        job = jobs.Job(None, "talk", OPTIONS)
+        job.status = status
+        if worker is not None:
+            job.worker = worker
+        store.save_job(job)
+        return job
+
+    def test_finished_job_is_restored(self):
+        temporary_directory(self, store, "RESULT_DIR")
+        result = {"text": " hi", "segments": [], "language": "en"}
+        store.save_result("k" * 64, "a" * 64, OPTIONS, result, 10.0, 2.0, "cpu")
+        job = jobs.Job(None, "talk", OPTIONS)
+        job.status = "finished"
+        job.output_file_path = "/results/talk.srt"
+        job.audio_hash = "a" * 64
+        job.result_key = "k" * 64
+        job.audio_seconds = 10.0
+        job.finished_at = job.created_at + 5
+        store.save_job(job)
+
+        restored = jobs.get_job(job.id)
+        self.assertIsNot(restored, job)
+        self.assertEqual(restored.status, "finished")
+        self.assertEqual(restored.progress, 1.0)
+        self.assertEqual(restored.output_file_path, "/results/talk.srt")
+        self.assertEqual(restored.result_key, "k" * 64)
+        self.assertEqual(restored.audio_seconds, 10.0)
+        self.assertAlmostEqual(restored.finished_at, job.finished_at, places=3)
+        self.assertEqual(store.load_result("k" * 64), (result, 2.0))
+        self.assertIsNone(jobs.get_job("0" * 32))
+
+    def test_job_of_a_live_worker_is_left_alone(self):
+        # Another web worker on this host, or one on another host, still runs it
+        for worker in (jobs.current_worker(), "elsewhere:1"):
+            job = self.stored_job("running", worker)
+            self.assertEqual(jobs.get_job(job.id).status, "running")
+            self.assertEqual(TranscriptionJob.objects.get(id=job.id).status, "running")
+
+    @unittest.skipIf(os.name == "nt", "process liveness is not probed on Windows")
+    def test_job_of_an_exited_worker_fails(self):
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        job = self.stored_job("queued", f"{socket.gethostname()}:{process.pid}")
+        self.assertEqual(jobs.get_job(job.id).status, "failed")
+        record = TranscriptionJob.objects.get(id=job.id)
+        self.assertEqual(record.status, "failed")
+        self.assertTrue(record.error)
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.result_dir = temporary_directory(self, store, "RESULT_DIR")
+
+    def save_result(self, key):
+        store.save_result(key, "a" * 64, OPTIONS, {"segments": []}, 1.0, 1.0)
+        return TranscriptionResult.objects.get(cache_key=key)
+
+    def test_cleanup(self):
+        past = timezone.now() - timedelta(hours=1)
+        unused = self.save_result("1" * 64)
+        used = self.save_result("2" * 64)
+        TranscriptionResult.objects.update(expires_at=past)
+        output_file = os.path.join(self.result_dir, "old.srt")
+        open(output_file, "w").close()
+        TranscriptionJob.objects.create(
+            id="1" * 32, model_choice="tiny", output_file=output_file, expires_at=past
+        )
+        TranscriptionJob.objects.create(id="2" * 32, model_choice="tiny", result=used)
+
+        self.assertIsNone(store.load_result(unused.cache_key))
+        self.assertIsNone(store.load_job("1" * 32))
+        self.assertEqual(store.cleanup(dry_run=True), (1, 1, 2))
+        self.assertEqual(store.cleanup(), (1, 1, 2))
+        self.assertFalse(os.path.exists(output_file))
+        self.assertFalse(os.path.exists(unused.result_file))
+        # The result of the unexpired job is kept with its file
+        self.assertEqual(
+            list(TranscriptionResult.objects.values_list("id", flat=True)), [used.id]
+        )
+        self.assertTrue(os.path.exists(used.result_file))
+
+    def test_expiry_time(self):
+        start = timezone.now()
+        with mock.patch.object(store, "RETENTION_HOURS", 2):
+            self.assertEqual(store.expiry_time(start), start + timedelta(hours=2))
+        with mock.patch.object(store, "RETENTION_HOURS", None):
+            self.assertIsNone(store.expiry_time(start))
+
+
+class FakeModel(torch.nn.Module):
+    """Stands in for a Whisper model: detects English and transcribes " hi"."""
+
+    device = "cpu"
+
+    class dims:
+        n_mels = 80
+
+    def detect_language(self, mel):
+        return None, {"en": 0.9, "de": 0.1}
+
+    def transcribe(self, audio, **decode_options):
+        return {"text": " hi", "segments": [], "language": decode_options["language"]}
+
+
+class StreamingLanguageDetectionTests(TestCase):
+    def setUp(self):
+        temporary_directory(self, result_cache, "CACHE_DIR")
+        for target, name, value in (
+            (views, "MODEL_POOL", ModelPool()),
+            (views, "_pooled_model", lambda name, precision: (name, FakeModel)),
+            (views, "get_stream_duration", lambda *args: 60.0),
+            (views, "_record_transcription", lambda *args: None),
+            (store, "load_result", lambda key: None),
+            (streaming, "decode_windows", self.decode_windows),
+        ):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    @staticmethod
+    def decode_windows(file_path, seconds):
+        for _ in range(3):
+            yield np.zeros(SAMPLE_RATE, np.float32)
+
+    def options(self, model, detector):
+        return {
+            "model_choice": model,
+            "language": "",
+            "temperature": 0.0,
+            "best_of": 5,
+            "condition_on_previous_text": True,
+            "precision": "fp32",
+            "language_detection": detector,
+            "vad": False,
+        }
+
+    def test_detected_language_is_used(self):
+        result = views.transcribe_file(self.path, self.options("base", "tiny"))
+        self.assertEqual(result["language"], "en")
+
+    def test_models_leased_the_other_way_round(self):
+        # Both jobs detect their language at the same time, each with the model the
+        # other transcribes with; neither may hold its own model while it waits
+        barrier = threading.Barrier(2, timeout=5)
+        detect_language = views.detect_language
+
+        def detect_together(*args):
+            barrier.wait()
+            return detect_language(*args)
+
+        results = []
+        with mock.patch.object(views, "detect_language", detect_together):
+            threads = [
+                threading.Thread(
+                    target=lambda options: results.append(
+                        views.transcribe_file(self.path, options)
+                    ),
+                    args=(self.options(model, detector),),
+                    daemon=True,
+                )
+                for model, detector in (("base", "tiny"), ("tiny", "base"))
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        self.assertEqual(len(results), 2)
+
+
+class LeaseTimingTests(TestCase):
+    def test_lease_wait_is_its_own_stage(self):
+        pool = ModelPool()
+        held = threading.Event()
+
+        def hold():
+            # Another job holds the model for 0.2s
+            with pool.lock("tiny"):
+                held.set()
+                time.sleep(0.2)
 
-# Create your tests here.
+        threading.Thread(target=hold).start()
+        held.wait(5)
+        with mock.patch.object(views, "MODEL_POOL", pool), mock.patch.object(
+            views, "_pooled_model", lambda name, precision: (name, FakeModel)
+        ), mock.patch.object(metrics.STAGE_SECONDS, "observe") as observe:
+            with views.lease_whisper_model("tiny") as model:
+                self.assertIsInstance(model, FakeModel)
+        seconds = {
+            call.kwargs["stage"]: call.args[0] for call in observe.call_args_list
+        }
+        self.assertGreater(seconds["model_lease_wait"], 0.1)
+        self.assertLess(seconds["model_lookup"], 0.1)
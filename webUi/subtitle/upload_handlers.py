@@ -0,0 +1,34 @@
+import time
+
+from django.core.files.uploadhandler import FileUploadHandler
+
+from . import metrics
+
+
+class UploadTimingHandler(FileUploadHandler):
+    """
+    Records how long Django takes to receive and parse a multipart request body
+    as the "upload_read" pipeline stage. The body is read by whatever accesses
+    request.POST first (usually CsrfViewMiddleware, before the view runs), so it
+    is timed here, from the start of parsing until the last handler is done.
+    Must come first in FILE_UPLOAD_HANDLERS; it passes all data on unchanged.
+    """
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        self.start_time = time.perf_counter()
+
+    def receive_data_chunk(self, raw_data, start):
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+    def upload_interrupted(self):
+        metrics.STAGE_ERRORS.inc(stage="upload_read")
+
+    def upload_complete(self):
+        metrics.STAGE_SECONDS.observe(
+            time.perf_counter() - self.start_time, stage="upload_read"
+        )
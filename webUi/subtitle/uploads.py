@@ -0,0 +1,206 @@
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import logging
+
+from django.conf import settings
+from django.utils.text import get_valid_filename
+
+logger = logging.getLogger(__name__)
+
+# Chunked uploads in progress: <id>.part (the file, written in place), <id>.json
+# (name and size) and <id>.ranges/ (one empty file per written byte range)
+UPLOAD_DIR = os.path.join(settings.BASE_DIR, "uploads")
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+# Unfinished uploads older than this many hours are removed by cleanup()
+EXPIRY_HOURS = getattr(settings, "SUBTITLE_UPLOAD_EXPIRY_HOURS", 24)
+
+# Largest upload that may be started, in bytes; None allows any size
+MAX_BYTES = getattr(settings, "SUBTITLE_MAX_UPLOAD_BYTES", 4 * 1024**3)
+# Unfinished uploads that may exist at once; None allows any number
+MAX_OPEN = getattr(settings, "SUBTITLE_MAX_OPEN_UPLOADS", 100)
+
+# Request bodies are copied to disk in pieces of this size, whatever the chunk size
+COPY_BUFFER_BYTES = 1024 * 1024
+
+
+class UploadError(ValueError):
+    """Raised for requests that do not fit the upload, e.g. a chunk past its end."""
+
+
+class TooManyUploads(UploadError):
+    """Raised by create() when MAX_OPEN uploads are already in progress."""
+
+
+def _path(upload_id, suffix):
+    return os.path.join(UPLOAD_DIR, f"{upload_id}{suffix}")
+
+
+def _load(upload_id):
+    # IDs are generated by create(); anything else could point outside UPLOAD_DIR
+    if not re.fullmatch(r"[0-9a-f]{32}", upload_id):
+        return None
+    try:
+        with open(_path(upload_id, ".json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def create(filename, size):
+    """
+    Starts an upload of size bytes and returns its ID. The destination file is
+    created at its full (sparse) size so chunks can be written in any order.
+    Raises UploadError for sizes above MAX_BYTES and TooManyUploads when
+    MAX_OPEN uploads are unfinished.
+    """
+    if size < 0:
+        raise UploadError("The upload size must not be negative.")
+    if MAX_BYTES is not None and size > MAX_BYTES:
+        raise UploadError(f"Uploads may be at most {MAX_BYTES} bytes.")
+    if MAX_OPEN is not None and open_uploads() >= MAX_OPEN:
+        raise TooManyUploads("Too many uploads are in progress; try again later.")
+    upload_id = uuid.uuid4().hex
+    os.makedirs(_path(upload_id, ".ranges"))
+    with open(_path(upload_id, ".part"), "wb") as f:
+        f.truncate(size)
+    with open(_path(upload_id, ".json"), "w", encoding="utf-8") as f:
+        json.dump({"filename": filename, "size": size, "created_at": time.time()}, f)
+    logger.info(f"Started upload {upload_id} of '{filename}' ({size} bytes).")
+    return upload_id
+
+
+def open_uploads():
+    """Returns the number of unfinished uploads."""
+    return sum(1 for name in os.listdir(UPLOAD_DIR) if name.endswith(".json"))
+
+
+def _received_ranges(upload_id):
+    ranges = sorted(
+        tuple(map(int, name.split("-")))
+        for name in os.listdir(_path(upload_id, ".ranges"))
+    )
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def status(upload_id):
+    """
+    Returns the state of an upload, or None if it is unknown: its size, the
+    byte ranges still missing and the offset to resume from (the first gap).
+    """
+    upload = _load(upload_id)
+    if upload is None:
+        return None
+    missing = []
+    position = 0
+    for start, end in _received_ranges(upload_id) + [[upload["size"]] * 2]:
+        if start > position:
+            missing.append([position, start])
+        position = max(position, end)
+    return {
+        "upload_id": upload_id,
+        "filename": upload["filename"],
+        "size": upload["size"],
+        "received": upload["size"] - sum(end - start for start, end in missing),
+        "offset": missing[0][0] if missing else upload["size"],
+        "missing": missing,
+        "complete": not missing,
+    }
+
+
+def write_chunk(upload_id, offset, stream, length):
+    """
+    Copies length bytes from stream into the upload at offset, a buffer at a time.
+    Whatever arrived before a dropped connection is kept, so the client can resume.
+    Returns the number of bytes written.
+    """
+    upload = _load(upload_id)
+    if upload is None:
+        raise UploadError("Unknown upload.")
+    if offset < 0 or length < 0 or offset + length > upload["size"]:
+        raise UploadError(
+            f"Bytes {offset}-{offset + length} do not fit in {upload['size']} bytes."
+        )
+    written = 0
+    try:
+        with open(_path(upload_id, ".part"), "r+b") as f:
+            f.seek(offset)
+            while written < length:
+                data = stream.read(min(COPY_BUFFER_BYTES, length - written))
+                if not data:
+                    break
+                f.write(data)
+                written += len(data)
+    finally:
+        if written:
+            # Recorded once the bytes are in the file; concurrent chunks never share a name
+            open(
+                os.path.join(
+                    _path(upload_id, ".ranges"), f"{offset}-{offset + written}"
+                ),
+                "w",
+            ).close()
+    return written
+
+
+def file_path(upload_id):
+    """Returns the path of the file an upload is written to."""
+    return _path(upload_id, ".part")
+
+
+def finish(upload_id):
+    """
+    Turns a complete upload into a file for transcription.
+    Returns its path and the sanitized base name of the uploaded file.
+    """
+    upload_status = status(upload_id)
+    if upload_status is None:
+        raise UploadError("Unknown upload.")
+    if not upload_status["complete"]:
+        raise UploadError("The upload is not complete.")
+    original_name, ext = os.path.splitext(upload_status["filename"])
+    safe_base_name = get_valid_filename(original_name or "audio")
+    ext = f".{get_valid_filename(ext[1:])}" if ext[1:] else ""
+    file_path = _path(upload_id, f"_{safe_base_name}{ext}")
+    try:
+        os.replace(_path(upload_id, ".part"), file_path)
+    except FileNotFoundError:
+        # A concurrent request finished (or discarded) it first
+        raise UploadError("The upload is already complete.")
+    discard(upload_id)
+    return file_path, safe_base_name
+
+
+def discard(upload_id):
+    """Removes an upload and everything received for it."""
+    shutil.rmtree(_path(upload_id, ".ranges"), ignore_errors=True)
+    for suffix in (".part", ".json"):
+        try:
+            os.remove(_path(upload_id, suffix))
+        except FileNotFoundError:
+            pass
+
+
+def cleanup(now=None):
+    """Removes unfinished uploads older than EXPIRY_HOURS; returns how many."""
+    if EXPIRY_HOURS is None:
+        return 0
+    cutoff = (now or time.time()) - EXPIRY_HOURS * 3600
+    removed = 0
+    for name in os.listdir(UPLOAD_DIR):
+        upload_id, ext = os.path.splitext(name)
+        upload = _load(upload_id) if ext == ".json" else None
+        if upload is not None and upload["created_at"] < cutoff:
+            discard(upload_id)
+            removed += 1
+    return removed
@@ -1,7 +1,45 @@
 from django.urls import path
-from .views import transcribe_audio, model_management
+from .async_views import (
+    transcribe_audio_async,
+    model_management_async,
+    create_job_async,
+    job_status_async,
+    job_events_async,
+)
+from .views import (
+    transcribe_audio,
+    model_management,
+    create_job,
+    job_status,
+    job_download,
+    job_events,
+    find_jobs,
+    queue_view,
+    create_upload,
+    upload_detail,
+    complete_upload,
+    readiness,
+    metrics_view,
+)
 
 urlpatterns = [
     path("", transcribe_audio, name="transcribe_audio"),
     path("models/", model_management, name="model_management"),
+    path("jobs/", create_job, name="create_job"),
+    path("jobs/<str:job_id>/", job_status, name="job_status"),
+    path("jobs/<str:job_id>/download/", job_download, name="job_download"),
+    path("jobs/<str:job_id>/events/", job_events, name="job_events"),
+    path("uploads/", create_upload, name="create_upload"),
+    path("uploads/<str:upload_id>/", upload_detail, name="upload_detail"),
+    path("uploads/<str:upload_id>/complete/", complete_upload, name="complete_upload"),
+    path("results/<str:audio_hash>/", find_jobs, name="find_jobs"),
+    path("queue/", queue_view, name="queue"),
+    path("ready/", readiness, name="readiness"),
+    path("metrics/", metrics_view, name="metrics"),
+    # Async variants for ASGI servers
+    path("async/", transcribe_audio_async, name="transcribe_audio_async"),
+    path("async/models/", model_management_async, name="model_management_async"),
+    path("async/jobs/", create_job_async, name="create_job_async"),
+    path("async/jobs/<str:job_id>/", job_status_async, name="job_status_async"),
+    path("async/jobs/<str:job_id>/events/", job_events_async, name="job_events_async"),
 ]
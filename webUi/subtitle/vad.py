@@ -0,0 +1,106 @@
+import numpy as np
+from whisper.audio import SAMPLE_RATE, FRAMES_PER_SECOND
+
+from .chunking import ENERGY_FRAME_SECONDS, frame_energy
+
+# Frames quieter than this are never speech
+MIN_SPEECH_DB = -50.0
+# Speech must be this much louder than the noise floor (10th percentile of frames)...
+NOISE_MARGIN_DB = 10.0
+# ...but the threshold stays this far below the loud parts (90th percentile), so
+# recordings that are speech throughout are kept whole
+LOUD_MARGIN_DB = 25.0
+
+
+def speech_regions(
+    audio,
+    min_speech_seconds=0.25,
+    min_silence_seconds=1.0,
+    padding_seconds=0.3,
+):
+    """
+    Finds speech in audio by frame energy against an adaptive threshold.
+    Pauses shorter than min_silence_seconds are kept, bursts shorter than
+    min_speech_seconds are dropped and each region is padded by padding_seconds.
+    Returns a sorted list of non-overlapping (start_sample, end_sample) tuples.
+    """
+    energy = frame_energy(audio)
+    if not len(energy):
+        return []
+    level = 20 * np.log10(energy + 1e-10)
+    threshold = max(
+        MIN_SPEECH_DB,
+        min(
+            np.percentile(level, 10) + NOISE_MARGIN_DB,
+            np.percentile(level, 90) - LOUD_MARGIN_DB,
+        ),
+    )
+    speech = np.concatenate(([False], level > threshold, [False]))
+    # Runs of speech frames as [start, end) frame indices
+    edges = np.flatnonzero(np.diff(speech.astype(np.int8)))
+    runs = edges.reshape(-1, 2)
+
+    regions = []
+    for start, end in runs:
+        if (
+            regions
+            and start - regions[-1][1] < min_silence_seconds / ENERGY_FRAME_SECONDS
+        ):
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+    frame_length = int(ENERGY_FRAME_SECONDS * SAMPLE_RATE)
+    padding = int(padding_seconds * SAMPLE_RATE)
+    padded = []
+    for start, end in regions:
+        if (end - start) * ENERGY_FRAME_SECONDS < min_speech_seconds:
+            continue
+        start = max(0, int(start) * frame_length - padding)
+        end = min(len(audio), int(end) * frame_length + padding)
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], end)
+        else:
+            padded.append((start, end))
+    return padded
+
+
+def remove_non_speech(audio, regions):
+    """Returns the speech regions of audio joined into one array."""
+    return np.concatenate([audio[start:end] for start, end in regions])
+
+
+def restore_timeline(result, regions):
+    """
+    Maps the timestamps of a result decoded from remove_non_speech() audio back
+    onto the original audio, returning a new result.
+    """
+    starts = np.array([start for start, _ in regions]) / SAMPLE_RATE
+    lengths = np.array([end - start for start, end in regions]) / SAMPLE_RATE
+    offsets = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+
+    def original_time(t, end=False):
+        # An end time on a region boundary belongs to the region before it
+        index = np.searchsorted(offsets, t, side="left" if end else "right") - 1
+        index = max(0, index)
+        return float(starts[index] + min(t - offsets[index], lengths[index]))
+
+    segments = []
+    for segment in result["segments"]:
+        segment = dict(segment)
+        segment["seek"] = round(
+            original_time(segment.get("seek", 0) / FRAMES_PER_SECOND)
+            * FRAMES_PER_SECOND
+        )
+        segment["start"] = original_time(segment["start"])
+        segment["end"] = original_time(segment["end"], end=True)
+        if "words" in segment:
+            segment["words"] = [
+                dict(
+                    word,
+                    start=original_time(word["start"]),
+                    end=original_time(word["end"], end=True),
+                )
+                for word in segment["words"]
+            ]
+        segments.append(segment)
+    return dict(result, segments=segments)
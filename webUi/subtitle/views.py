@@ -1,19 +1,56 @@
 import os
+import re
+import time
 import shutil
 import whisper
 import mimetypes
 import json
 import urllib.parse  # For URL encoding the filename
 import logging
+import threading
+import itertools
+import numpy as np
 import torch
 
+from contextlib import ExitStack, closing, contextmanager
+
 from django.shortcuts import render
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse, Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.http import (
+    require_GET,
+    require_http_methods,
+    require_POST,
+)
 from django.conf import settings
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from django.db import DatabaseError
 from django.utils.text import get_valid_filename  # For sanitizing filenames
-from .forms import AudioUploadForm
+from .forms import AudioUploadForm, TranscriptionOptionsForm
+from .model_pool import ModelPool
+from .precision import (
+    PRECISIONS,
+    load_model as load_cpu_model,
+    model_key,
+    remove_converted,
+)
+from . import (
+    admission,
+    audio_cache,
+    batching,
+    chunking,
+    inference_server,
+    jobs,
+    metrics,
+    model_selection,
+    progress,
+    rendering,
+    result_cache,
+    store,
+    streaming,
+    uploads,
+    vad,
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -22,48 +59,210 @@ logger = logging.getLogger(__name__)
 MODEL_DIR = os.path.join(settings.BASE_DIR, "openaiWhisperModels")
 os.makedirs(MODEL_DIR, exist_ok=True)
 
-# Global model cache for optimization
-MODEL_CACHE = {}
+# bf16 and int8 copies of the checkpoints, converted once for CPU inference, and the
+# fp32 copies that are memory-mapped when SUBTITLE_MMAP_WEIGHTS is enabled
+CONVERTED_MODEL_DIR = os.path.join(settings.BASE_DIR, "convertedWhisperModels")
+
+# Weight precision used on CPU when a request does not choose one (fp32, bf16 or int8)
+CPU_PRECISION = getattr(settings, "SUBTITLE_CPU_PRECISION", "fp32")
+
+# Memory-map CPU model weights so worker processes share one copy through the page cache
+MMAP_WEIGHTS = getattr(settings, "SUBTITLE_MMAP_WEIGHTS", True)
+
+# Audio longer than this many seconds is split into chunks that are transcribed
+# in parallel by SUBTITLE_CHUNK_WORKERS CPU processes (disabled below 2 workers)
+LONG_AUDIO_SECONDS = getattr(settings, "SUBTITLE_LONG_AUDIO_SECONDS", 600)
+CHUNK_SECONDS = getattr(settings, "SUBTITLE_CHUNK_SECONDS", 120)
+CHUNK_WORKERS = getattr(settings, "SUBTITLE_CHUNK_WORKERS", 0)
+
+# Cross-request batching: concurrent jobs on the same model and decoding options
+# have their 30-second windows decoded together in batches of up to
+# SUBTITLE_BATCH_SIZE, waiting at most SUBTITLE_BATCH_WAIT_MS for more windows
+BATCHED_DECODING = getattr(settings, "SUBTITLE_BATCHED_DECODING", False)
+BATCH_SIZE = getattr(settings, "SUBTITLE_BATCH_SIZE", 8)
+BATCH_WAIT_MS = getattr(settings, "SUBTITLE_BATCH_WAIT_MS", 50)
+
+# Model that detects the language of requests without one when the form leaves it to
+# the server: "tiny" or "base" decode only the first 30 seconds, None leaves detection
+# to the transcription model
+LANGUAGE_DETECTION_MODEL = getattr(settings, "SUBTITLE_LANGUAGE_DETECTION_MODEL", None)
+
+# Skip non-speech audio (found by frame energy) before inference, unless the request
+# chooses otherwise; timestamps are mapped back onto the original audio
+VAD = getattr(settings, "SUBTITLE_VAD", False)
+
+# Uploads at least this long are transcribed window by window while ffmpeg decodes them,
+# instead of being decoded whole first, so memory does not grow with their length
+STREAM_DECODING = getattr(settings, "SUBTITLE_STREAM_DECODING", True)
+STREAM_MIN_SECONDS = getattr(settings, "SUBTITLE_STREAM_MIN_SECONDS", 600)
+STREAM_WINDOW_SECONDS = getattr(settings, "SUBTITLE_STREAM_WINDOW_SECONDS", 120)
+
+# Address of a separate inference process ("host:port" or a socket path) that owns
+# the models; when set, web workers send transcriptions there (see inference_server)
+INFERENCE_SERVER = getattr(settings, "SUBTITLE_INFERENCE_SERVER", None)
+
+# How often the event stream of a running job checks for new segments
+EVENT_POLL_SECONDS = 0.5
+
+# Checksums of verified model files, keyed by file name
+VERIFIED_FILES_PATH = os.path.join(MODEL_DIR, ".verified.json")
+VERIFY_LOCK = threading.Lock()
+
+# Set once startup checks and model warm-up have finished (see apps.py)
+STARTUP_COMPLETE = threading.Event()
+
+# Directory (relative to default_storage) for uploads and rendered outputs
+TEMP_DIR = "temp"
+
+# Shared pool of loaded models, bounded by SUBTITLE_MODEL_MEMORY_BUDGET bytes
+MODEL_POOL = ModelPool(getattr(settings, "SUBTITLE_MODEL_MEMORY_BUDGET", None))
 
 
 def get_downloaded_models():
     """Returns a list of downloaded model names."""
     try:
-        return os.listdir(MODEL_DIR)
+        return sorted(
+            name for name in os.listdir(MODEL_DIR) if not name.startswith(".")
+        )
     except FileNotFoundError:
         return []
 
 
+def model_file_path(model_name):
+    """Returns the checkpoint path Whisper uses for a model name inside MODEL_DIR."""
+    return os.path.join(MODEL_DIR, os.path.basename(whisper._MODELS[model_name]))
+
+
+def _expected_sha256(model_name):
+    # Whisper publishes each checkpoint under a URL containing its SHA256
+    return whisper._MODELS[model_name].split("/")[-2]
+
+
+def _load_verified_files():
+    try:
+        with open(VERIFIED_FILES_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_verified_files(verified):
+    temp_path = f"{VERIFIED_FILES_PATH}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(verified, f, indent=4)
+    os.replace(temp_path, VERIFIED_FILES_PATH)
+
+
+def verify_model(model_name):
+    """
+    Checks a downloaded checkpoint against its published SHA256.
+    The result is remembered by file size and modification time, so unchanged
+    files are only hashed once.
+    """
+    path = model_file_path(model_name)
+    if not os.path.isfile(path):
+        return False
+    expected = _expected_sha256(model_name)
+    with VERIFY_LOCK:
+        verified = _load_verified_files()
+        if verified.get(os.path.basename(path)) == _file_stamp(path, expected):
+            return True
+        if result_cache.hash_file(path) != expected:
+            logger.warning(f"Checksum mismatch for '{model_name}' model at {path}.")
+            return False
+        verified[os.path.basename(path)] = _file_stamp(path, expected)
+        _save_verified_files(verified)
+    return True
+
+
+def _file_stamp(path, sha256):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+
+
+def _fetch_model(model_name):
+    # whisper._download checks the SHA256 of the downloaded file itself
+    path = whisper._download(whisper._MODELS[model_name], MODEL_DIR, in_memory=False)
+    with VERIFY_LOCK:
+        verified = _load_verified_files()
+        verified[os.path.basename(path)] = _file_stamp(
+            path, _expected_sha256(model_name)
+        )
+        _save_verified_files(verified)
+    # Invalidate cache for the model
+    _discard_models_for_file(os.path.basename(path))
+
+
 def download_model(model_name):
-    """Download a model if it doesn't exist locally."""
-    model_path = os.path.join(MODEL_DIR, model_name)
-    if not os.path.exists(model_path):
-        try:
-            _ = whisper.load_model(model_name, download_root=MODEL_DIR)
-        except RuntimeError as e:
-            if "SHA256 checksum does not" in str(e):
-                if os.path.exists(model_path):
-                    shutil.rmtree(model_path)
-                _ = whisper.load_model(model_name, download_root=MODEL_DIR)
-            else:
-                raise e
-        # Invalidate cache for the model
-        if model_name in MODEL_CACHE:
-            del MODEL_CACHE[model_name]
-        return True
-    return False
+    """Download a model if it is missing locally or fails checksum verification."""
+    if verify_model(model_name):
+        return False
+    _fetch_model(model_name)
+    return True
 
 
 def update_model(model_name):
-    """Update a model by removing the old folder and re-downloading."""
-    model_path = os.path.join(MODEL_DIR, model_name)
+    """Update a model by removing the old file and re-downloading."""
+    model_path = model_file_path(model_name)
     if os.path.exists(model_path):
-        shutil.rmtree(model_path)
-    if model_name in MODEL_CACHE:
-        del MODEL_CACHE[model_name]
+        os.remove(model_path)
+    _discard_models_for_file(os.path.basename(model_path))
     return download_model(model_name)
 
 
+def delete_model_file(file_name):
+    """Removes a downloaded model file (as listed by get_downloaded_models)."""
+    model_path = os.path.join(MODEL_DIR, os.path.basename(file_name))
+    if os.path.isdir(model_path):
+        shutil.rmtree(model_path)
+    elif os.path.exists(model_path):
+        os.remove(model_path)
+    _discard_models_for_file(os.path.basename(file_name))
+
+
+def _discard_models_for_file(file_name):
+    if INFERENCE_SERVER:
+        try:
+            inference_server.discard_models(INFERENCE_SERVER, file_name)
+        except inference_server.InferenceServerError as e:
+            logger.warning(f"Could not unload models on the inference server: {e}")
+    # Several model names share one checkpoint, e.g. "turbo" and "large-v3-turbo"
+    for model_name in whisper.available_models():
+        if os.path.basename(whisper._MODELS[model_name]) == file_name:
+            for precision in PRECISIONS:
+                MODEL_POOL.discard(model_key(model_name, precision))
+            remove_converted(model_name, CONVERTED_MODEL_DIR)
+
+
+def verify_downloaded_models():
+    """Re-downloads downloaded checkpoints that are corrupt; valid files are kept."""
+    checked_files = set()
+    for model_name in whisper.available_models():
+        path = model_file_path(model_name)
+        if path in checked_files or not os.path.exists(path):
+            continue
+        checked_files.add(path)
+        if not verify_model(model_name):
+            logger.warning(f"Re-downloading corrupt '{model_name}' model.")
+            _fetch_model(model_name)
+
+
+def warm_up_models(model_names):
+    """Loads models into the model pool and runs a short dummy decode on each."""
+    for model_name in model_names:
+        start_time = time.perf_counter()
+        # Leased like any decode, as requests may already be using the model
+        with lease_whisper_model(model_name, get_precision({})) as model:
+            model.transcribe(
+                np.zeros(whisper.audio.SAMPLE_RATE, dtype=np.float32),
+                language="en",
+                fp16=torch.cuda.is_available(),
+            )
+        logger.info(
+            f"Warmed up '{model_name}' model in {time.perf_counter() - start_time:.1f}s."
+        )
+
+
 def model_management(request):
     """Handles model download, update, and deletion requests."""
     downloaded_models = get_downloaded_models()
@@ -75,13 +274,18 @@ def model_management(request):
         elif action == "update":
             update_model(model_name)
         elif action == "delete":
-            model_path = os.path.join(MODEL_DIR, model_name)
-            if os.path.exists(model_path):
-                shutil.rmtree(model_path)
-            if model_name in MODEL_CACHE:
-                del MODEL_CACHE[model_name]
+            delete_model_file(model_name)
         downloaded_models = get_downloaded_models()
-    return render(request, "model_management.html", {"models": downloaded_models})
+    return render(
+        request,
+        "model_management.html",
+        {
+            "models": downloaded_models,
+            "model_pool": MODEL_POOL.stats(),
+            "result_cache": result_cache.stats(),
+            "audio_cache": audio_cache.stats(),
+        },
+    )
 
 
 def format_subtitle_text(text, max_words, mode):
@@ -105,8 +309,9 @@ def format_time(seconds, fmt="srt"):
     For SRT: returns HH:MM:SS,mmm.
     For VTT: returns HH:MM:SS.mmm.
     """
-    millisec = int(round((seconds % 1) * 1000))
-    seconds_int = int(seconds)
+    # Round the total so that e.g. 1.9996 becomes 00:00:02,000 rather than 00:00:01,1000
+    total_millisec = int(round(seconds * 1000))
+    seconds_int, millisec = divmod(total_millisec, 1000)
     minutes = seconds_int // 60
     hours = minutes // 60
     minutes = minutes % 60
@@ -117,24 +322,562 @@ def format_time(seconds, fmt="srt"):
 
 
 def write_subtitles(
-    file_handle, segments, max_subtitle_length, max_length_mode, fmt="srt"
+    file_handle,
+    segments,
+    max_subtitle_length,
+    max_length_mode,
+    fmt="srt",
+    start_index=0,
 ):
     """
     Writes subtitle segments to an open file handle.
     Uses the appropriate timestamp format based on fmt.
+    Cues are numbered from start_index + 1.
+    """
+    file_handle.write(
+        rendering.render_cues(
+            segments, max_subtitle_length, max_length_mode, fmt, start_index
+        )
+    )
+
+
+def get_transcription_options(cleaned_data):
+    """Collects the transcription and output options from a valid AudioUploadForm."""
+    return {
+        "model_choice": cleaned_data["model_choice"],
+        "language": cleaned_data["language"] or None,
+        "temperature": cleaned_data["temperature"],
+        "best_of": cleaned_data["best_of"],
+        "condition_on_previous_text": (
+            cleaned_data["condition_on_previous_text"] == "true"
+        ),
+        "output_format": cleaned_data["output_format"],
+        "max_subtitle_length": cleaned_data.get("max_subtitle_length", 3),
+        "max_length_mode": cleaned_data.get("max_length_mode", "line"),
+        "precision": cleaned_data.get("precision", ""),
+        "language_detection": cleaned_data.get("language_detection", ""),
+        "vad": cleaned_data.get("vad", ""),
+        "deadline_minutes": cleaned_data.get("deadline_minutes"),
+    }
+
+
+def save_audio_settings(request, form):
+    """Saves the form settings in the session for future use."""
+    request.session["audio_settings"] = {
+        "model_choice": form.cleaned_data["model_choice"],
+        "language": form.cleaned_data["language"],
+        "temperature": form.cleaned_data["temperature"],
+        "best_of": form.cleaned_data["best_of"],
+        "condition_on_previous_text": form.cleaned_data["condition_on_previous_text"],
+        "output_format": form.cleaned_data["output_format"],
+        "max_subtitle_length": form.cleaned_data["max_subtitle_length"],
+        "max_length_mode": form.cleaned_data["max_length_mode"],
+        "precision": form.cleaned_data["precision"],
+        "language_detection": form.cleaned_data["language_detection"],
+        "vad": form.cleaned_data["vad"],
+        "deadline_minutes": form.cleaned_data["deadline_minutes"],
+    }
+
+
+def save_upload(audio_file):
     """
-    for i, segment in enumerate(segments):
-        start_time = segment["start"]
-        end_time = segment["end"]
-        text = segment["text"]
-        formatted_text = format_subtitle_text(
-            text, max_subtitle_length, max_length_mode
+    Saves an uploaded audio file under temp/.
+    Returns the stored file path and the sanitized base name.
+    """
+    original_name, ext = os.path.splitext(audio_file.name)
+    safe_base_name = get_valid_filename(original_name)
+    safe_audio_file_name = f"{safe_base_name}{ext}"
+    with metrics.stage("upload_save"):
+        # Storage copies the upload in chunks instead of reading it into memory
+        file_path = default_storage.save(
+            os.path.join(TEMP_DIR, safe_audio_file_name), audio_file
+        )
+    return file_path, safe_base_name
+
+
+def initial_upload_form(request):
+    """Returns the upload form filled in with the settings saved in the session."""
+    return AudioUploadForm(initial=request.session.get("audio_settings", {}))
+
+
+def parse_upload(request):
+    """
+    Validates the upload form, saves its settings in the session and the file
+    under temp/. Returns the form, the file path and the sanitized base name;
+    the path is None if the form is invalid.
+    """
+    form = AudioUploadForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return form, None, None
+    save_audio_settings(request, form)
+    file_path, safe_base_name = save_upload(request.FILES["audio_file"])
+    return form, file_path, safe_base_name
+
+
+def start_job(request, form, file_path, safe_base_name, wait=False):
+    """
+    Queues the transcription of an upload saved by parse_upload() and returns
+    its Job, or with wait=True runs it in the calling thread. Raises
+    admission.Overloaded, after removing the file, if its queue is full.
+    """
+    options = get_transcription_options(form.cleaned_data)
+    try:
+        if wait:
+            return jobs.run_job(file_path, safe_base_name, options)
+        return jobs.submit_job(
+            file_path, safe_base_name, options, owner=request_owner(request)
+        )
+    except admission.Overloaded:
+        os.remove(file_path)
+        raise
+
+
+def finished_job_response(job):
+    """Returns the output of a job that has ended as a download; raises if it failed."""
+    if job.status != "finished":
+        raise RuntimeError(f"Transcription failed: {job.error}")
+    response = build_download_response(
+        job.output_file_path, job.safe_base_name, job.options["output_format"]
+    )
+    response["X-Transcription-Job"] = job.id
+    return response
+
+
+def request_owner(request):
+    """Identifies who sent a request for fair scheduling: the user or the client address."""
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    return request.META.get("REMOTE_ADDR")
+
+
+def get_device():
+    """Returns the device used for inference (GPU if available)."""
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def get_decode_options(options):
+    """Returns the keyword arguments passed to model.transcribe()."""
+    return {
+        "language": options["language"],
+        "temperature": options["temperature"],
+        "best_of": options["best_of"],
+        "condition_on_previous_text": options["condition_on_previous_text"],
+    }
+
+
+def get_precision(options):
+    """
+    Returns the weight precision for a request: its own choice or SUBTITLE_CPU_PRECISION
+    on CPU, and always fp32 weights on GPU (where Whisper decodes in fp16).
+    """
+    if get_device() != "cpu":
+        return "fp32"
+    return options.get("precision") or CPU_PRECISION
+
+
+def get_language_detector(options):
+    """
+    Returns the model that detects the language of a request before it is
+    transcribed, or "" when the language is given or left to the transcription model.
+    """
+    if options["language"]:
+        return ""
+    detector = options.get("language_detection") or LANGUAGE_DETECTION_MODEL or "model"
+    return "" if detector == "model" else detector
+
+
+def get_vad(options):
+    """Returns whether non-speech audio is skipped: the request's choice or SUBTITLE_VAD."""
+    choice = options.get("vad")
+    if choice in (True, False):
+        return choice
+    return {"true": True, "false": False}.get(choice, VAD)
+
+
+def get_stream_duration(file_path, audio_hash, options, device):
+    """
+    Returns the duration of file_path if it is to be transcribed while ffmpeg
+    decodes it (see streaming.py), else None. Voice activity detection, batched and
+    chunked decoding need the whole waveform, and cached audio is already decoded.
+    """
+    if (
+        not STREAM_DECODING
+        or options["vad"]
+        or (BATCHED_DECODING and not options["condition_on_previous_text"])
+        or (CHUNK_WORKERS > 1 and device == "cpu")
+        or audio_cache.is_cached(audio_hash)
+        or shutil.which("ffmpeg") is None
+    ):
+        return None
+    duration = admission.probe_duration(file_path)
+    return duration if duration >= STREAM_MIN_SECONDS else None
+
+
+def detect_language(audio, model_choice, precision="fp32"):
+    """
+    Detects the spoken language from the first 30 seconds of audio with a
+    (small) model from the model pool and returns its language code.
+    The model is leased, so detections and transcriptions sharing it take turns.
+    """
+    with lease_whisper_model(model_choice, precision) as model, metrics.stage(
+        "language_detection"
+    ):
+        mel = whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(audio[: whisper.audio.N_SAMPLES]), model.dims.n_mels
+        )
+        _, probs = model.detect_language(mel.to(model.device))
+    language = max(probs, key=probs.get)
+    logger.info(f"Detected language '{language}' with the '{model_choice}' model.")
+    return language
+
+
+def _pooled_model(model_choice, precision):
+    # The model pool key of a model and the function that loads it
+    device = get_device()
+    logger.info(f"Using device: {device}")
+
+    if device != "cpu":
+        precision = "fp32"
+
+    def loader():
+        if device == "cpu":
+            return load_cpu_model(
+                model_choice, precision, MODEL_DIR, CONVERTED_MODEL_DIR, MMAP_WEIGHTS
+            )
+        return whisper.load_model(model_choice, download_root=MODEL_DIR).to(device)
+
+    return model_key(model_choice, precision), loader
+
+
+def load_whisper_model(model_choice, precision="fp32"):
+    """
+    Returns a Whisper model from the model pool, loading or downloading it if
+    necessary. Decode with it only under lease_whisper_model().
+    """
+    key, loader = _pooled_model(model_choice, precision)
+    with metrics.stage("model_lookup"):
+        return MODEL_POOL.get(key, loader)
+
+
+@contextmanager
+def lease_whisper_model(model_choice, precision="fp32"):
+    """
+    Like load_whisper_model(), but the calling thread has exclusive use of the
+    model until the with block ends (see ModelPool.lease()). Other jobs on the
+    same model wait for it; the wait is recorded as the model_lease_wait stage.
+    """
+    key, loader = _pooled_model(model_choice, precision)
+    with ExitStack() as stack:
+        # Like MODEL_POOL.lease(), with the wait for other jobs timed on its own
+        with metrics.stage("model_lease_wait"):
+            stack.enter_context(MODEL_POOL.lock(key))
+        with metrics.stage("model_lookup"):
+            model = MODEL_POOL.get(key, loader)
+        yield model
+
+
+def transcribe_file(
+    file_path, options, progress_callback=None, segment_callback=None, stats=None
+):
+    """
+    Transcribes an audio file with the options from get_transcription_options().
+    If progress_callback is given it is called with the fraction of audio processed,
+    and segment_callback with each list of new segments as they are decoded.
+    Results are cached by audio content and decoding options, and kept in the
+    result store until they expire.
+    If stats is a dict it receives the audio hash, the result key and the timings.
+    With SUBTITLE_INFERENCE_SERVER set, the work is done by the inference server.
+    """
+    if options["model_choice"] == "auto":
+        # Jobs choose on admission; this covers callers such as bulk_transcribe
+        model_choice, _ = model_selection.choose_model(
+            admission.probe_duration(file_path),
+            model_selection.deadline_seconds(options),
+            get_precision(options),
+            get_device(),
+        )
+        options = dict(options, model_choice=model_choice)
+    if INFERENCE_SERVER:
+        return inference_server.transcribe(
+            INFERENCE_SERVER,
+            file_path,
+            options,
+            progress_callback,
+            segment_callback,
+            stats,
         )
-        file_handle.write(f"{i + 1}\n")
-        file_handle.write(
-            f"{format_time(start_time, fmt)} --> {format_time(end_time, fmt)}\n"
+    options = dict(
+        options,
+        precision=get_precision(options),
+        language_detection=get_language_detector(options),
+        vad=get_vad(options),
+    )
+    name = model_key(options["model_choice"], options["precision"])
+    # Reuse a stored result when the same audio was decoded with the same options
+    audio_hash = result_cache.hash_file(file_path)
+    key = result_cache.cache_key(audio_hash, options)
+    result = result_cache.get(key)
+    if result is None:
+        stored = store.load_result(key)
+        if stored is not None:
+            result, stored_seconds = stored
+            result_cache.put(key, result, stored_seconds or 0.0)
+    if stats is not None:
+        stats.update(
+            audio_hash=audio_hash,
+            cache_key=key,
+            cached=result is not None,
+            audio_seconds=None,
+            inference_seconds=None,
+            skipped_seconds=(result or {}).get("vad", {}).get("skipped_seconds"),
         )
-        file_handle.write(formatted_text + "\n\n")
+    device = get_device()
+    if result is not None:
+        metrics.TRANSCRIPTIONS.inc(model=name, device=device, cache="hit")
+        if segment_callback:
+            segment_callback(result["segments"])
+        if progress_callback:
+            progress_callback(1.0)
+        return result
+
+    stream_duration = get_stream_duration(file_path, audio_hash, options, device)
+    if stream_duration is not None:
+        decode_options = get_decode_options(options)
+        with closing(
+            streaming.decode_windows(file_path, STREAM_WINDOW_SECONDS)
+        ) as windows:
+            first_window = next(windows, None)
+            if options["language_detection"] and first_window is not None:
+                # Detected before the transcription model is leased: waiting for one
+                # model's lease while holding another's deadlocks against a job
+                # that uses the same two models the other way round
+                decode_options["language"] = detect_language(
+                    first_window, options["language_detection"], options["precision"]
+                )
+            with lease_whisper_model(
+                options["model_choice"], options["precision"]
+            ) as model, metrics.stage("transcribe"):
+                start_time = time.perf_counter()
+                result, audio_seconds = streaming.transcribe_stream(
+                    model,
+                    itertools.chain(
+                        [first_window] if first_window is not None else [], windows
+                    ),
+                    decode_options,
+                    stream_duration,
+                    progress_callback,
+                    segment_callback,
+                )
+        inference_seconds = time.perf_counter() - start_time
+        _record_transcription(
+            name,
+            device,
+            key,
+            audio_hash,
+            options,
+            result,
+            audio_seconds,
+            inference_seconds,
+            None,
+            stats,
+        )
+        return result
+
+    with metrics.stage("audio_decode"):
+        audio = audio_cache.load_audio(file_path, audio_hash)
+    audio_seconds = len(audio) / whisper.audio.SAMPLE_RATE
+    regions = None
+    if options["vad"]:
+        with metrics.stage("vad"):
+            regions = vad.speech_regions(audio)
+        if regions == [(0, len(audio))]:
+            regions = None
+        else:
+            # Only the speech is decoded; segments are moved back onto the original
+            # timeline, including those streamed while decoding
+            audio = vad.remove_non_speech(audio, regions) if regions else audio[:0]
+            if segment_callback and regions:
+                stream_segments = segment_callback
+
+                def segment_callback(segments):
+                    stream_segments(
+                        vad.restore_timeline({"segments": segments}, regions)[
+                            "segments"
+                        ]
+                    )
+
+    decode_options = get_decode_options(options)
+    if options["language_detection"] and len(audio):
+        # Detect once so the large model, its windows and chunks all use one language
+        decode_options["language"] = detect_language(
+            audio, options["language_detection"], options["precision"]
+        )
+    chunked = (
+        len(audio) > LONG_AUDIO_SECONDS * whisper.audio.SAMPLE_RATE
+        and CHUNK_WORKERS > 1
+        and device == "cpu"
+    )
+    batched = BATCHED_DECODING and not options["condition_on_previous_text"]
+    with ExitStack() as stack:
+        # Chunk workers load their own models; otherwise the model is loaded before
+        # inference is timed and leased for the whole decode, or for each batch by
+        # the batch scheduler
+        if chunked or not len(audio):
+            model = None
+        elif batched:
+            model = load_whisper_model(options["model_choice"], options["precision"])
+        else:
+            model = stack.enter_context(
+                lease_whisper_model(options["model_choice"], options["precision"])
+            )
+        start_time = time.perf_counter()
+        with metrics.stage("transcribe"):
+            if not len(audio):
+                # Voice activity detection found no speech
+                result = {
+                    "text": "",
+                    "segments": [],
+                    "language": decode_options["language"],
+                }
+            elif chunked:
+                # Long audio: decode silence-aligned chunks on several CPU processes
+                result = chunking.transcribe_chunked(
+                    audio,
+                    options["model_choice"],
+                    MODEL_DIR,
+                    decode_options,
+                    CHUNK_SECONDS,
+                    CHUNK_WORKERS,
+                    progress_callback,
+                    segment_callback,
+                    options["precision"],
+                    CONVERTED_MODEL_DIR,
+                    MMAP_WEIGHTS,
+                )
+            elif batched:
+                # Decode independent windows through the scheduler shared with other jobs
+                result = batching.transcribe_batched(
+                    model,
+                    MODEL_POOL.lock(name),
+                    name,
+                    audio,
+                    (
+                        audio_cache.load_mel(audio_hash, audio, model.dims.n_mels)
+                        if regions is None
+                        else whisper.log_mel_spectrogram(audio, model.dims.n_mels)
+                    ),
+                    decode_options,
+                    BATCH_SIZE,
+                    BATCH_WAIT_MS / 1000,
+                    progress_callback,
+                    segment_callback,
+                )
+            else:
+                result = progress.transcribe(
+                    model, audio, progress_callback, segment_callback, **decode_options
+                )
+        inference_seconds = time.perf_counter() - start_time
+    skipped_seconds = None
+    if options["vad"]:
+        if regions:
+            result = vad.restore_timeline(result, regions)
+        skipped_seconds = audio_seconds - len(audio) / whisper.audio.SAMPLE_RATE
+        result["vad"] = {
+            "speech_seconds": audio_seconds - skipped_seconds,
+            "skipped_seconds": skipped_seconds,
+        }
+        metrics.VAD_SKIPPED_SECONDS.inc(skipped_seconds)
+        logger.info(
+            f"Skipped {skipped_seconds:.1f}s of non-speech in {audio_seconds:.1f}s of audio."
+        )
+    _record_transcription(
+        name,
+        device,
+        key,
+        audio_hash,
+        options,
+        result,
+        audio_seconds,
+        inference_seconds,
+        skipped_seconds,
+        stats,
+    )
+    return result
+
+
+def _record_transcription(
+    name,
+    device,
+    key,
+    audio_hash,
+    options,
+    result,
+    audio_seconds,
+    inference_seconds,
+    skipped_seconds,
+    stats,
+):
+    # Metrics, the result cache and the result store for a freshly decoded result
+    metrics.observe_transcription(name, device, audio_seconds, inference_seconds)
+    result_cache.put(key, result, inference_seconds)
+    store.save_result(
+        key, audio_hash, options, result, audio_seconds, inference_seconds, device
+    )
+    if stats is not None:
+        stats.update(
+            audio_seconds=audio_seconds,
+            inference_seconds=inference_seconds,
+            skipped_seconds=skipped_seconds,
+        )
+
+
+def write_output(result, output_file_path, options, base_name=None):
+    """
+    Writes a transcription result to output_file_path in the requested format.
+    The "zip" format bundles every format; its entries are named after base_name
+    (by default the output file name without extension).
+    """
+    with metrics.stage("render"):
+        output_format = options["output_format"]
+        max_subtitle_length = options["max_subtitle_length"]
+        max_length_mode = options["max_length_mode"]
+
+        if output_format == "zip":
+            if base_name is None:
+                base_name = os.path.splitext(os.path.basename(output_file_path))[0]
+            with open(output_file_path, "wb") as zip_file:
+                zip_file.write(
+                    rendering.render_bundle(
+                        result, base_name, max_subtitle_length, max_length_mode
+                    )
+                )
+        elif output_format in rendering.FORMATS:
+            rendered = rendering.render(
+                result, [output_format], max_subtitle_length, max_length_mode
+            )
+            with open(output_file_path, "w", encoding="utf-8") as output_file:
+                output_file.write(rendered[output_format])
+        else:
+            raise ValueError("Unsupported output format.")
+
+
+def build_download_response(output_file_path, safe_base_name, file_extension):
+    """Returns the output file as an attachment with a UTF-8 safe filename."""
+    with metrics.stage("response"):
+        output_filename = f"{safe_base_name}.{file_extension}"
+        with open(output_file_path, "rb") as f:
+            response = HttpResponse(
+                f.read(), content_type=mimetypes.guess_type(output_filename)[0]
+            )
+        # Create an ASCII fallback filename
+        ascii_base = safe_base_name.encode("ascii", "ignore").decode("ascii")
+        fallback_filename = f"{ascii_base}.{file_extension}"
+        encoded_filename = urllib.parse.quote(output_filename)
+        response["Content-Disposition"] = (
+            f'attachment; filename="{fallback_filename}"; '
+            f"filename*=UTF-8''{encoded_filename}"
+        )
+        return response
 
 
 def transcribe_audio(request):
@@ -143,130 +886,450 @@ def transcribe_audio(request):
     and returns the transcription file in the requested output format.
     Also saves user settings in the session for persistence.
     """
-    # Load saved settings from session if they exist
-    saved_settings = request.session.get("audio_settings", {})
+    if request.method != "POST":
+        # Initialize form with saved settings if available
+        return render_upload_page(request, initial_upload_form(request))
+    form, file_path, safe_base_name = parse_upload(request)
+    if file_path is None:
+        return render_upload_page(request, form)
+    # Run as a stored job so the output can be fetched again from
+    # /jobs/<id>/download/ if this response never reaches the client
+    try:
+        job = start_job(request, form, file_path, safe_base_name, wait=True)
+    except admission.Overloaded as e:
+        form.add_error(None, str(e))
+        return render_upload_page(request, form, overloaded=e)
+    return finished_job_response(job)
 
-    if request.method == "POST":
-        form = AudioUploadForm(request.POST, request.FILES)
-        if form.is_valid():
-            # Save settings in session for future use
-            request.session["audio_settings"] = {
-                "model_choice": form.cleaned_data["model_choice"],
-                "language": form.cleaned_data["language"],
-                "temperature": form.cleaned_data["temperature"],
-                "best_of": form.cleaned_data["best_of"],
-                "condition_on_previous_text": form.cleaned_data[
-                    "condition_on_previous_text"
-                ],
-                "output_format": form.cleaned_data["output_format"],
-                "max_subtitle_length": form.cleaned_data["max_subtitle_length"],
-                "max_length_mode": form.cleaned_data["max_length_mode"],
-            }
-
-            # Save the uploaded audio file temporarily
-            audio_file = request.FILES["audio_file"]
-            original_name, ext = os.path.splitext(audio_file.name)
-            safe_base_name = get_valid_filename(original_name)
-            safe_audio_file_name = f"{safe_base_name}{ext}"
-            temp_dir = "temp"
-            file_path = default_storage.save(
-                os.path.join(temp_dir, safe_audio_file_name),
-                ContentFile(audio_file.read()),
+
+def render_upload_page(request, form, context=None, overloaded=None):
+    """
+    Renders the upload form with the current queue. Given the admission.Overloaded
+    error that turned a request away, responds with 429 and its Retry-After.
+    """
+    response = render(
+        request,
+        "upload.html",
+        {"form": form, "queue": admission.queue_status(), **(context or {})},
+        status=429 if overloaded else 200,
+    )
+    if overloaded:
+        response["Retry-After"] = str(overloaded.retry_after)
+    return response
+
+
+def overloaded_response(error):
+    """Returns the 429 JSON response for an admission.Overloaded error."""
+    response = JsonResponse(
+        {"errors": {"__all__": [str(error)]}, "queue": admission.queue_status()},
+        status=429,
+    )
+    response["Retry-After"] = str(error.retry_after)
+    return response
+
+
+@require_POST
+def create_job(request):
+    """
+    Queues an uploaded audio file for background transcription.
+    Returns the job ID immediately together with the status and download URLs.
+    """
+    form, file_path, safe_base_name = parse_upload(request)
+    if file_path is None:
+        return JsonResponse({"errors": form.errors}, status=400)
+    try:
+        job = start_job(request, form, file_path, safe_base_name)
+    except admission.Overloaded as e:
+        return overloaded_response(e)
+    return JsonResponse(_job_payload(job), status=202)
+
+
+@require_POST
+def create_upload(request):
+    """
+    Starts a chunked upload. Expects the file name and its size in bytes and
+    returns the upload ID and URLs; chunks are then PUT to upload_url.
+    """
+    try:
+        size = int(request.POST.get("size", ""))
+        upload_id = uploads.create(request.POST.get("filename") or "audio", size)
+    except uploads.TooManyUploads as e:
+        return JsonResponse({"errors": {"__all__": [str(e)]}}, status=503)
+    except (ValueError, uploads.UploadError) as e:
+        return JsonResponse({"errors": {"size": [str(e)]}}, status=400)
+    return JsonResponse(_upload_payload(uploads.status(upload_id)), status=201)
+
+
+@require_http_methods(["GET", "PUT", "DELETE"])
+def upload_detail(request, upload_id):
+    """
+    GET returns the received byte ranges and the offset to resume from.
+    PUT writes the request body at the byte offset given by a
+    "Content-Range: bytes start-end/size" header or ?offset=; chunks may be
+    sent in parallel. DELETE abandons the upload.
+    """
+    upload_status = uploads.status(upload_id)
+    if upload_status is None:
+        raise Http404("Unknown upload.")
+    if request.method == "DELETE":
+        uploads.discard(upload_id)
+        return HttpResponse(status=204)
+    if request.method == "PUT":
+        content_range = re.fullmatch(
+            r"bytes (\d+)-\d+/(\d+|\*)", request.headers.get("Content-Range", "")
+        )
+        try:
+            offset = int(
+                content_range.group(1)
+                if content_range
+                else request.GET.get("offset", "")
             )
+            length = int(request.headers.get("Content-Length") or 0)
+            with metrics.stage("upload_save"):
+                uploads.write_chunk(upload_id, offset, request, length)
+        except (ValueError, uploads.UploadError) as e:
+            return JsonResponse({"errors": {"offset": [str(e)]}}, status=400)
+        upload_status = uploads.status(upload_id)
+    return JsonResponse(_upload_payload(upload_status))
+
+
+@require_POST
+def complete_upload(request, upload_id):
+    """
+    Finishes a chunked upload and queues it for transcription with the options
+    of the upload form. Returns the job like create_job().
+    """
+    upload_status = uploads.status(upload_id)
+    if upload_status is None:
+        raise Http404("Unknown upload.")
+    if not upload_status["complete"]:
+        return JsonResponse(_upload_payload(upload_status), status=409)
+    form = TranscriptionOptionsForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    save_audio_settings(request, form)
 
-            # Retrieve transcription options
-            model_choice = form.cleaned_data["model_choice"]
-            language = form.cleaned_data["language"] or None
-            temperature = form.cleaned_data["temperature"]
-            best_of = form.cleaned_data["best_of"]
-            condition_on_previous_text = (
-                form.cleaned_data["condition_on_previous_text"] == "true"
+    options = get_transcription_options(form.cleaned_data)
+    try:
+        ticket = jobs.admit(uploads.file_path(upload_id), options)
+    except admission.Overloaded as e:
+        # The upload is kept, so completing it can simply be retried later
+        return overloaded_response(e)
+    except FileNotFoundError:
+        # Completed by a concurrent request since the status was read
+        return _upload_conflict("The upload is already complete.")
+    try:
+        file_path, safe_base_name = uploads.finish(upload_id)
+    except uploads.UploadError as e:
+        admission.release(ticket)
+        return _upload_conflict(str(e))
+    job = jobs.submit_job(
+        file_path, safe_base_name, options, ticket, request_owner(request)
+    )
+    return JsonResponse(_job_payload(job), status=202)
+
+
+def _upload_conflict(message):
+    return JsonResponse({"errors": {"__all__": [message]}}, status=409)
+
+
+def _upload_payload(upload_status):
+    payload = dict(upload_status)
+    payload["upload_url"] = reverse("upload_detail", args=[payload["upload_id"]])
+    payload["complete_url"] = reverse("complete_upload", args=[payload["upload_id"]])
+    return payload
+
+
+@require_GET
+def queue_view(request):
+    """Returns the queued jobs and audio and the estimated wait for a new request."""
+    return JsonResponse(admission.queue_status())
+
+
+def get_job_or_404(job_id):
+    """Returns the Job with the given ID; raises Http404 if it is unknown or expired."""
+    job = jobs.get_job(job_id)
+    if job is None:
+        raise Http404("Unknown transcription job.")
+    return job
+
+
+@require_GET
+def job_status(request, job_id):
+    """Returns the status and progress of a transcription job."""
+    return JsonResponse(_job_payload(get_job_or_404(job_id)))
+
+
+@require_GET
+def job_download(request, job_id):
+    """Returns the output file of a finished transcription job."""
+    job = get_job_or_404(job_id)
+    if job.status != "finished":
+        return JsonResponse(_job_payload(job), status=409)
+    if not os.path.exists(job.output_file_path):
+        _restore_output(job)
+    return build_download_response(
+        job.output_file_path, job.safe_base_name, job.options["output_format"]
+    )
+
+
+def _restore_output(job):
+    # Render the output again from the stored result, without running inference
+    stored = store.load_result(job.result_key) if job.result_key else None
+    if stored is None:
+        raise Http404("The output of this job has expired.")
+    write_output(stored[0], job.output_file_path, job.options, job.safe_base_name)
+
+
+@require_GET
+def find_jobs(request, audio_hash):
+    """
+    Lists the stored, finished jobs for an audio file's SHA256, newest first,
+    so finished work can be fetched again without uploading the file.
+    """
+    try:
+        records = list(store.find_jobs(audio_hash.lower())[:50])
+    except DatabaseError:
+        logger.exception("Could not look up stored transcription jobs.")
+        records = []
+    return JsonResponse(
+        {"jobs": [_job_payload(jobs.Job.from_record(record)) for record in records]}
+    )
+
+
+@require_GET
+def job_events(request, job_id):
+    """
+    Streams a job's progress and its subtitle cues as Server-Sent Events while
+    it is transcribed. The cue format is taken from ?format= (srt or vtt) and
+    defaults to the job's output format.
+    """
+    job = get_job_or_404(job_id)
+    return event_stream_response(
+        _job_event_stream(JobEvents(job, event_format(request, job)))
+    )
+
+
+def _job_event_stream(events):
+    while True:
+        events.refresh()
+        yield from events.poll()
+        if events.done:
+            return
+        time.sleep(EVENT_POLL_SECONDS)
+
+
+def event_format(request, job):
+    """Returns the cue format of a job's event stream: ?format= if valid, else the job's."""
+    fmt = request.GET.get("format", job.options["output_format"])
+    return fmt if fmt in ("srt", "vtt") else "srt"
+
+
+def event_stream_response(stream):
+    """Wraps an iterator of Server-Sent Events in an unbuffered streaming response."""
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Disable proxy buffering (nginx)
+    return response
+
+
+class JobEvents:
+    """
+    The Server-Sent Events of a job: cues for its new segments, its progress when
+    it changed and finally its status. Event streams call poll() every
+    EVENT_POLL_SECONDS, after refresh(), until done is set. payload(job) gives the
+    progress data.
+    """
+
+    def __init__(self, job, fmt, payload=None):
+        self.job = job
+        self.fmt = fmt
+        self.payload = payload or _job_payload
+        self.done = False
+        self._sent_segments = 0
+        self._last_progress = None
+
+    def refresh(self):
+        """
+        Reloads a job run by another web worker from the database (blocking), so
+        its status and progress are current. Jobs of this process need no reload.
+        """
+        if not self.job.done and not jobs.is_local(self.job.id):
+            self.job = jobs.get_job(self.job.id) or self.job
+
+    def poll(self):
+        """Returns the events that happened since the previous call."""
+        events = []
+        done = self.job.done
+        segments = self.job.segments[self._sent_segments :]
+        if segments:
+            text = rendering.render_cues(
+                segments,
+                self.job.options["max_subtitle_length"],
+                self.job.options["max_length_mode"],
+                self.fmt,
+                start_index=self._sent_segments,
             )
-            output_format = form.cleaned_data["output_format"]
-            max_subtitle_length = form.cleaned_data.get("max_subtitle_length", 3)
-            max_length_mode = form.cleaned_data.get("max_length_mode", "line")
-
-            # Select device (GPU if available)
-            device = "cuda" if torch.cuda.is_available() else "cpu"
-            logger.info(f"Using device: {device}")
-
-            # Load Whisper model from cache or download if necessary
-            if model_choice in MODEL_CACHE:
-                model = MODEL_CACHE[model_choice]
-                logger.info(f"Loaded '{model_choice}' model from cache.")
-            else:
-                model = whisper.load_model(model_choice, download_root=MODEL_DIR).to(
-                    device
-                )
-                MODEL_CACHE[model_choice] = model
-                logger.info(f"Loaded '{model_choice}' model and added to cache.")
-
-            # Transcribe audio file
-            result = model.transcribe(
-                file_path,
-                language=language,
-                temperature=temperature,
-                best_of=best_of,
-                condition_on_previous_text=condition_on_previous_text,
+            self._sent_segments += len(segments)
+            events.append(
+                _server_sent_event("cues", {"format": self.fmt, "text": text})
             )
+        payload = self.payload(self.job)
+        if payload != self._last_progress:
+            events.append(_server_sent_event("progress", payload))
+            self._last_progress = payload
+        if done:
+            events.append(_server_sent_event(self.job.status, payload))
+            self.done = True
+        return events
 
-            # Prepare output file
-            file_extension = output_format
-            output_filename = f"{safe_base_name}.{file_extension}"
-            output_file_path = os.path.join(temp_dir, output_filename)
-
-            try:
-                if output_format == "srt":
-                    with open(output_file_path, "w", encoding="utf-8") as subtitle_file:
-                        write_subtitles(
-                            subtitle_file,
-                            result["segments"],
-                            max_subtitle_length,
-                            max_length_mode,
-                            fmt="srt",
-                        )
-                elif output_format == "vtt":
-                    with open(output_file_path, "w", encoding="utf-8") as subtitle_file:
-                        subtitle_file.write("WEBVTT\n\n")
-                        write_subtitles(
-                            subtitle_file,
-                            result["segments"],
-                            max_subtitle_length,
-                            max_length_mode,
-                            fmt="vtt",
-                        )
-                elif output_format == "txt":
-                    with open(output_file_path, "w", encoding="utf-8") as txt_file:
-                        txt_file.write(result["text"])
-                elif output_format == "json":
-                    with open(output_file_path, "w", encoding="utf-8") as json_file:
-                        json.dump(result, json_file, indent=4)
-                else:
-                    raise ValueError("Unsupported output format.")
-
-                # Return file as download response
-                with open(output_file_path, "rb") as f:
-                    response = HttpResponse(
-                        f.read(), content_type=mimetypes.guess_type(output_file_path)[0]
-                    )
-                    # Create an ASCII fallback filename
-                    ascii_base = safe_base_name.encode("ascii", "ignore").decode(
-                        "ascii"
-                    )
-                    fallback_filename = f"{ascii_base}.{file_extension}"
-                    encoded_filename = urllib.parse.quote(output_filename)
-                    response["Content-Disposition"] = (
-                        f'attachment; filename="{fallback_filename}"; '
-                        f"filename*=UTF-8''{encoded_filename}"
-                    )
-                return response
-            finally:
-                # Clean up temporary files
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                if os.path.exists(output_file_path):
-                    os.remove(output_file_path)
-    else:
-        # Initialize form with saved settings if available
-        form = AudioUploadForm(initial=saved_settings)
-    return render(request, "upload.html", {"form": form})
+
+def _server_sent_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _job_payload(job):
+    payload = job.to_dict()
+    payload["status_url"] = reverse("job_status", args=[job.id])
+    payload["download_url"] = reverse("job_download", args=[job.id])
+    payload["events_url"] = reverse("job_events", args=[job.id])
+    return payload
+
+
+@require_GET
+def metrics_view(request):
+    """Exposes pipeline timings, model pool residency and cache usage for Prometheus."""
+    pool = MODEL_POOL.stats()
+    resident_models = set(pool["resident_models"])
+    families = [
+        (
+            "subtitle_model_resident",
+            "gauge",
+            "Whether a model is loaded in the model pool.",
+            [
+                ({"model": name}, int(name in resident_models))
+                for name in sorted(resident_models | set(pool["loading_models"]))
+            ],
+        ),
+        (
+            "subtitle_model_pool_resident_bytes",
+            "gauge",
+            "Bytes held by models in the model pool.",
+            [({}, pool["resident_bytes"])],
+        ),
+        (
+            "subtitle_model_pool_budget_bytes",
+            "gauge",
+            "Memory budget of the model pool (absent when unlimited).",
+            [({}, pool["budget_bytes"])] if pool["budget_bytes"] is not None else [],
+        ),
+        (
+            "subtitle_model_pool_hits_total",
+            "counter",
+            "Model requests served by an already loaded model.",
+            [({}, pool["hits"])],
+        ),
+        (
+            "subtitle_model_pool_loads_total",
+            "counter",
+            "Models loaded from disk.",
+            [({}, pool["loads"])],
+        ),
+        (
+            "subtitle_model_pool_load_seconds_total",
+            "counter",
+            "Time spent loading models from disk.",
+            [({}, pool["load_seconds"])],
+        ),
+        (
+            "subtitle_model_pool_evictions_total",
+            "counter",
+            "Models evicted to stay within the memory budget.",
+            [({}, pool["evictions"])],
+        ),
+    ]
+    queue = admission.queue_status()
+    families += [
+        (
+            "subtitle_queued_jobs",
+            "gauge",
+            "Admitted transcriptions that are queued or running.",
+            [
+                ({"model": model["model"], "device": model["device"]}, model["jobs"])
+                for model in queue["models"]
+            ],
+        ),
+        (
+            "subtitle_queued_audio_seconds",
+            "gauge",
+            "Seconds of audio still to transcribe for admitted transcriptions.",
+            [
+                (
+                    {"model": model["model"], "device": model["device"]},
+                    model["queued_audio_seconds"],
+                )
+                for model in queue["models"]
+            ],
+        ),
+        (
+            "subtitle_estimated_wait_seconds",
+            "gauge",
+            "Estimated time before a new transcription starts.",
+            [({}, queue["estimated_wait_seconds"])],
+        ),
+    ]
+    for cache_name, cache_stats in (
+        ("result", result_cache.stats()),
+        ("audio", audio_cache.stats()),
+    ):
+        labels = {"cache": cache_name}
+        families += [
+            (
+                "subtitle_cache_hits_total",
+                "counter",
+                "Cache lookups that found an entry.",
+                [(labels, cache_stats["hits"])],
+            ),
+            (
+                "subtitle_cache_misses_total",
+                "counter",
+                "Cache lookups that found no entry.",
+                [(labels, cache_stats["misses"])],
+            ),
+            (
+                "subtitle_cache_bytes",
+                "gauge",
+                "Bytes stored in the cache directory.",
+                [(labels, cache_stats["bytes"])],
+            ),
+        ]
+
+    # Families sharing a name (one per cache) are written as one block
+    merged = {}
+    for name, kind, documentation, samples in families:
+        merged.setdefault(name, (kind, documentation, []))[2].extend(samples)
+    body = metrics.render() + "".join(
+        metrics.format_metric(name, kind, documentation, samples)
+        for name, (kind, documentation, samples) in merged.items()
+    )
+    return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@require_GET
+def readiness(request):
+    """
+    Reports whether startup checks and model warm-up have finished, and whether
+    the inference server (if one is configured) answers.
+    """
+    ready = STARTUP_COMPLETE.is_set()
+    pool = MODEL_POOL.stats()
+    if INFERENCE_SERVER:
+        try:
+            pool = inference_server.ping(INFERENCE_SERVER)
+        except inference_server.InferenceServerError as e:
+            logger.warning(str(e))
+            ready = False
+    return JsonResponse(
+        {"ready": ready, "resident_models": pool["resident_models"]},
+        status=200 if ready else 503,
+    )
@@ -11,6 +11,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from subtitle.apps import run_startup_checks
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'webUi.settings')
 
 application = get_asgi_application()
+
+# Verify and preload models in the serving process only
+run_startup_checks()
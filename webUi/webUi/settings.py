@@ -50,6 +50,14 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# The first handler times how long upload bodies take to receive and parse (the
+# "upload_read" stage on /metrics/); the others are Django's defaults
+FILE_UPLOAD_HANDLERS = [
+    "subtitle.upload_handlers.UploadTimingHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
 ROOT_URLCONF = "webUi.urls"
 
 TEMPLATES = [
@@ -152,3 +160,130 @@ LOGGING = {
         },
     },
 }
+
+
+# Transcription settings
+
+# Number of background transcription jobs that may run at the same time. A loaded model
+# decodes one request at a time, so jobs on the same model take turns; more workers
+# help when requests use different models or with SUBTITLE_BATCHED_DECODING.
+SUBTITLE_JOB_WORKERS = 1
+
+# Number of finished jobs kept in memory so their results can be downloaded
+SUBTITLE_JOB_HISTORY = 100
+
+# Maximum size of the transcription result cache (transcriptionCache/) in bytes
+SUBTITLE_RESULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Memory (or VRAM on GPU) budget in bytes for loaded Whisper models; None means no limit.
+# Least recently used models are unloaded once the budget is exceeded.
+SUBTITLE_MODEL_MEMORY_BUDGET = None
+
+# Models loaded into memory and warmed up with a short dummy decode on startup.
+# /ready/ returns 503 until this has finished, e.g. SUBTITLE_PRELOAD_MODELS = ["turbo"]
+SUBTITLE_PRELOAD_MODELS = []
+
+# Long-audio mode: on CPU, audio longer than SUBTITLE_LONG_AUDIO_SECONDS is split at
+# quiet points into chunks of about SUBTITLE_CHUNK_SECONDS that are transcribed in
+# parallel by SUBTITLE_CHUNK_WORKERS processes (each holds its own copy of the model).
+SUBTITLE_LONG_AUDIO_SECONDS = 600
+SUBTITLE_CHUNK_SECONDS = 120
+SUBTITLE_CHUNK_WORKERS = 0
+
+# Cross-request batched decoding: when enabled, jobs that do not condition on previous
+# text are split into independent 30-second windows, and windows from concurrent jobs
+# using the same model and options are decoded together. Only jobs running at the same
+# time share batches, so this needs SUBTITLE_JOB_WORKERS above 1.
+SUBTITLE_BATCHED_DECODING = False
+SUBTITLE_BATCH_SIZE = 8
+SUBTITLE_BATCH_WAIT_MS = 50
+
+# Decoded 16 kHz audio is cached in audioCache/ as memory-mapped .npy files keyed by
+# content hash, so repeat runs skip ffmpeg. Set SUBTITLE_CACHE_MEL to also cache the
+# log-mel spectrogram used by batched decoding.
+SUBTITLE_AUDIO_CACHE_MAX_BYTES = 4 * 1024**3
+SUBTITLE_CACHE_MEL = False
+
+# Weight precision for CPU inference when a request does not choose one: "fp32",
+# "bf16" (bfloat16 weights and autocast) or "int8" (dynamically quantized linear
+# layers). Converted weights are stored once in convertedWhisperModels/.
+SUBTITLE_CPU_PRECISION = "fp32"
+
+# Finished jobs and their results are stored in the database and results/ so they can
+# be downloaded again (/jobs/<id>/download/, /results/<audio sha256>/). They expire
+# after this many hours (None keeps them forever); "manage.py cleanup_results" deletes
+# expired entries and their files.
+SUBTITLE_RESULT_RETENTION_HOURS = 7 * 24
+
+# Memory-map CPU model weights instead of reading them into each process. fp32 and bf16
+# weights are written once to convertedWhisperModels/ in a mappable file (for fp32 an
+# extra copy, as the published checkpoints are fp16) and then loaded almost instantly;
+# chunk and bulk worker processes share one copy of them through the page cache.
+SUBTITLE_MMAP_WEIGHTS = True
+
+# Separate inference process: run "manage.py inference_server" next to the web server
+# and set this to its address ("127.0.0.1:8765" or a Unix socket path such as
+# "/tmp/subtitle-inference.sock"). It owns the model pool, the device and the CPU
+# threads; web workers then load no models and send transcriptions to it. Both sides
+# must set SUBTITLE_INFERENCE_AUTHKEY to the same random secret (the server refuses to
+# start without one), e.g. from an environment variable.
+SUBTITLE_INFERENCE_SERVER = None
+SUBTITLE_INFERENCE_AUTHKEY = None
+
+# Language detection for requests without a language whose form leaves it to the server:
+# "tiny" or "base" detect it once from the first 30 seconds (and stay in the model pool)
+# and the transcription model is told the result, so chunks and batched windows agree.
+# None lets the transcription model detect the language itself.
+SUBTITLE_LANGUAGE_DETECTION_MODEL = None
+
+# Voice activity detection: when enabled (per request on the upload form, or here by
+# default), quiet stretches are found by frame energy and only the speech regions are
+# transcribed; subtitle timestamps are mapped back onto the original audio. Loud music
+# still counts as speech. The skipped seconds are reported in the JSON output and jobs.
+SUBTITLE_VAD = False
+
+# Chunked uploads (/uploads/) are written straight into uploads/ and can be resumed;
+# unfinished ones older than this many hours are deleted by "manage.py cleanup_results".
+SUBTITLE_UPLOAD_EXPIRY_HOURS = 24
+# Largest chunked upload that may be started (bytes), and how many unfinished ones may
+# exist at once; further uploads are refused (400 and 503). None removes a limit.
+SUBTITLE_MAX_UPLOAD_BYTES = 4 * 1024**3
+SUBTITLE_MAX_OPEN_UPLOADS = 100
+
+# Admission control: requests are turned away with 429 and a Retry-After header when
+# more than this many seconds of audio are already queued or running for their model
+# on this device (a request for an idle model is always accepted). The wait is
+# estimated from the real-time factor measured in this process, starting from
+# SUBTITLE_DEFAULT_REAL_TIME_FACTOR for the base model (scaled for the other sizes).
+# None disables the limit.
+SUBTITLE_MAX_QUEUED_AUDIO_SECONDS = 4 * 3600
+SUBTITLE_DEFAULT_REAL_TIME_FACTOR = 0.5
+
+# Order of queued transcription jobs: "sjf" starts the job with the least expected work
+# (audio duration, probed from the file's metadata, times the model's real-time
+# factor) first, so short clips do not wait behind long recordings; "fifo" keeps
+# arrival order. Under "sjf" each second of waiting counts as SUBTITLE_SCHEDULING_AGING
+# seconds less work, so long jobs still start. SUBTITLE_SCHEDULING_FAIR shares the
+# workers between users (or client addresses) first. Compare the policies on a
+# synthetic or recorded workload with "manage.py simulate_scheduling".
+SUBTITLE_SCHEDULING_POLICY = "sjf"
+SUBTITLE_SCHEDULING_AGING = 0.1
+SUBTITLE_SCHEDULING_FAIR = False
+
+# Streaming decode: uploads of at least SUBTITLE_STREAM_MIN_SECONDS are transcribed in
+# windows of SUBTITLE_STREAM_WINDOW_SECONDS (the first one 30 seconds) while ffmpeg is
+# still decoding them, so inference starts at once and memory stays bounded instead of
+# holding the whole waveform (about 230 MB per hour). Their audio is not kept in the
+# audio cache. Not used with voice activity detection, batched or chunked decoding,
+# which need the whole waveform.
+SUBTITLE_STREAM_DECODING = True
+SUBTITLE_STREAM_MIN_SECONDS = 600
+SUBTITLE_STREAM_WINDOW_SECONDS = 120
+
+# The "auto" Whisper model picks the most accurate of SUBTITLE_AUTO_MODELS (listed
+# from the least to the most accurate) expected to finish within the request's
+# deadline, or SUBTITLE_AUTO_DEADLINE_MINUTES: its audio duration times the model's
+# real-time factor, as measured by earlier transcriptions on this device, plus the
+# estimated wait behind the queued work. If none is fast enough the fastest is used.
+SUBTITLE_AUTO_MODELS = ("tiny", "base", "small", "medium", "turbo", "large")
+SUBTITLE_AUTO_DEADLINE_MINUTES = 30
@@ -11,6 +11,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from subtitle.apps import run_startup_checks
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'webUi.settings')
 
 application = get_wsgi_application()
+
+# Verify and preload models in the serving process only
+run_startup_checks()